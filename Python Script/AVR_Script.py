@@ -4,497 +4,448 @@ This code is provided to ELARABY Group Internship, All rights of this code are r
 Date: Summer Intership 2024
 
 Description:
-This Python script uses the `tkinter` library to create a graphical user interface (GUI) for monitoring three jigs. 
+This Python script uses the `tkinter` library to create a graphical user interface (GUI) for monitoring the jigs of a station. 
 It tracks the running, pausing, and stopping times for each jig. The data is read from a serial port and is used to 
 update the GUI in real-time. The running and pausing times are displayed in a dedicated section for each jig. 
-The data is also written to a CSV file at a specific time each day.
+The data is also written to a CSV file at the end of every shift.
+
+The serial reading and the timing engine live in the headless `JigCollector` (`jig_collector.py`); this script is
+a client that subscribes to it. `tkinter` is only imported when the GUI is built, so
+`python AVR_Script.py --headless` runs the collector alone. The logo is resized once and cached as a PNG that
+Tk loads by itself, so `PIL` is only imported when that cache has to be (re)built.
+
+The dashboard builds at most JIGS_PER_PAGE panels, whatever the number of jigs: with more jigs, the panels
+show one page of jigs at a time. Page Up / Page Down (or the arrow keys) turn the pages, and with
+PAGE_SECONDS set they turn by themselves.
+
+The latest alert of the collector's rules (long pause, flapping jig, silent board) is shown in a bar under the
+panels, with a bell; clicking the bar hides it until the next alert.
 
 Modules:
-- tkinter: for creating the GUI.
+- tkinter: for creating the GUI (imported by build_Gui).
 - datetime: for handling date and time operations.
-- threading: for running tasks concurrently.
-- time: for implementing sleep functionality.
-- serial: for reading data from the serial port.
-- csv: for writing data to CSV files.
+- os: for the paths of the logo and of its cache.
 - sys: for handling system-specific parameters and functions.
-- PIL (Pillow): for image processing and display.
-
-Constants:
-- AVR_COM: The COM port used for serial communication.
-- AVR_BUAD_RATE: The baud rate for serial communication.
+- jig_collector: for the serial reading, journal, totals and export of the station.
+- jig_config: for the number of jigs, the grid layout and the state colours.
+- jig_timeline: for the day bounds of the state strips.
+- jig_timing: for formatting the running/pause totals.
+- jig_events: for handing jig events from worker threads to the Tk main loop.
+- jig_render: for sending only changed widget values to Tk.
+- jig_metrics: for publishing the queue depth and Tk update latency on the collector's metrics endpoint.
+- PIL (Pillow): for resizing the logo (imported by load_Logo when its cache is missing or stale).
 
 Variables:
-- rtotal1_elapsed_running_time, rtotal2_elapsed_running_time, rtotal3_elapsed_running_time: Total elapsed running 
-  times for the jigs.
-- ptotal1_elapsed_pause_time, ptotal2_elapsed_pause_time, ptotal3_elapsed_pause_time: Total elapsed pause times for
-  the jigs.
-- jig1_start_time, jig2_start_time, jig3_start_time: Start times for the jigs.
-- jig1_pause_time, jig2_pause_time, jig3_pause_time: Pause times for the jigs.
-- jig1_stop_time, jig2_stop_time, jig3_stop_time: Stop times for the jigs.
-- rcounter_id_1, rcounter_id_2, rcounter_id_3: Threading.Timer objects for running time counters.
-- pcounter_id_1, pcounter_id_2, pcounter_id_3: Threading.Timer objects for pause time counters.
+- collector: JigCollector that reads the serial port and keeps the totals of every jig.
+- jig_table: JigTable of the collector, holding the running and pause totals and the last stop time of every jig.
+- jig_frames, jig_name_labels, jig_CurrentRunning_labels, jig_CurrentResuming_labels,
+  jig_CurrentStopping_labels, jig_strips: Widgets of every panel, indexed by panel (jig id - page_first).
+- strip_bars: Canvas item and x range of the last bar of every panel strip.
+- page_first: Jig id shown on the first panel.
+- page_shown_at: Monotonic time the current page was shown, for PAGE_SECONDS.
+- strip_day: Day bounds (epoch ms) of the strips currently drawn.
+- alert_label: Bar under the panels showing the latest alert.
+- ui_pump: EventPump that hands the items published by the collector to the Tk main loop. Its renderer counts
+  the applied and skipped widget updates.
+- shown_day: Date currently shown in the header.
 
 Functions:
-- Serial_Start: Starts the serial communication and updates the GUI based on the received data.
-- counter_Start: Starts the running time counter for a specified jig.
-- counter_Pause: Starts the pause time counter for a specified jig.
-- counter_Stop: Stops the counters for a specified jig.
-- counter_Pause_Stop: Stops the pause time counter for a specified jig.
-- counter_Running_Stop: Stops the running time counter for a specified jig.
-- update_Daydate: Updates the current date in the GUI.
+- handle_Events: Redraws the jigs named in a batch of queued events, on the Tk main loop.
+- panel_Of: Returns the panel of a jig, or None when the jig is on another page.
+- paint_Jig: Redraws the state colour, stop time and totals of one jig.
+- show_Page: Shows the page starting at a jig id on the panels.
+- turn_Page: Shows the next or the previous page.
+- refresh_Jig: Redraws the running and pause times of one jig.
+- refresh_Counters: Redraws the running and pause times of the running and paused jigs of the page.
+- strip_X: Pixel of a moment on the day strips.
+- draw_Strip: Redraws the state strip of one jig for the whole day from the collector's timeline.
+- advance_Strip: Starts the bar of the new state of one jig on its strip.
+- refresh_Strips: Extends the current bars to the present time, redrawing all strips at day change.
+- show_Alert: Shows the latest alert of the collector's rules in the alert bar.
+- update_Clocks: Updates the current date and time in the GUI, once per refresh cycle.
+- update_Daydate: Updates the current date in the GUI when the day changes.
 - update_Currenttime: Updates the current time in the GUI.
-- convert_timeToH_M_S: Converts a timedelta object to a formatted string (HH:MM:SS).
-- CSV_WriteData: Writes the running and pause times of the jigs to a CSV file at a specific time each day.
+- build_Jig_frame: Builds one jig panel in the dashboard grid.
+- load_Logo: Returns the logo at LOGO_SIZE as a Tk image, from its PNG cache.
+- build_Gui: Imports tkinter and builds the dashboard window.
+- main: Starts the collector and the dashboard, or the collector alone with `--headless`. With `--asyncio`
+  both run on one asyncio loop (`jig_async.py`) instead of the serial and scheduler threads. Given a
+  StartupProfile, it only builds them, marks each step and returns (`jig_launch.py --profile`).
 
 Usage:
-Run the script to start the GUI and the serial communication. The GUI will display the running, pausing, 
-and stopping times for each jig, and the data will be written to a CSV file daily.
+Set `jig_count` in `jig_monitor.ini` (see `jig_config.py`), then run the script to start the GUI and the serial communication. The GUI will display the running, pausing, 
+and stopping times for each jig, and the data will be written to a CSV file at every shift boundary in
+`SHIFT_BOUNDARIES`. After a restart the totals are rebuilt from `jig_journal.bin` and `jig_snapshot.json`.
+Run `python AVR_Script.py --headless` (or `python jig_collector.py`) on a machine without a display.
+Add `--asyncio` to run the serial reads, the tick and the GUI on a single asyncio event loop.
+`python jig_launch.py --config FILE` starts the same script with another config file.
 
 """
-import tkinter
 import datetime
-import threading
-from time import sleep
-import serial
-import csv
+import os
 import sys
-from PIL import Image, ImageTk
-
-AVR_COM = 'COM6'
-AVR_BUAD_RATE = 9600
-
-# Track the total elapsed time separately
-rtotal1_elapsed_running_time = datetime.timedelta()
-rtotal2_elapsed_running_time = datetime.timedelta()
-rtotal3_elapsed_running_time = datetime.timedelta()
-
-ptotal1_elapsed_pause_time = datetime.timedelta()
-ptotal2_elapsed_pause_time = datetime.timedelta()
-ptotal3_elapsed_pause_time = datetime.timedelta()
-
-jig1_start_time = None
-jig2_start_time = None
-jig3_start_time = None
-
-jig1_pause_time = None
-jig2_pause_time = None
-jig3_pause_time = None
-
-jig1_stop_time = None
-jig2_stop_time = None
-jig3_stop_time = None
-
-rcounter_id_1 = None
-rcounter_id_2 = None
-rcounter_id_3 = None
-
-pcounter_id_1 = None
-pcounter_id_2 = None
-pcounter_id_3 = None
-
-def Serial_Start():
-    global jig1_start_time, jig2_start_time, jig3_start_time
-    global jig1_pause_time, jig2_pause_time, jig3_pause_time
-
-    with serial.Serial(AVR_COM, AVR_BUAD_RATE, timeout=2) as serial_port:
-        try:
-            while True:
-                if serial_port.in_waiting > 0:
-                    data = serial_port.readline(2).decode('utf-8').rstrip()
-                    print(data)
-                    sleep(0.1)
-                    
-                    if '1W' in data:
-                        jig1_start_time = datetime.datetime.now()
-                        counter_Start(1)
-                        counter_Pause_Stop(1)
-                        jig1_frame.config(bg="#3CB371")
-
-                    elif '1P' in data:
-                        jig1_pause_time = datetime.datetime.now()
-                        counter_Pause(1)
-                        counter_Running_Stop(1)
-                        jig1_frame.config(bg="#E4D96F")
-
-                    elif '1S' in data:
-                        counter_Stop(1)
-                        jig1_frame.config(bg="#B34234")
-
-                    elif '2W' in data:
-                        jig2_start_time = datetime.datetime.now()
-                        counter_Start(2)
-                        counter_Pause_Stop(2)
-                        jig2_frame.config(bg="#3CB371")
-
-                    elif '2P' in data:
-                        jig2_pause_time = datetime.datetime.now()
-                        counter_Pause(2)
-                        counter_Running_Stop(2)
-                        jig2_frame.config(bg="#E4D96F")
-
-                    elif '2S' in data:
-                        counter_Stop(2)
-                        jig2_frame.config(bg="#B34234")   
-
-                    elif '3W' in data:
-                        jig3_start_time = datetime.datetime.now()
-                        counter_Start(3)
-                        counter_Pause_Stop(3)
-                        jig3_frame.config(bg="#3CB371")
-
-                    elif '3P' in data:
-                        jig3_pause_time = datetime.datetime.now()
-                        counter_Pause(3)
-                        counter_Running_Stop(3)
-                        jig3_frame.config(bg="#E4D96F")
-
-                    elif '3S' in data:
-                        counter_Stop(3)
-                        jig3_frame.config(bg="#B34234")      
-
-        except serial.SerialException as exc:
-            print(f"Serial exception: {exc}")
-            root.destroy()
-        except Exception as e:
-            print(f"Unexpected error: {e}")
-            root.destroy()
-            sys.exit(1)
-
-def counter_Start(num_of_jeg=0):
-    global jig1_start_time, jig2_start_time, jig3_start_time
-    global rcounter_id_1, rcounter_id_2, rcounter_id_3
-    global rtotal1_elapsed_running_time, rtotal2_elapsed_running_time, rtotal3_elapsed_running_time
-    
-    rcurrent_time = datetime.datetime.now()
-
-    if num_of_jeg   == 1:
-         relapsed_time = rcurrent_time -  jig1_start_time
-    elif num_of_jeg == 2:     
-         relapsed_time = rcurrent_time -  jig2_start_time
-    elif num_of_jeg == 3:     
-         relapsed_time = rcurrent_time -  jig3_start_time     
-    
-    if num_of_jeg == 1:
-        rtotal1_elapsed_running_time += relapsed_time
-        rtotal_seconds = int(rtotal1_elapsed_running_time.total_seconds())
-        jig1_start_time = rcurrent_time
-        rhours, rremainder = divmod(rtotal_seconds, 3600)
-        rminutes, rseconds = divmod(rremainder, 60)
-        rreal_time = "{:02d}:{:02d}:{:02d}".format(rhours, rminutes, rseconds)
-        jig1_CurrentRunning_label.config(text=rreal_time)
-
-        rcounter_id_1 = threading.Timer(1, counter_Start, args=[1])
-        rcounter_id_1.start()
-
-    elif num_of_jeg == 2:
-        rtotal2_elapsed_running_time += relapsed_time
-        rtotal_seconds = int(rtotal2_elapsed_running_time.total_seconds())
-        jig2_start_time = rcurrent_time
-        rhours, rremainder = divmod(rtotal_seconds, 3600)
-        rminutes, rseconds = divmod(rremainder, 60)
-        rreal_time = "{:02d}:{:02d}:{:02d}".format(rhours, rminutes, rseconds)
-        jig2_CurrentRunning_label.config(text=rreal_time)
-        rcounter_id_2 = threading.Timer(1, counter_Start, args=[2])
-        rcounter_id_2.start()
-
-    elif num_of_jeg == 3:
-        rtotal3_elapsed_running_time += relapsed_time
-        rtotal_seconds = int(rtotal3_elapsed_running_time.total_seconds())
-        jig3_start_time = rcurrent_time
-        rhours, rremainder = divmod(rtotal_seconds, 3600)
-        rminutes, rseconds = divmod(rremainder, 60)
-        rreal_time = "{:02d}:{:02d}:{:02d}".format(rhours, rminutes, rseconds)
-        jig3_CurrentRunning_label.config(text=rreal_time)
-
-        rcounter_id_3 = threading.Timer(1, counter_Start, args=[3])
-        rcounter_id_3.start()
-        
-def counter_Pause(num_of_jeg=0):
-    global jig1_pause_time, jig2_pause_time, jig3_pause_time
-    global ptotal1_elapsed_pause_time, ptotal2_elapsed_pause_time,ptotal3_elapsed_pause_time
-    global pcounter_id_1, pcounter_id_2,pcounter_id_3
-
-    pcurrent_time = datetime.datetime.now()
-    if num_of_jeg == 1 : 
-        pelapsed_time = pcurrent_time - jig1_pause_time 
-    elif num_of_jeg == 2 :
-        pelapsed_time = pcurrent_time -  jig2_pause_time
-    elif num_of_jeg == 3 :
-        pelapsed_time = pcurrent_time -  jig3_pause_time        
-    
-    if num_of_jeg == 1:
-        ptotal1_elapsed_pause_time += pelapsed_time
-        ptotal_seconds = int(ptotal1_elapsed_pause_time.total_seconds())
-        jig1_pause_time = pcurrent_time
-        phours, premainder = divmod(ptotal_seconds, 3600)
-        pminutes, pseconds = divmod(premainder, 60)
-        rreal_time = "{:02d}:{:02d}:{:02d}".format(phours, pminutes, pseconds)
-        jig1_CurrentResuming_label.config(text=rreal_time)
-        
-        pcounter_id_1 = threading.Timer(1, counter_Pause, args=[1])
-        pcounter_id_1.start()
-
-    elif num_of_jeg == 2:
-        ptotal2_elapsed_pause_time += pelapsed_time
-        ptotal_seconds = int(ptotal2_elapsed_pause_time.total_seconds())
-        jig2_pause_time = pcurrent_time
-        phours, premainder = divmod(ptotal_seconds, 3600)
-        pminutes, pseconds = divmod(premainder, 60)
-        rreal_time = "{:02d}:{:02d}:{:02d}".format(phours, pminutes, pseconds)
-        jig2_CurrentResuming_label.config(text=rreal_time)
-        
-        pcounter_id_2 = threading.Timer(1, counter_Pause, args=[2])
-        pcounter_id_2.start()
-
-    elif num_of_jeg == 3:
-        ptotal3_elapsed_pause_time += pelapsed_time
-        ptotal_seconds = int(ptotal3_elapsed_pause_time.total_seconds())
-        jig3_pause_time = pcurrent_time
-        phours, premainder = divmod(ptotal_seconds, 3600)
-        pminutes, pseconds = divmod(premainder, 60)
-        rreal_time = "{:02d}:{:02d}:{:02d}".format(phours, pminutes, pseconds)
-        jig3_CurrentResuming_label.config(text=rreal_time)
-        
-        pcounter_id_3 = threading.Timer(1, counter_Pause, args=[3])
-        pcounter_id_3.start()
-
-def counter_Stop(num_of_jeg=0):
-    global stop_jig_1, stop_jig_2, stop_jig_3 
-    
-    if num_of_jeg == 1:
-        stop_jig_1 = datetime.datetime.now().strftime("%I:%M:%S %p")
-        jig1_CurrentStopping_label.config(text= stop_jig_1)
-        counter_Running_Stop(1)
-        counter_Pause_Stop(1)
-    elif num_of_jeg == 2:
-        stop_jig_2 = datetime.datetime.now().strftime("%I:%M:%S %p")
-        jig2_CurrentStopping_label.config(text= stop_jig_2)    
-        counter_Running_Stop(2)
-        counter_Pause_Stop(2)
-    elif num_of_jeg == 3:
-        stop_jig_3 = datetime.datetime.now().strftime("%I:%M:%S %p")
-        jig3_CurrentStopping_label.config(text= stop_jig_3)    
-        counter_Running_Stop(3)
-        counter_Pause_Stop(3)
-
-def counter_Pause_Stop(num_of_jeg=0):
-    global pcounter_id_1, pcounter_id_2, pcounter_id_3
-    if num_of_jeg == 1:
-        if pcounter_id_1 is not None:
-            pcounter_id_1.cancel()
-            pcounter_id_1 = None
-    elif num_of_jeg == 2:
-        if pcounter_id_2 is not None:
-            pcounter_id_2.cancel()
-            pcounter_id_2 = None
-    elif num_of_jeg == 3:
-        if pcounter_id_3 is not None:
-            pcounter_id_3.cancel()
-            pcounter_id_3 = None
-
-def counter_Running_Stop(num_of_jeg=0):
-    global rcounter_id_1, rcounter_id_2, rcounter_id_3
-    if num_of_jeg == 1:
-        if rcounter_id_1 is not None:
-            rcounter_id_1.cancel()
-            rcounter_id_1 = None
-    elif num_of_jeg == 2:
-        if rcounter_id_2 is not None:
-            rcounter_id_2.cancel()
-            rcounter_id_2 = None
-    elif num_of_jeg == 3:
-        if rcounter_id_3 is not None:
-            rcounter_id_3.cancel()
-            rcounter_id_3 = None
-
-def update_Daydate():
-    genral_day_date = datetime.datetime.now().strftime("%A, %B %d, %Y")
-    date_now_label.config(text=genral_day_date)
-    root.after(1000, update_Daydate)
-
-def update_Currenttime():
-    genral_current_time = datetime.datetime.now().strftime("%I:%M:%S %p")
-    time_now_label.config(text=genral_current_time)
-
-    root.after(1000, update_Currenttime)
-
-def convert_timeToH_M_S(totalElapsedTime):
-    total_seconds = int(totalElapsedTime.total_seconds())
-    hours, remainder = divmod(total_seconds, 3600)
-    rminutes, seconds = divmod(remainder, 60)
-    real_time = "{:02d}:{:02d}:{:02d}".format(hours, rminutes, seconds)
-    return real_time
-
-
-def CSV_WriteData():
-    jig1_list = []
-    jig2_list = []
-    jig3_list = []
-    global ptotal1_elapsed_pause_time, ptotal2_elapsed_pause_time, ptotal3_elapsed_pause_time
-    global rtotal1_elapsed_running_time, rtotal2_elapsed_running_time, rtotal3_elapsed_running_time
-    global stop_jig_1, stop_jig_2, stop_jig_3 
-    CSV_writeTD = datetime.datetime.now()
-    if CSV_writeTD.hour == 16 and CSV_writeTD.minute == 30:
-        with open('month_data.csv', 'a', newline='') as file_csv:
-            csv_writer = csv.writer(file_csv)
-            jig1_list = [CSV_writeTD.month, CSV_writeTD.day, CSV_writeTD.year, CSV_writeTD.strftime("%I:%M:%S %p"), "Jig1",convert_timeToH_M_S( rtotal1_elapsed_running_time) , convert_timeToH_M_S(ptotal1_elapsed_pause_time), stop_jig_1]
-            csv_writer.writerow(jig1_list)
-            jig2_list = [CSV_writeTD.month, CSV_writeTD.day, CSV_writeTD.year, CSV_writeTD.strftime("%I:%M:%S %p"), "Jig2", convert_timeToH_M_S(rtotal2_elapsed_running_time), convert_timeToH_M_S(ptotal2_elapsed_pause_time), stop_jig_2]
-            csv_writer.writerow(jig2_list)
-            jig3_list = [CSV_writeTD.month, CSV_writeTD.day, CSV_writeTD.year, CSV_writeTD.strftime("%I:%M:%S %p"), "Jig3", convert_timeToH_M_S(rtotal3_elapsed_running_time), convert_timeToH_M_S(ptotal3_elapsed_pause_time),  stop_jig_3]
-            csv_writer.writerow(jig3_list)
-    
-    root.after(60000, CSV_WriteData)
-# Medium Sea Green Code    : #3CB371
-# Medium Sea Red Code      : #B34234
-# Medium Sea Yellow Code   : #E4D96F
-
-root = tkinter.Tk()
-root.title("Jig Monitoring")
-root.geometry("1320x500")
-
-
-pic_frame = tkinter.Frame(root, width=300, height=300)
-pic_frame.grid(row=0, column=1, padx=10, pady=10)
-image = Image.open("Logo.jpg")
-
-image = image.resize((400, 150))
-
-photo = ImageTk.PhotoImage(image)
-
-label = tkinter.Label(pic_frame, image=photo)
-label.image = photo
-label.pack()
-
-#===============================================================================================================================================
-
-#bottom_frame = tkinter.Frame(root, width=1290, height=150)
-#bottom_frame.grid(row=3, column=0, columnspan=3, padx=10, pady=10)
-#
-#bt_image = Image.open("Logo.jpg")
-#
-#frame_width = bottom_frame.winfo_reqwidth()
-#frame_height = bottom_frame.winfo_reqheight()
-#resized_image = bt_image.resize((frame_width, frame_height))
-#bt_photo = ImageTk.PhotoImage(resized_image)
-#
-#bt_label = tkinter.Label(bottom_frame, image=bt_photo)
-#bt_label.image = bt_photo
-#bt_label.pack()
-
-
-#===============================================================================================================================================
-
-current_date_frame = tkinter.Frame(root)
-current_date_frame.grid(row=0, column=0, padx=10, pady=10)
-
-date_label = tkinter.Label(current_date_frame, text="Day Date",font=("Impact", 25))
-date_label.grid(row=0, column=1)
-
-date_now_label = tkinter.Label(current_date_frame, text="", font=("Arial", 18),bg="black",fg="white")
-date_now_label.grid(row=0, column=2, padx=10)
-
-#===============================================================================================================================================
-
-current_time_frame = tkinter.Frame(root)
-current_time_frame.grid(row=0, column=2, padx=10, pady=10)
-
-time_label = tkinter.Label(current_time_frame, text="Current Time",font=("Impact", 25))
-time_label.grid(row=0, column=1)
-
-time_now_label = tkinter.Label(current_time_frame, text="", font=("Arial", 18),bg="black",fg="white")
-time_now_label.grid(row=0, column=2, padx=10)
-
-#===============================================================================================================================================
-
-jig1_frame = tkinter.Frame(root,width=150,height=150,bg="#B34234",border="10px", borderwidth=2)
-jig1_frame.grid(row=1, column=0,padx=10, pady=10)
-
-jig1_Running_label  = tkinter.Label(jig1_frame,width=15,height=1 , text="Running Time", font=("Impact", 20)).grid(row = 0, column = 0,padx=10, pady=10)
-jig1_CurrentRunning_label  = tkinter.Label(jig1_frame, width=10,height=1 , text="00:00:00", font=("Arial", 20))
-jig1_CurrentRunning_label.grid(row = 0, column = 1,padx=10, pady=10)
-
-jig1_Resuming_label = tkinter.Label(jig1_frame, width=15,height=1, text="Pausing Time", font=("Impact", 20)).grid(row = 1, column = 0,padx=10, pady=10)
-jig1_CurrentResuming_label = tkinter.Label(jig1_frame,width=10,height=1 , text="00:00:00", font=("Arial", 20))
-jig1_CurrentResuming_label.grid(row = 1, column = 1,padx=10, pady=10)
-
-
-jig1_Stopping_label = tkinter.Label(jig1_frame, width=15,height=1, text="Stopping Time", font=("Impact", 20)).grid(row = 2, column = 0,padx=10, pady=10)
-jig1_CurrentStopping_label = tkinter.Label(jig1_frame, width=10,height=1 ,text="00:00:00 --", font=("Arial", 20))
-jig1_CurrentStopping_label.grid(row = 2, column = 1,padx=10, pady=10)  
-
-
-#===============================================================================================================================================
-
-jig2_frame = tkinter.Frame(root,width=150,height=150,bg="#B34234",border="10px", borderwidth=2)
-jig2_frame.grid(row=1, column=1,padx=10, pady=10)
-
-jig2_Running_label  = tkinter.Label(jig2_frame,width=15,height=1 , text="Running Time", font=("Impact", 20)).grid(row = 0, column = 0,padx=10, pady=10)
-jig2_CurrentRunning_label  = tkinter.Label(jig2_frame, width=10,height=1 , text="00:00:00", font=("Arial", 20))
-jig2_CurrentRunning_label.grid(row = 0, column = 1,padx=10, pady=10)
-
-jig2_Resuming_label = tkinter.Label(jig2_frame, width=15,height=1, text="Pausing Time", font=("Impact", 20)).grid(row = 1, column = 0,padx=10, pady=10)
-jig2_CurrentResuming_label = tkinter.Label(jig2_frame,width=10,height=1 , text="00:00:00", font=("Arial", 20))
-jig2_CurrentResuming_label.grid(row = 1, column = 1,padx=10, pady=10)
-
-
-jig2_Stopping_label = tkinter.Label(jig2_frame, width=15,height=1, text="Stopping Time", font=("Impact", 20)).grid(row = 2, column = 0,padx=10, pady=10)
-jig2_CurrentStopping_label = tkinter.Label(jig2_frame, width=10,height=1 ,text="00:00:00 --", font=("Arial", 20))
-jig2_CurrentStopping_label.grid(row = 2, column = 1,padx=10, pady=10)  
-
-#===============================================================================================================================================
-
-jig3_frame = tkinter.Frame(root,width=150,height=150,bg="#B34234",border="10px", borderwidth=2)
-jig3_frame.grid(row=1, column=2,padx=10, pady=10)
-
-jig3_Running_label  = tkinter.Label(jig3_frame,width=15,height=1 , text="Running Time", font=("Impact", 20)).grid(row = 0, column = 0,padx=10, pady=10)
-jig3_CurrentRunning_label  = tkinter.Label(jig3_frame, width=10,height=1 , text="00:00:00", font=("Arial", 20))
-jig3_CurrentRunning_label.grid(row = 0, column = 1,padx=10, pady=10)
-
-jig3_Resuming_label = tkinter.Label(jig3_frame, width=15,height=1, text="Pausing Time", font=("Impact", 20)).grid(row = 1, column = 0,padx=10, pady=10)
-jig3_CurrentResuming_label = tkinter.Label(jig3_frame,width=10,height=1 , text="00:00:00", font=("Arial", 20))
-jig3_CurrentResuming_label.grid(row = 1, column = 1,padx=10, pady=10)
-
-
-jig3_Stopping_label = tkinter.Label(jig3_frame, width=15,height=1, text="Stopping Time", font=("Impact", 20)).grid(row = 2, column = 0,padx=10, pady=10)
-jig3_CurrentStopping_label = tkinter.Label(jig3_frame, width=10,height=1 ,text="00:00:00 --", font=("Arial", 20))
-jig3_CurrentStopping_label.grid(row = 2, column = 1,padx=10, pady=10) 
-
-#===============================================================================================================================================
-
-# Create a frame to hold the jig names
-jig1_names = tkinter.Frame(root,width=150,height=150,bg="black")
-jig1_names.grid(row=2, column=0, pady=10)  # Adjust grid placement as needed
-
-# Create labels for each jig and add them to the frame
-jig1_name = tkinter.Label(jig1_names, text="Jig 1", font=("Impact", 25))
-jig1_name.grid(row=0, column=0, padx=5, pady=5)
-
-# Create a frame to hold the jig names
-jig2_names = tkinter.Frame(root,width=150,height=150,bg="black")
-jig2_names.grid(row=2, column=1, pady=10)  # Adjust grid placement as needed
-
-# Create labels for each jig and add them to the frame
-jig2_name = tkinter.Label(jig2_names, text="Jig 2", font=("Impact", 25))
-jig2_name.grid(row=0, column=0, padx=5, pady=5)
-
-# Create a frame to hold the jig names
-jig3_names = tkinter.Frame(root,width=100,height=150,bg="black")
-jig3_names.grid(row=2, column=2, pady=10)  # Adjust grid placement as needed
-
-# Create labels for each jig and add them to the frame
-jig3_name = tkinter.Label(jig3_names, text="Jig 3", font=("Impact", 25))
-jig3_name.grid(row=0, column=0, padx=5, pady=5)
-
-#Call all functions used in this script
-#serial_thread = threading.Thread(target=Serial_Start)
-#serial_thread.start()
-
-CSV_File_thread = threading.Thread(target=CSV_WriteData)
-CSV_File_thread.start()
-
-update_Currenttime()
-
-update_Daydate()
-
-root.mainloop()
+import time
+from jig_collector import JigCollector, ALERT, REFRESH_ALL, SERIAL_FAILED
+from jig_timing import JIG_STOPPED, convert_timeToH_M_S
+from jig_events import EventPump
+from jig_metrics import register_Pump
+from jig_timeline import day_Bounds
+from jig_config import JIG_COUNT, JIG_GRID_COLUMNS, JIGS_PER_PAGE, PAGE_SECONDS, STRIP_WIDTH, STRIP_HEIGHT
+from jig_config import LOGO_PATH, LOGO_SIZE, COLOUR_STOPPED, STATE_COLOURS
+
+# Set by main and build_Gui
+collector = None
+jig_table = None
+root = None
+ui_pump = None
+
+# Widgets of every panel; panel i shows jig page_first + i
+jig_frames = []
+jig_name_labels = []
+jig_CurrentRunning_labels = []
+jig_CurrentResuming_labels = []
+jig_CurrentStopping_labels = []
+jig_strips = []
+page_first = 1
+page_shown_at = 0.0
+
+# [canvas item, x0, x1] of the last bar drawn on each strip, so a tick only moves the right edge of one bar
+strip_bars = []
+strip_day = None
+
+# Date currently shown in the header, so the day date is only reformatted when it changes
+shown_day = None
+
+def handle_Events(items):
+    refresh_all = False
+    for num_of_jeg in set(items):
+        if num_of_jeg == SERIAL_FAILED:
+            # The pump closes the window once this batch is over
+            ui_pump.stop()
+            return
+        if num_of_jeg == REFRESH_ALL:
+            refresh_all = True
+            continue
+        if num_of_jeg == ALERT:
+            show_Alert()
+            continue
+        # Jigs of the other pages are painted when their page is shown
+        if panel_Of(num_of_jeg) is None:
+            continue
+        paint_Jig(num_of_jeg)
+        advance_Strip(num_of_jeg)
+    if refresh_all:
+        refresh_Counters()
+        refresh_Strips()
+        update_Clocks()
+        if PAGE_SECONDS and time.monotonic() - page_shown_at >= PAGE_SECONDS:
+            turn_Page(1)
+
+def panel_Of(num_of_jeg):
+    panel = num_of_jeg - page_first
+    return panel if 0 <= panel < len(jig_frames) and num_of_jeg <= JIG_COUNT else None
+
+def paint_Jig(num_of_jeg):
+    panel = panel_Of(num_of_jeg)
+    record = jig_table[num_of_jeg]
+    ui_pump.update(jig_frames[panel], bg=STATE_COLOURS[record.state])
+    stop_text = record.stop_time.strftime("%I:%M:%S %p") if record.stop_time is not None else "00:00:00 --"
+    ui_pump.update(jig_CurrentStopping_labels[panel], text=stop_text)
+    refresh_Jig(num_of_jeg)
+
+def show_Page(first):
+    global page_first, page_shown_at
+    page_first = first
+    page_shown_at = time.monotonic()
+    now_ms = round(time.time() * 1000)
+    for panel, num_of_jeg in enumerate(range(first, first + len(jig_frames))):
+        if num_of_jeg > JIG_COUNT:
+            # Last page: hide the panels past the last jig
+            jig_frames[panel].grid_remove()
+            jig_name_labels[panel].master.grid_remove()
+            strip_bars[panel] = None
+            continue
+        jig_frames[panel].grid()
+        jig_name_labels[panel].master.grid()
+        ui_pump.update(jig_name_labels[panel], text=f"Jig {num_of_jeg}")
+        paint_Jig(num_of_jeg)
+        if strip_day is not None:
+            draw_Strip(num_of_jeg, now_ms)
+    if JIG_COUNT > len(jig_frames):
+        last = min(JIG_COUNT, first + len(jig_frames) - 1)
+        root.title(f"Jig Monitoring - jigs {first} to {last} of {JIG_COUNT}")
+
+def turn_Page(step):
+    page_count = -(-JIG_COUNT // len(jig_frames))
+    page = ((page_first - 1) // len(jig_frames) + step) % page_count
+    show_Page(page * len(jig_frames) + 1)
+
+def refresh_Jig(num_of_jeg):
+    panel = panel_Of(num_of_jeg)
+    record = jig_table[num_of_jeg]
+    ui_pump.update(jig_CurrentRunning_labels[panel], text=convert_timeToH_M_S(record.running_seconds()))
+    ui_pump.update(jig_CurrentResuming_labels[panel], text=convert_timeToH_M_S(record.pause_seconds()))
+
+def refresh_Counters():
+    # Only running and paused jigs can have moved since the last refresh
+    for num_of_jeg in range(page_first, min(JIG_COUNT, page_first + len(jig_frames) - 1) + 1):
+        if jig_table[num_of_jeg].state != JIG_STOPPED:
+            refresh_Jig(num_of_jeg)
+
+def strip_X(time_ms):
+    day_start, day_end = strip_day
+    return max(0, min(STRIP_WIDTH, (time_ms - day_start) * STRIP_WIDTH // (day_end - day_start)))
+
+def draw_Strip(num_of_jeg, now_ms):
+    panel = panel_Of(num_of_jeg)
+    strip = jig_strips[panel]
+    strip.delete("all")
+    strip_bars[panel] = None
+    for begin, end, state in collector.timeline.intervals(num_of_jeg, strip_day[0], strip_day[1], now_ms=now_ms):
+        x0, x1 = strip_X(begin), strip_X(end)
+        item = strip.create_rectangle(x0, 0, x1, STRIP_HEIGHT, fill=STATE_COLOURS[state], width=0)
+        strip_bars[panel] = [item, x0, x1]
+
+def advance_Strip(num_of_jeg):
+    last = collector.timeline.last(num_of_jeg)
+    if last is None or strip_day is None:
+        return
+    time_ms, state = last
+    panel = panel_Of(num_of_jeg)
+    bar = strip_bars[panel]
+    x = strip_X(time_ms)
+    if bar is not None and bar[2] < x:
+        # Close the previous bar where the new state begins
+        jig_strips[panel].coords(bar[0], bar[1], 0, x, STRIP_HEIGHT)
+    item = jig_strips[panel].create_rectangle(x, 0, x, STRIP_HEIGHT, fill=STATE_COLOURS[state], width=0)
+    strip_bars[panel] = [item, x, x]
+
+def refresh_Strips():
+    global strip_day
+    now_ms = round(time.time() * 1000)
+    if strip_day is None or now_ms >= strip_day[1]:
+        strip_day = day_Bounds(now_ms)
+        for num_of_jeg in range(page_first, min(JIG_COUNT, page_first + len(jig_frames) - 1) + 1):
+            draw_Strip(num_of_jeg, now_ms)
+        return
+    # One coords call per strip whose bar grew by at least a pixel (every few minutes on a day-wide strip)
+    x = strip_X(now_ms)
+    for panel, bar in enumerate(strip_bars):
+        if bar is not None and bar[2] < x:
+            bar[2] = x
+            jig_strips[panel].coords(bar[0], bar[1], 0, x, STRIP_HEIGHT)
+
+def show_Alert():
+    if not collector.rules.recent:
+        return
+    alert = collector.rules.recent[-1]
+    ui_pump.update(alert_label, text=f"{alert.time:%I:%M:%S %p}  {alert.message}")
+    alert_label.grid()
+    root.bell()
+
+def update_Clocks():
+    # One refresh cycle drives both clocks of the header
+    now = datetime.datetime.now()
+    update_Currenttime(now)
+    update_Daydate(now)
+
+def update_Daydate(now):
+    global shown_day
+    if now.date() != shown_day:
+        shown_day = now.date()
+        genral_day_date = now.strftime("%A, %B %d, %Y")
+        ui_pump.update(date_now_label, text=genral_day_date)
+
+def update_Currenttime(now):
+    genral_current_time = now.strftime("%I:%M:%S %p")
+    ui_pump.update(time_now_label, text=genral_current_time)
+
+def build_Jig_frame(panel):
+    # Each panel takes two grid rows: the jig counters and, below them, the jig name
+    grid_row = 1 + 2 * (panel // JIG_GRID_COLUMNS)
+    grid_column = panel % JIG_GRID_COLUMNS
+
+    jig_frame = tkinter.Frame(root,width=150,height=150,bg=COLOUR_STOPPED,border="10px", borderwidth=2)
+    jig_frame.grid(row=grid_row, column=grid_column,padx=10, pady=10)
+
+    tkinter.Label(jig_frame,width=15,height=1 , text="Running Time", font=("Impact", 20)).grid(row = 0, column = 0,padx=10, pady=10)
+    jig_CurrentRunning_label  = tkinter.Label(jig_frame, width=10,height=1 , text="00:00:00", font=("Arial", 20))
+    jig_CurrentRunning_label.grid(row = 0, column = 1,padx=10, pady=10)
+
+    tkinter.Label(jig_frame, width=15,height=1, text="Pausing Time", font=("Impact", 20)).grid(row = 1, column = 0,padx=10, pady=10)
+    jig_CurrentResuming_label = tkinter.Label(jig_frame,width=10,height=1 , text="00:00:00", font=("Arial", 20))
+    jig_CurrentResuming_label.grid(row = 1, column = 1,padx=10, pady=10)
+
+    tkinter.Label(jig_frame, width=15,height=1, text="Stopping Time", font=("Impact", 20)).grid(row = 2, column = 0,padx=10, pady=10)
+    jig_CurrentStopping_label = tkinter.Label(jig_frame, width=10,height=1 ,text="00:00:00 --", font=("Arial", 20))
+    jig_CurrentStopping_label.grid(row = 2, column = 1,padx=10, pady=10)
+
+    # Day strip of the jig states, from midnight to midnight
+    jig_strip = tkinter.Canvas(jig_frame, width=STRIP_WIDTH, height=STRIP_HEIGHT, bg="grey25", highlightthickness=0)
+    jig_strip.grid(row = 3, column = 0, columnspan = 2, padx=10, pady=(0, 10))
+
+    # Create a frame to hold the jig name
+    jig_names = tkinter.Frame(root,width=150,height=150,bg="black")
+    jig_names.grid(row=grid_row + 1, column=grid_column, pady=10)
+
+    jig_name = tkinter.Label(jig_names, text=f"Jig {panel + 1}", font=("Impact", 25))
+    jig_name.grid(row=0, column=0, padx=5, pady=5)
+
+    jig_frames.append(jig_frame)
+    jig_name_labels.append(jig_name)
+    jig_CurrentRunning_labels.append(jig_CurrentRunning_label)
+    jig_CurrentResuming_labels.append(jig_CurrentResuming_label)
+    jig_CurrentStopping_labels.append(jig_CurrentStopping_label)
+    jig_strips.append(jig_strip)
+    strip_bars.append(None)
+
+def load_Logo():
+    # Tk reads PNG itself: Pillow is only needed to (re)build the cache when the logo or the size changes
+    width, height = LOGO_SIZE
+    cache_path = f"{os.path.splitext(LOGO_PATH)[0]}_{width}x{height}.png"
+    try:
+        if not os.path.exists(cache_path) or os.path.getmtime(cache_path) < os.path.getmtime(LOGO_PATH):
+            from PIL import Image
+            image = Image.open(LOGO_PATH).resize((width, height))
+            try:
+                image.save(cache_path)
+            except OSError:
+                # Read-only script directory: show the resized image without caching it
+                from PIL import ImageTk
+                return ImageTk.PhotoImage(image)
+        return tkinter.PhotoImage(file=cache_path)
+    except (ImportError, OSError, tkinter.TclError) as exc:
+        print(f"Logo not shown: {exc}")
+        return None
+
+def build_Gui():
+    global tkinter, root, ui_pump, date_now_label, time_now_label, alert_label
+    import tkinter
+
+    root = tkinter.Tk()
+    root.title("Jig Monitoring")
+    root.geometry("1320x540")
+
+    # The collector's threads post jig events here; the Tk main loop drains them once per frame
+    ui_pump = EventPump(root, handle_Events)
+
+    pic_frame = tkinter.Frame(root, width=300, height=300)
+    pic_frame.grid(row=0, column=1, padx=10, pady=10)
+
+    photo = load_Logo()
+    if photo is not None:
+        label = tkinter.Label(pic_frame, image=photo)
+        label.image = photo
+        label.pack()
+
+    #===============================================================================================================================================
+
+    #bottom_frame = tkinter.Frame(root, width=1290, height=150)
+    #bottom_frame.grid(row=3, column=0, columnspan=3, padx=10, pady=10)
+    #
+    #bt_image = Image.open("Logo.jpg")
+    #
+    #frame_width = bottom_frame.winfo_reqwidth()
+    #frame_height = bottom_frame.winfo_reqheight()
+    #resized_image = bt_image.resize((frame_width, frame_height))
+    #bt_photo = ImageTk.PhotoImage(resized_image)
+    #
+    #bt_label = tkinter.Label(bottom_frame, image=bt_photo)
+    #bt_label.image = bt_photo
+    #bt_label.pack()
+
+
+    #===============================================================================================================================================
+
+    current_date_frame = tkinter.Frame(root)
+    current_date_frame.grid(row=0, column=0, padx=10, pady=10)
+
+    date_label = tkinter.Label(current_date_frame, text="Day Date",font=("Impact", 25))
+    date_label.grid(row=0, column=1)
+
+    date_now_label = tkinter.Label(current_date_frame, text="", font=("Arial", 18),bg="black",fg="white")
+    date_now_label.grid(row=0, column=2, padx=10)
+
+    #===============================================================================================================================================
+
+    current_time_frame = tkinter.Frame(root)
+    current_time_frame.grid(row=0, column=2, padx=10, pady=10)
+
+    time_label = tkinter.Label(current_time_frame, text="Current Time",font=("Impact", 25))
+    time_label.grid(row=0, column=1)
+
+    time_now_label = tkinter.Label(current_time_frame, text="", font=("Arial", 18),bg="black",fg="white")
+    time_now_label.grid(row=0, column=2, padx=10)
+
+    #===============================================================================================================================================
+
+    for panel in range(min(JIG_COUNT, JIGS_PER_PAGE)):
+        build_Jig_frame(panel)
+    if JIG_COUNT > JIGS_PER_PAGE:
+        for key, step in (("<Next>", 1), ("<Right>", 1), ("<Prior>", -1), ("<Left>", -1)):
+            root.bind(key, lambda event, step=step: turn_Page(step))
+
+    # Alert bar under the panels, hidden until the rules raise an alert
+    alert_label = tkinter.Label(root, text="", font=("Arial", 18), bg=COLOUR_STOPPED, fg="white")
+    alert_label.grid(row=1 + 2 * -(-min(JIG_COUNT, JIGS_PER_PAGE) // JIG_GRID_COLUMNS), column=0,
+                     columnspan=JIG_GRID_COLUMNS, sticky="ew", padx=10, pady=10)
+    alert_label.grid_remove()
+    alert_label.bind("<Button-1>", lambda event: alert_label.grid_remove())
+
+    #===============================================================================================================================================
+
+def main(argv=None, profile=None):
+    global collector, jig_table
+    if argv is None:
+        argv = sys.argv[1:]
+    use_asyncio = "--asyncio" in argv
+    if "--headless" in argv:
+        if use_asyncio:
+            import jig_async
+            sys.exit(jig_async.main())
+        import jig_collector
+        sys.exit(jig_collector.main())
+
+    # A profiled startup keeps its data files in the profile's scratch directory, away from the station's
+    options = {} if profile is None else {"data_directory": profile.data_directory, "alert_notifier": None}
+    if use_asyncio:
+        import asyncio
+        import jig_async
+        collector = jig_async.AsyncCollector(**options)
+    else:
+        collector = JigCollector(**options)
+    jig_table = collector.table
+    if profile is not None:
+        profile.mark("collector built (journal recovered)")
+    build_Gui()
+    register_Pump(collector.registry, ui_pump)
+    if use_asyncio:
+        # One thread: the bridge wakes on every published item and flushes ui_pump itself
+        bridge = jig_async.TkBridge(root, ui_pump)
+        post = bridge.post
+    else:
+        post = ui_pump.post
+        ui_pump.start()
+    collector.subscribe(post)
+
+    # Paint the states recovered from the journal
+    show_Page(1)
+    post(REFRESH_ALL)
+    if profile is not None:
+        profile.mark("dashboard built")
+        ui_pump.flush()
+        root.update()
+        profile.mark("first frame on screen")
+        root.destroy()
+        collector.stop()
+        return
+
+    if use_asyncio:
+        asyncio.run(jig_async.run_Dashboard(collector, bridge))
+        return
+    collector.start()
+    root.mainloop()
+    collector.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""
+Description:
+Utilization analytics over the `month_data.csv` history. The file holds one row per jig per export with the
+running, pause and stop times as formatted strings; this module loads it into pandas columns in one pass and
+parses the durations into seconds with NumPy, without a Python loop over the rows.
+
+The exported totals are cumulative since midnight, so a day with several shift boundaries has several rows per
+jig, each including the ones before. The summaries and the trend use one row per jig and day, with the largest
+totals of the day (the last export, unless a restart lost a few seconds). A row exported in the first minute
+of a day belongs to the day before: the tick that exports a boundary at midnight runs before the day reset.
+
+Metrics:
+- utilization: running time / (running + pause) time, or running time / planned shift time when
+  `shift_seconds` is given.
+- pause ratio: pause time / (running + pause) time.
+- stop-time distribution: histogram of the last stop time of the day, by hour.
+- rolling trend: rolling mean of the daily utilization of each jig.
+
+Functions:
+- parse_Durations: Converts HH:MM:SS strings to seconds.
+- parse_Clock_times: Converts "%I:%M:%S %p" strings to seconds since midnight.
+- load_History: Loads `month_data.csv` into a DataFrame with numeric columns.
+- add_Ratios: Adds the utilization and pause ratio columns.
+- daily_Totals: One row per jig and day, with the totals of the day.
+- jig_Summary, line_Summary: Per-jig and per-line totals and ratios.
+- stop_Time_distribution: Histogram of the stop times by hour of day.
+- rolling_Trend: Rolling mean of the daily utilization per jig.
+
+Usage:
+python jig_analytics.py [month_data.csv]
+
+"""
+import sys
+
+import numpy as np
+import pandas as pd
+
+from jig_config import JIGS_PER_LINE, EXPORT_CSV_PATH
+
+COLUMNS = ["month", "day", "year", "export_time", "jig", "running", "pause", "stop"]
+DIGIT_WEIGHTS = np.array([36000, 3600, 0, 600, 60, 0, 10, 1], dtype=np.int64)
+
+
+def parse_Durations(values):
+    """Seconds of each "HH:MM:SS" string in `values`, as an int64 array.
+
+    The usual 8-character form is decoded from the raw bytes in one vectorized step. Longer values (100 hours
+    and more) are rare and fall back to splitting on ':'.
+    """
+    raw = np.asarray(values)
+    if raw.dtype.kind != "S":
+        raw = raw.astype("S12")
+    seconds = np.zeros(len(raw), dtype=np.int64)
+    regular = np.char.str_len(raw) == 8
+    if regular.any():
+        digits = raw[regular].astype("S8").view(np.uint8).reshape(-1, 8).astype(np.int64) - 48
+        seconds[regular] = digits @ DIGIT_WEIGHTS
+    for index in np.flatnonzero(~regular):
+        hours, minutes, secs = raw[index].split(b":")
+        seconds[index] = int(hours) * 3600 + int(minutes) * 60 + int(secs)
+    return seconds
+
+
+def parse_Clock_times(values):
+    """Seconds since midnight of each "%I:%M:%S %p" string, NaN for "00:00:00 --" (never stopped)."""
+    raw = np.asarray(values).astype("S11")
+    seconds = np.full(len(raw), np.nan)
+    characters = raw.view(np.uint8).reshape(-1, 11)
+    valid = (np.char.str_len(raw) == 11) & (characters[:, 10] == ord("M"))
+    if valid.any():
+        characters = characters[valid]
+        clock = (characters[:, :8].astype(np.int64) - 48) @ DIGIT_WEIGHTS
+        # 12 AM is hour 0 and 12 PM is hour 12
+        clock -= np.where(clock // 3600 == 12, 12 * 3600, 0)
+        clock += np.where(characters[:, 9] == ord("P"), 12 * 3600, 0)
+        seconds[valid] = clock
+    return seconds
+
+
+def load_History(path=EXPORT_CSV_PATH, jigs_per_line=JIGS_PER_LINE):
+    """Load the history into a DataFrame of date, jig, line, running_s, pause_s and stop_s columns."""
+    raw = pd.read_csv(path, header=0, names=COLUMNS, engine="c",
+                      dtype={"month": np.int16, "day": np.int16, "year": np.int16, "export_time": str, "jig": str,
+                             "running": str, "pause": str, "stop": str})
+    jig = raw["jig"].str.slice(3).astype(np.int32).to_numpy()
+    date = pd.to_datetime(pd.DataFrame({"year": raw["year"], "month": raw["month"], "day": raw["day"]}))
+    # "12:00:xx AM": exported at midnight, before the day reset, so the totals are those of the day before
+    export_time = raw["export_time"].to_numpy(dtype="S11").view(np.uint8).reshape(-1, 11)
+    midnight = (export_time[:, :6] == np.frombuffer(b"12:00:", np.uint8)).all(axis=1) & (export_time[:, 9] == ord("A"))
+    history = pd.DataFrame({
+        "date": date - pd.to_timedelta(midnight.astype(np.int64), unit="D"),
+        "jig": jig,
+        "line": (jig - 1) // jigs_per_line + 1,
+        "running_s": parse_Durations(raw["running"].to_numpy(dtype="S12")),
+        "pause_s": parse_Durations(raw["pause"].to_numpy(dtype="S12")),
+        "stop_s": parse_Clock_times(raw["stop"].to_numpy(dtype="S11")),
+    })
+    return history
+
+
+def add_Ratios(history, shift_seconds=None):
+    """Add utilization and pause_ratio columns (NaN for rows without any running or pause time)."""
+    running = history["running_s"].to_numpy(dtype=np.float64)
+    pause = history["pause_s"].to_numpy(dtype=np.float64)
+    active = running + pause
+    with np.errstate(divide="ignore", invalid="ignore"):
+        available = np.full_like(active, float(shift_seconds)) if shift_seconds else active
+        history["utilization"] = np.where(available > 0, running / available, np.nan)
+        history["pause_ratio"] = np.where(active > 0, pause / active, np.nan)
+    return history
+
+
+def daily_Totals(history):
+    """One row per jig and day with the largest (latest) totals and stop time of the day."""
+    # The line of a jig is fixed, so its max is the line
+    daily = history.groupby(["jig", "date"], sort=False)[["line", "running_s", "pause_s", "stop_s"]].max()
+    return daily.reset_index()
+
+
+def _summary(history, key, shift_seconds=None):
+    grouped = daily_Totals(history).groupby(key, sort=True).agg(
+        days=("date", "nunique"), running_s=("running_s", "sum"), pause_s=("pause_s", "sum"))
+    active = grouped["running_s"] + grouped["pause_s"]
+    available = grouped["days"] * shift_seconds if shift_seconds else active
+    grouped["utilization"] = grouped["running_s"] / available.where(available > 0)
+    grouped["pause_ratio"] = grouped["pause_s"] / active.where(active > 0)
+    return grouped
+
+
+def jig_Summary(history, shift_seconds=None):
+    return _summary(history, "jig", shift_seconds)
+
+
+def line_Summary(history, shift_seconds=None):
+    return _summary(history, "line", shift_seconds)
+
+
+def stop_Time_distribution(history):
+    """Number of days whose last stop fell in each hour of the day (index 0-23)."""
+    stops = daily_Totals(history)["stop_s"].to_numpy()
+    stops = stops[~np.isnan(stops)]
+    counts = np.bincount((stops // 3600).astype(np.int64), minlength=24)
+    return pd.Series(counts[:24], index=pd.RangeIndex(24, name="hour"), name="stops")
+
+
+def rolling_Trend(history, window=7, shift_seconds=None):
+    """Rolling mean over `window` days of the daily utilization, one column per jig."""
+    daily = add_Ratios(daily_Totals(history), shift_seconds)
+    daily = daily.pivot_table(index="date", columns="jig", values="utilization", aggfunc="mean")
+    return daily.rolling(window, min_periods=1).mean()
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else EXPORT_CSV_PATH
+    history = add_Ratios(load_History(path))
+    print("Per jig:")
+    print(jig_Summary(history).to_string())
+    print("\nPer line:")
+    print(line_Summary(history).to_string())
+    print("\nStop times by hour:")
+    print(stop_Time_distribution(history).to_string())
+
+
+if __name__ == "__main__":
+    main()
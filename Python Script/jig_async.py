@@ -0,0 +1,208 @@
+"""
+Description:
+Asyncio engine of the jig monitor. The serial reads of all boards, the one-second tick (shift export,
+journal upkeep and counter refresh) and the Tk dashboard run on one asyncio event loop in one thread, instead
+of a serial thread and a scheduler thread handing items to the Tk main loop through a queue polled every
+FRAME_MS.
+
+The ports are watched by the loop itself (`add_reader`), so a keypress is read as soon as its bytes arrive.
+Tk keeps its own event loop; the TkBridge runs it as an asyncio task that calls `root.update()`. Every item
+the collector publishes wakes the bridge, which flushes the EventPump and updates the window in the same
+loop iteration. Under a burst, frames are kept at least MIN_FRAME_MS apart so the widgets are still
+coalesced; when idle the bridge wakes every FRAME_MS for the window events.
+
+On Windows the default proactor loop has no `add_reader`; the ports are then polled every POLL_INTERVAL,
+like the SerialMux does for ports without a `fileno`.
+
+Classes:
+- LoopSerialMux: SerialMux whose ports are watched by the asyncio loop.
+- AsyncCollector: JigCollector that reads its ports and ticks on the asyncio loop.
+- TkBridge: Runs a Tk window and its EventPump as an asyncio task.
+
+Functions:
+- run_Dashboard: Runs a collector and a dashboard on the current loop until the window is closed.
+- main: Runs the asyncio collector without a GUI until Ctrl+C is pressed.
+
+Constants:
+- MIN_FRAME_MS: Shortest time between two dashboard frames, in milliseconds.
+
+Usage:
+python jig_async.py
+
+"""
+import asyncio
+import contextlib
+import sys
+
+from jig_collector import JigCollector
+from jig_events import FRAME_MS
+from jig_mux import SerialMux
+from jig_timing import TICK_PERIOD
+
+MIN_FRAME_MS = 10
+
+
+class LoopSerialMux(SerialMux):
+    """SerialMux served by an asyncio loop: each open port is an `add_reader` callback on `loop`."""
+
+    def __init__(self, loop, ports, handler, *args, **kwargs):
+        super().__init__(ports, handler, *args, **kwargs)
+        self.loop = loop
+        self.watched = {}
+        # Set when a port drops, so its reconnect is scheduled without waiting for the next check
+        self.changed = asyncio.Event()
+
+    def watch(self, port):
+        try:
+            fileno = port.serial_port.fileno()
+            self.loop.add_reader(fileno, self.service, port)
+        except (AttributeError, NotImplementedError, OSError, ValueError):
+            self.polled.append(port)
+            return
+        self.watched[port] = fileno
+
+    def unwatch(self, port):
+        fileno = self.watched.pop(port, None)
+        if fileno is None:
+            super().unwatch(port)
+        else:
+            self.loop.remove_reader(fileno)
+
+    def drop(self, port, now, exc):
+        super().drop(port, now, exc)
+        self.changed.set()
+
+    async def serve(self):
+        """Reopen the ports that are due and poll the ones without a reader, until cancelled."""
+        while True:
+            now = self.clock()
+            self.connect_Due(now)
+            self.service_Polled()
+            self.changed.clear()
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self.changed.wait(), self.next_Wait(now, TICK_PERIOD))
+
+    def close(self):
+        for fileno in self.watched.values():
+            self.loop.remove_reader(fileno)
+        self.watched = {}
+        super().close()
+
+
+class AsyncCollector(JigCollector):
+    """JigCollector whose serial reads and tick run as tasks on the running asyncio loop.
+
+    Subscribers are called on the loop thread, so a dashboard on the same loop can use the items directly.
+    `start` and `stop` are replaced by `serve`, which runs until it is cancelled.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.mux = None
+
+    async def run_Ticks(self):
+        # Absolute deadlines on the loop clock, dropping missed ticks like the TickScheduler. The scheduler
+        # itself is never started; it keeps the tick count and drift, so both designs report the same metrics.
+        loop = asyncio.get_running_loop()
+        scheduler = self.scheduler
+        period = scheduler.period
+        deadline = loop.time() + period
+        while True:
+            await asyncio.sleep(max(0.0, deadline - loop.time()))
+            now = loop.time()
+            scheduler.ticks += 1
+            scheduler.drift.observe(max(0.0, now - deadline))
+            self.tick()
+            deadline += period
+            if now - deadline > period:
+                deadline = now + period
+
+    async def serve(self):
+        """Read the ports and tick until cancelled, then close the ports and the journal."""
+        self.mux = LoopSerialMux(asyncio.get_running_loop(), self.ports, self.on_Event, self.baud_rate,
+                                 self.opener, self.on_Status, latency=self.event_latency)
+        self.start_Metrics()
+        self.start_Web()
+        tasks = [asyncio.create_task(self.mux.serve()), asyncio.create_task(self.run_Ticks())]
+        try:
+            await asyncio.gather(*tasks)
+        except Exception as e:
+            print(f"Unexpected error: {e}")
+            self.fail()
+        finally:
+            for task in tasks:
+                task.cancel()
+            self.mux.close()
+            self.stop_Metrics()
+            self.stop_Web()
+            self.rules.close()
+            self.exporter.close()
+            self.timeline.close()
+            self.journal.close()
+
+
+class TkBridge:
+    """Runs the Tk event loop of `root` and flushes `pump` as an asyncio task.
+
+    Subscribe `post` to the collector instead of `pump.post`: it queues the item and wakes the bridge.
+    The EventPump is flushed by the bridge, so `pump.start` must not be called.
+    """
+
+    def __init__(self, root, pump, min_frame_ms=MIN_FRAME_MS, idle_frame_ms=FRAME_MS):
+        self.root = root
+        self.pump = pump
+        self.min_frame = min_frame_ms / 1000
+        self.idle_frame = idle_frame_ms / 1000
+        self.wake = asyncio.Event()
+        self.frames = 0
+
+    def post(self, item):
+        """Queue `item` for the next frame. Loop thread only."""
+        self.pump.post(item)
+        self.wake.set()
+
+    async def run(self):
+        """Process the Tk events and the posted items until the window is destroyed or the pump stopped."""
+        import tkinter
+
+        loop = asyncio.get_running_loop()
+        while True:
+            if not self.wake.is_set():
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self.wake.wait(), self.idle_frame)
+            self.wake.clear()
+            started = loop.time()
+            try:
+                self.pump.flush()
+                if self.pump.stopped:
+                    self.root.destroy()
+                    return
+                self.root.update()
+            except tkinter.TclError:
+                # The window was closed
+                return
+            self.frames += 1
+            await asyncio.sleep(max(0.0, self.min_frame - (loop.time() - started)))
+
+
+async def run_Dashboard(collector, bridge):
+    serving = asyncio.create_task(collector.serve())
+    try:
+        await bridge.run()
+    finally:
+        serving.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await serving
+
+
+def main():
+    collector = AsyncCollector()
+    try:
+        asyncio.run(collector.serve())
+    except KeyboardInterrupt:
+        pass
+    return 1 if collector.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
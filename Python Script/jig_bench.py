@@ -0,0 +1,1343 @@
+"""
+Description:
+Benchmarks for the jig monitor. Each benchmark runs headless on simulated jigs and prints its results.
+
+Benchmarks:
+- scheduler: Thread count and CPU cost of the old per-jig `threading.Timer` chains against the single
+  `TickScheduler`, for 3, 50 and 500 simulated jigs.
+- serial: Sustained event rates through a pty stand-in for the AVR serial port, read by the `SerialMux` as in
+  the collector, with the latency from byte arrival to jig state update.
+- mux: Event throughput and latency of one `SerialMux` reading 10, 30 and 60 simulated boards on pty pairs,
+  and the time to reconnect a fifth of them after their devices drop.
+- engine: Latency from a keypress on a simulated board to the widget update, and CPU use, of the threaded
+  collector with the `root.after` pump against the single-loop asyncio engine with its Tk bridge.
+- pump: Per-frame drain time and widget updates of the `EventPump` while producer threads post events for
+  3, 50 and 500 jigs.
+- render: Widget updates applied and skipped by the `WidgetRenderer` over an hour of one-second refreshes,
+  with one jig in ten running.
+- replay: Recovery time of the event journal for a month of events from 300 jigs, replayed in full and
+  from the latest snapshot.
+- export: Duration of one shift export for 3, 50 and 500 jigs, against writing the rows one by one.
+- analytics: Loading and summarizing three years of history from 300 jigs with `jig_analytics` (NumPy and
+  pandas), against parsing it row by row with `csv.reader`.
+- history: Importing three years of `month_data.csv` from 300 jigs into the SQLite `HistoryStore`, the
+  latency of one jig's and one line's time series from it, against scanning the CSV for the same jig, and
+  the cost of one batched shift insert.
+- timeline: Append cost, memory and eviction of the `JigTimeline` rings for 500 jigs over two months of
+  transitions, and the latency of range queries such as the long pauses of one jig in a two-hour window.
+- rules: Cost of the streaming rules (long pause, flapping, silent board) per event at 1,000 to 50,000
+  events/s over 50, 500 and 5,000 jigs, and per tick for the timer wheel, against scanning every jig and
+  board on each tick.
+- web: Load test of the web dashboard: 100, 300 and 1,000 local SSE viewers in a separate process while
+  200 events/s reach 300 jigs, with the delivery latency of each push to every viewer, the size of the
+  pushes and the CPU of the collector process.
+- metrics: Cost of one histogram observation and of rendering the metrics of 60 boards, the latency of a
+  local scrape of `/metrics`, and the CPU of an idle collector with and without the endpoint.
+- startup: Start-up time and peak memory of a fresh interpreter that builds the collector headless, against
+  one that also loads the GUI modules (`tkinter`; `PIL` is only needed to rebuild the logo cache).
+- suite: Short, seeded run of the whole pipeline for regression checks: token parsing (in memory, and through
+  a pty stand-in for the serial device read by the `SerialMux`), the state update of one event alone and through the collector's
+  journal, timeline and rules, widget updates per second (stand-in widgets, or Tk with `--tk`, e.g. under
+  `xvfb-run`), export rows per second and memory per tracked jig. Each result is the best of `--repeats`
+  runs after a warm-up run, with the garbage collector paused. It is compared with the baseline file; a case
+  worse than the baseline by more than `--tolerance` is measured again, and if it is still worse it is
+  flagged and the run exits with an error. `--save` writes the results as the new baseline.
+
+Usage:
+python jig_bench.py scheduler [--duration SECONDS]
+python jig_bench.py serial [--duration SECONDS]
+python jig_bench.py mux [--duration SECONDS]
+python jig_bench.py engine [--duration SECONDS]
+python jig_bench.py pump [--duration SECONDS]
+python jig_bench.py render
+python jig_bench.py replay
+python jig_bench.py export
+python jig_bench.py analytics
+python jig_bench.py history
+python jig_bench.py timeline
+python jig_bench.py rules
+python jig_bench.py web [--duration SECONDS]
+python jig_bench.py metrics [--duration SECONDS]
+python jig_bench.py startup
+python jig_bench.py suite [--baseline jig_bench_baseline.json] [--save] [--tolerance 0.25] [--repeats 5] [--tk]
+
+"""
+import argparse
+import asyncio
+import collections
+import contextlib
+import csv
+import datetime
+import gc
+import heapq
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tty
+
+from jig_timing import JIG_PAUSED, NS_PER_SECOND, JigClock, JigTable, TickScheduler
+from jig_timing import convert_timeToH_M_S
+from jig_serial import FrameReader
+from jig_mux import JIGS_PER_BOARD, BoardPort, SerialMux, open_Serial
+from jig_events import FRAME_MS, EventPump
+from jig_journal import RECORD, SNAPSHOT_EVERY, EventJournal
+from jig_export import ShiftExporter
+from jig_metrics import Histogram, register_Pump
+
+JIG_COUNTS = (3, 50, 500)
+EVENT_RATES = (100, 1000, 10000, 50000)
+BOARD_COUNTS = (10, 30, 60)
+SUITE_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "jig_bench_baseline.json")
+SUITE_TOLERANCE = 0.25
+SUITE_REPEATS = 5
+
+
+def _measure(run, duration):
+    # Sample the thread count while `run` is active and report the CPU used by the whole process.
+    peak_threads = threading.active_count()
+    cpu_start = time.process_time()
+    stop = run()
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        peak_threads = max(peak_threads, threading.active_count())
+        time.sleep(0.05)
+    stop()
+    return peak_threads, time.process_time() - cpu_start
+
+
+def bench_Timer_chains(jig_count, duration):
+    """The previous design: every running jig re-arms its own `threading.Timer` each second."""
+    timers = [None] * jig_count
+    totals = [0.0] * jig_count
+    last = [time.monotonic()] * jig_count
+    running = [True]
+
+    def tick(jig):
+        now = time.monotonic()
+        totals[jig] += now - last[jig]
+        last[jig] = now
+        convert_timeToH_M_S(totals[jig])
+        if running[0]:
+            timers[jig] = threading.Timer(1, tick, args=[jig])
+            timers[jig].start()
+
+    def run():
+        for jig in range(jig_count):
+            tick(jig)
+
+        def stop():
+            running[0] = False
+            for timer in timers:
+                if timer is not None:
+                    timer.cancel()
+                    timer.join()
+        return stop
+
+    return _measure(run, duration)
+
+
+def bench_Tick_scheduler(jig_count, duration):
+    """The current design: one scheduler thread reads the totals of every jig on each tick."""
+    clocks = [JigClock() for _ in range(jig_count)]
+    for clock in clocks:
+        clock.start()
+    scheduler = TickScheduler()
+
+    def refresh():
+        for clock in clocks:
+            convert_timeToH_M_S(clock.running_seconds())
+
+    scheduler.add(refresh)
+
+    def run():
+        scheduler.start()
+        return scheduler.stop
+
+    return _measure(run, duration)
+
+
+def open_Pty():
+    """Return (master_fd, slave_fd) of a raw pty, so bytes are passed through without line buffering."""
+    master_fd, slave_fd = os.openpty()
+    tty.setraw(master_fd)
+    tty.setraw(slave_fd)
+    return master_fd, slave_fd
+
+
+def _percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def bench_Serial_rate(rate, duration):
+    """Write `rate` tokens per second into a pty board and time each one from write to `JigTable.apply`,
+    read by a SerialMux through `open_Serial` as in the collector."""
+    master_fd, path = open_Board()
+    table = JigTable(JIGS_PER_BOARD)
+    sent = collections.deque()
+    total = int(rate * duration)
+    tokens = [f"{jig}{state}".encode() for jig in range(1, JIGS_PER_BOARD + 1) for state in "WPS"]
+    latencies = []
+
+    def handler(jig, state):
+        table.apply(jig, state)
+        latencies.append(time.monotonic() - sent.popleft())
+
+    port = BoardPort(path, 1)
+    mux = SerialMux([port], handler, opener=open_Serial, on_status=lambda port, connected: None)
+    mux.connect_Due(time.monotonic())
+
+    def write():
+        start = time.monotonic()
+        written = 0
+        while written < total:
+            due = min(total, int((time.monotonic() - start) * rate) + 1)
+            if due > written:
+                burst = b"".join(tokens[index % len(tokens)] for index in range(written, due))
+                now = time.monotonic()
+                sent.extend([now] * (due - written))
+                os.write(master_fd, burst)
+                written = due
+            else:
+                time.sleep(0.0005)
+
+    writer = threading.Thread(target=write, daemon=True)
+    writer.start()
+    deadline = time.monotonic() + duration + 5
+    while len(latencies) < total and time.monotonic() < deadline:
+        mux.poll(0.05)
+    writer.join()
+    mux.close()
+    os.close(master_fd)
+    return latencies, port.reader.dropped
+
+
+def run_Serial(duration):
+    print("rate/s   events  dropped  p50 ms   p99 ms   max ms")
+    for rate in EVENT_RATES:
+        latencies, dropped = bench_Serial_rate(rate, duration)
+        print("{:<8} {:>6}  {:>7}  {:>6.3f}  {:>7.3f}  {:>7.3f}".format(
+            rate, len(latencies), dropped, _percentile(latencies, 0.5) * 1000,
+            _percentile(latencies, 0.99) * 1000, max(latencies) * 1000))
+
+
+def open_Board():
+    """Return (master_fd, slave path) of a raw pty standing in for one AVR board."""
+    master_fd, slave_fd = open_Pty()
+    path = os.ttyname(slave_fd)
+    os.close(slave_fd)
+    return master_fd, path
+
+
+def bench_Mux(board_count, duration, rate_per_board=50):
+    """Drive `board_count` pty boards through one SerialMux, then drop a fifth of them and time the reconnect.
+
+    Returns (events, events per second, latencies, cpu seconds, reconnect seconds, events during the outage).
+    """
+    masters = {}
+    paths = {}
+    for board in range(board_count):
+        masters[board], paths[f"board{board}"] = open_Board()
+    ports = [BoardPort(f"board{board}", board * JIGS_PER_BOARD + 1) for board in range(board_count)]
+    sent = [collections.deque() for _ in range(board_count)]
+    latencies = []
+    outage_events = [0]
+    dropped = set(range(0, board_count, 5))
+    tokens = [f"{jig}{state}".encode() for jig in range(1, JIGS_PER_BOARD + 1) for state in "WPS"]
+
+    def handler(jig, state):
+        board = (jig - 1) // JIGS_PER_BOARD
+        queued = sent[board]
+        if queued:
+            latencies.append(time.monotonic() - queued.popleft())
+        outage_events[0] += 1
+
+    def opener(name, baud_rate):
+        return open_Serial(paths[name], baud_rate)
+
+    mux = SerialMux(ports, handler, opener=opener, on_status=lambda port, connected: None)
+    stopped = threading.Event()
+    reading = threading.Thread(target=mux.run, args=(stopped,), daemon=True)
+    reading.start()
+    while any(port.serial_port is None for port in ports):
+        time.sleep(0.01)
+
+    def write(seconds, boards):
+        interval = 1.0 / rate_per_board
+        deadline = time.monotonic() + seconds
+        next_write = time.monotonic()
+        index = 0
+        while next_write < deadline:
+            for board in boards:
+                sent[board].append(time.monotonic())
+                os.write(masters[board], tokens[index % len(tokens)])
+            index += 1
+            next_write += interval
+            time.sleep(max(0.0, next_write - time.monotonic()))
+
+    cpu_start = time.process_time()
+    started = time.monotonic()
+    write(duration, range(board_count))
+    while any(sent) and time.monotonic() - started < duration + 5:
+        time.sleep(0.01)
+    events = len(latencies)
+    elapsed = time.monotonic() - started
+    cpu = time.process_time() - cpu_start
+
+    # Unplug every fifth board, keep the others writing, then plug the boards back in
+    for board in dropped:
+        os.close(masters[board])
+        sent[board].clear()
+    time.sleep(0.2)
+    outage_events[0] = 0
+    write(0.5, [board for board in range(board_count) if board not in dropped])
+    during_outage = outage_events[0]
+    replugged = time.monotonic()
+    for board in dropped:
+        masters[board], paths[f"board{board}"] = open_Board()
+    while any(ports[board].connects < 2 for board in dropped) and time.monotonic() - replugged < 10:
+        time.sleep(0.001)
+    reconnect = time.monotonic() - replugged
+
+    stopped.set()
+    reading.join()
+    for master_fd in masters.values():
+        os.close(master_fd)
+    return events, events / elapsed, latencies, cpu, reconnect, during_outage
+
+
+def run_Mux(duration):
+    print("boards  events  events/s  p50 ms  p99 ms  cpu s   reconnect s  events while unplugged")
+    for board_count in BOARD_COUNTS:
+        # The reconnect messages of the dropped boards are not part of the report
+        with contextlib.redirect_stdout(io.StringIO()):
+            events, rate, latencies, cpu, reconnect, during_outage = bench_Mux(board_count, duration)
+        print("{:<7} {:>6}  {:>8.0f}  {:>6.3f}  {:>6.3f}  {:>5.2f}  {:>11.3f}  {:>22}".format(
+            board_count, events, rate, _percentile(latencies, 0.5) * 1000, _percentile(latencies, 0.99) * 1000,
+            cpu, reconnect, during_outage))
+
+
+class StandInRoot:
+    """Replaces `tkinter.Tk` for the pump: `after` is ignored and the benchmark calls `drain` itself."""
+
+    def after(self, delay_ms, callback):
+        pass
+
+
+class LoopRoot:
+    """Replaces `tkinter.Tk` with a working timer loop: `mainloop` sleeps until the next `after` callback
+    is due, `update` runs the due callbacks and raises TclError once the window is destroyed."""
+
+    def __init__(self):
+        self.timers = []
+        self.sequence = 0
+        self.destroyed = False
+
+    def after(self, delay_ms, callback):
+        self.sequence += 1
+        heapq.heappush(self.timers, (time.monotonic() + delay_ms / 1000, self.sequence, callback))
+
+    def update(self):
+        if self.destroyed:
+            import tkinter
+            raise tkinter.TclError("application has been destroyed")
+        now = time.monotonic()
+        while self.timers and self.timers[0][0] <= now:
+            heapq.heappop(self.timers)[2]()
+
+    def mainloop(self):
+        while True:
+            time.sleep(max(0.0, min(self.timers[0][0] - time.monotonic(), 0.1)) if self.timers else 0.1)
+            if self.destroyed:
+                return
+            self.update()
+
+    def destroy(self):
+        self.destroyed = True
+
+
+class LatencyWidget:
+    """Records, on each `config`, how long the events of its jig waited since they were written."""
+
+    def __init__(self, sent, latencies):
+        self.sent = sent
+        self.latencies = latencies
+
+    def config(self, **options):
+        now = time.monotonic()
+        sent = self.sent
+        while sent:
+            self.latencies.append(now - sent.popleft())
+
+
+def bench_Engine(design, rate, duration, board_count=10):
+    """Feed `rate` keypresses per second over `board_count` pty boards into the threaded or asyncio design.
+
+    Returns (latencies from write to widget update, cpu seconds of the process).
+    """
+    from jig_collector import REFRESH_ALL, JigCollector
+    import jig_async
+
+    masters = []
+    ports = []
+    for board in range(board_count):
+        master_fd, path = open_Board()
+        masters.append(master_fd)
+        ports.append((path, board * JIGS_PER_BOARD + 1))
+    jig_count = board_count * JIGS_PER_BOARD
+    sent = [collections.deque() for _ in range(jig_count + 1)]
+    latencies = []
+    widgets = [LatencyWidget(sent[jig], latencies) for jig in range(jig_count + 1)]
+    shown = [0]
+    root = LoopRoot()
+
+    def handle(items):
+        for jig in set(items):
+            if jig != REFRESH_ALL:
+                shown[0] += 1
+                pump.update(widgets[jig], text=str(shown[0]))
+
+    pump = EventPump(root, handle)
+
+    def write():
+        time.sleep(0.2)
+        started = time.monotonic()
+        written = 0
+        while time.monotonic() - started < duration:
+            due = int((time.monotonic() - started) * rate)
+            while written < due:
+                board = written % board_count
+                local_jig = written // board_count % JIGS_PER_BOARD + 1
+                sent[board * JIGS_PER_BOARD + local_jig].append(time.monotonic())
+                os.write(masters[board], f"{local_jig}{'WPS'[written % 3]}".encode())
+                written += 1
+            time.sleep(0.001)
+        time.sleep(0.2)
+        root.destroy()
+
+    with tempfile.TemporaryDirectory() as directory:
+        with contextlib.redirect_stdout(io.StringIO()):
+            writer = threading.Thread(target=write, daemon=True)
+            cpu_start = time.process_time()
+            if design == "threaded":
+                collector = JigCollector(jig_count, ports, web_port=None, data_directory=directory,
+                                         alert_notifier=None)
+                collector.subscribe(pump.post)
+                pump.start()
+                collector.start()
+                writer.start()
+                root.mainloop()
+                collector.stop()
+            else:
+                collector = jig_async.AsyncCollector(jig_count, ports, web_port=None, data_directory=directory,
+                                                      alert_notifier=None)
+                bridge = jig_async.TkBridge(root, pump)
+                collector.subscribe(bridge.post)
+                writer.start()
+                asyncio.run(jig_async.run_Dashboard(collector, bridge))
+            cpu = time.process_time() - cpu_start
+            writer.join()
+    for master_fd in masters:
+        os.close(master_fd)
+    return latencies, cpu
+
+
+def run_Engine(duration):
+    print("rate/s  design    events  p50 ms  p99 ms  max ms  cpu s")
+    for rate in (0, 10, 100, 1000):
+        for design in ("threaded", "asyncio"):
+            latencies, cpu = bench_Engine(design, rate, duration)
+            if latencies:
+                print("{:<7} {:<9} {:>6}  {:>6.2f}  {:>6.2f}  {:>6.2f}  {:>5.2f}".format(
+                    rate, design, len(latencies), _percentile(latencies, 0.5) * 1000,
+                    _percentile(latencies, 0.99) * 1000, max(latencies) * 1000, cpu))
+            else:
+                print("{:<7} {:<9} {:>6}  {:>6}  {:>6}  {:>6}  {:>5.2f}".format(rate, design, 0, "-", "-", "-", cpu))
+
+
+class StandInWidget:
+    """Counts the `config` calls a Tk widget would receive."""
+
+    def __init__(self):
+        self.configs = 0
+
+    def config(self, **options):
+        self.configs += 1
+
+
+def bench_Pump(jig_count, duration, rate=5000):
+    """Post `rate` events per second from a producer thread and drain them once per frame."""
+    table = JigTable(jig_count)
+    frames = [StandInWidget() for _ in range(jig_count)]
+    labels = [StandInWidget() for _ in range(jig_count)]
+
+    def handle(items):
+        for jig in set(items):
+            record = table[jig]
+            pump.update(frames[jig - 1], bg=record.state)
+            pump.update(labels[jig - 1], text=convert_timeToH_M_S(record.running_seconds()))
+
+    pump = EventPump(StandInRoot(), handle)
+    running = [True]
+
+    def produce():
+        index = 0
+        start = time.monotonic()
+        while running[0]:
+            due = int((time.monotonic() - start) * rate)
+            while index < due:
+                jig = index % jig_count + 1
+                table.apply(jig, "WPS"[index % 3])
+                pump.post(jig)
+                index += 1
+            time.sleep(0.001)
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    drain_times = []
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        time.sleep(FRAME_MS / 1000)
+        pump.drain()
+        drain_times.append(pump.last_drain_seconds)
+    running[0] = False
+    producer.join()
+    return pump, drain_times
+
+
+def run_Pump(duration):
+    print("jigs  events  frames  widget updates  p50 drain ms  max drain ms")
+    for jig_count in JIG_COUNTS:
+        pump, drain_times = bench_Pump(jig_count, duration)
+        print("{:<5} {:>6}  {:>6}  {:>14}  {:>12.3f}  {:>12.3f}".format(
+            jig_count, pump.items, pump.frames, pump.widget_updates,
+            _percentile(drain_times, 0.5) * 1000, pump.max_drain_seconds * 1000))
+
+
+def bench_Render(jig_count, ticks=3600):
+    """Refresh every label of `jig_count` jigs once per simulated second and count the Tk calls."""
+    now = [0]
+    table = JigTable(jig_count, clock=lambda: now[0])
+    for jig in range(1, jig_count + 1, 10):
+        table.apply(jig, "W")
+    running_labels = [StandInWidget() for _ in range(jig_count)]
+    pause_labels = [StandInWidget() for _ in range(jig_count)]
+
+    def handle(items):
+        for jig, record in enumerate(table, start=1):
+            pump.update(running_labels[jig - 1], text=convert_timeToH_M_S(record.running_seconds()))
+            pump.update(pause_labels[jig - 1], text=convert_timeToH_M_S(record.pause_seconds()))
+
+    pump = EventPump(StandInRoot(), handle)
+    started = time.perf_counter()
+    for _ in range(ticks):
+        now[0] += NS_PER_SECOND
+        pump.post(0)
+        pump.drain()
+    elapsed = time.perf_counter() - started
+    return pump.renderer, elapsed / ticks
+
+
+def run_Render():
+    print("jigs  applied  skipped  applied/tick  ms/tick")
+    for jig_count in JIG_COUNTS:
+        renderer, per_tick = bench_Render(jig_count)
+        print("{:<5} {:>7}  {:>7}  {:>12.1f}  {:>7.3f}".format(
+            jig_count, renderer.applied, renderer.skipped, renderer.applied / 3600, per_tick * 1000))
+
+
+def write_Month_journal(path, jig_count=300, days=30, events_per_jig_day=150, seed=1):
+    """Write a journal of `days` days of random W/P/S events and return the number of records."""
+    rng = random.Random(seed)
+    start = time.time() - days * 86400
+    count = 0
+    with open(path, 'wb') as file_journal:
+        for day in range(days):
+            day_start = start + day * 86400
+            stamps = sorted(rng.uniform(0, 86400) for _ in range(jig_count * events_per_jig_day))
+            file_journal.write(b"".join(
+                RECORD.pack(day_start + stamp, rng.randint(1, jig_count), rng.choice(b"WPS").to_bytes(1, "little"))
+                for stamp in stamps))
+            count += len(stamps)
+    return count
+
+
+def run_Replay(jig_count=300):
+    with tempfile.TemporaryDirectory() as directory:
+        journal_path = os.path.join(directory, "jig_journal.bin")
+        snapshot_path = os.path.join(directory, "jig_snapshot.json")
+        count = write_Month_journal(journal_path, jig_count)
+        size = os.path.getsize(journal_path)
+
+        started = time.perf_counter()
+        journal = EventJournal(journal_path, snapshot_path)
+        journal.recover(jig_count)
+        full = time.perf_counter() - started
+        journal.close()
+
+        # The recovery compacted the journal; add one snapshot interval of events and recover again
+        journal = EventJournal(journal_path, snapshot_path)
+        table = journal.recover(jig_count)
+        for index in range(SNAPSHOT_EVERY):
+            journal.apply(table, index % jig_count + 1, "WPS"[index % 3])
+        journal.file.flush()
+        started = time.perf_counter()
+        EventJournal(journal_path, snapshot_path).recover(jig_count)
+        bounded = time.perf_counter() - started
+
+    print("jigs  records    journal MB  full replay s  from snapshot s")
+    print("{:<5} {:>9}  {:>10.1f}  {:>13.3f}  {:>15.3f}".format(jig_count, count, size / 1e6, full, bounded))
+
+
+def bench_Export(jig_count, repeats=200):
+    """Average seconds of one batched shift export and of the same rows written with one writerow each."""
+    table = JigTable(jig_count)
+    for jig in range(1, jig_count + 1):
+        table.apply(jig, "WPS"[jig % 3])
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = os.path.join(directory, "month_data.csv")
+        exporter = ShiftExporter(table, ["16:30"], csv_path, os.path.join(directory, "state.json"))
+        now = datetime.datetime.now()
+        started = time.perf_counter()
+        for _ in range(repeats):
+            exporter.export(now, now)
+        batched = (time.perf_counter() - started) / repeats
+
+        started = time.perf_counter()
+        for _ in range(repeats):
+            with open(csv_path, 'a', newline='') as file_csv:
+                csv_writer = csv.writer(file_csv)
+                for jig, record in enumerate(table, start=1):
+                    stop_jig = record.stop_time.strftime("%I:%M:%S %p") if record.stop_time is not None else "00:00:00 --"
+                    csv_writer.writerow([now.month, now.day, now.year, now.strftime("%I:%M:%S %p"), f"Jig{jig}",
+                                         convert_timeToH_M_S(record.running_seconds()),
+                                         convert_timeToH_M_S(record.pause_seconds()), stop_jig])
+                    file_csv.flush()
+        row_by_row = (time.perf_counter() - started) / repeats
+    return batched, row_by_row
+
+
+def run_Export():
+    print("jigs  batched ms  row by row ms")
+    for jig_count in JIG_COUNTS:
+        batched, row_by_row = bench_Export(jig_count)
+        print("{:<5} {:>10.3f}  {:>13.3f}".format(jig_count, batched * 1000, row_by_row * 1000))
+
+
+def write_History(path, jig_count=300, days=3 * 365, seed=1):
+    """Write a `month_data.csv` with one row per jig per day and return the number of rows."""
+    rng = random.Random(seed)
+    first_day = datetime.date.today() - datetime.timedelta(days=days)
+    with open(path, 'w', newline='') as file_csv:
+        csv_writer = csv.writer(file_csv)
+        csv_writer.writerow(["Month", " Day", " Year", " Current Time", " Number of Jig", " Running Time",
+                             " Resuming Time", " Stop Time"])
+        for day in range(days):
+            date = first_day + datetime.timedelta(days=day)
+            csv_writer.writerows(
+                [date.month, date.day, date.year, "04:30:00 PM", f"Jig{jig}",
+                 convert_timeToH_M_S(rng.randint(0, 8 * 3600)), convert_timeToH_M_S(rng.randint(0, 3600)),
+                 "0{}:{:02d}:00 PM".format(rng.randint(1, 5), rng.randint(0, 59))]
+                for jig in range(1, jig_count + 1))
+    return days * jig_count
+
+
+def summarize_Row_by_row(path):
+    """Per-jig running and pause totals computed with `csv.reader`, the way the file is handled by hand today."""
+    # The rows are cumulative within a day: keep the largest of each jig and day, then add up the days
+    days = {}
+    with open(path, newline='') as file_csv:
+        csv_reader = csv.reader(file_csv, skipinitialspace=True)
+        next(csv_reader)
+        for row in csv_reader:
+            hours, minutes, seconds = row[5].split(":")
+            running = int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+            hours, minutes, seconds = row[6].split(":")
+            pause = int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+            key = (row[4], row[0], row[1], row[2])
+            previous_running, previous_pause = days.get(key, (0, 0))
+            days[key] = (max(running, previous_running), max(pause, previous_pause))
+    totals = {}
+    for (jig, _, _, _), (running, pause) in days.items():
+        jig_totals = totals.setdefault(jig, [0, 0])
+        jig_totals[0] += running
+        jig_totals[1] += pause
+    return {jig: running / (running + pause) for jig, (running, pause) in totals.items() if running + pause}
+
+
+def run_Analytics():
+    import jig_analytics
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "month_data.csv")
+        rows = write_History(path)
+        started = time.perf_counter()
+        summarize_Row_by_row(path)
+        row_by_row = time.perf_counter() - started
+
+        started = time.perf_counter()
+        history = jig_analytics.add_Ratios(jig_analytics.load_History(path))
+        loaded = time.perf_counter() - started
+        jig_analytics.jig_Summary(history)
+        jig_analytics.line_Summary(history)
+        jig_analytics.stop_Time_distribution(history)
+        jig_analytics.rolling_Trend(history)
+        vectorized = time.perf_counter() - started
+
+    print("rows     csv.reader s  load s  load + all metrics s")
+    print("{:<8} {:>12.3f}  {:>6.3f}  {:>20.3f}".format(rows, row_by_row, loaded, vectorized))
+
+
+def _time_Query(query, repeats=20):
+    # Median seconds of `repeats` calls
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        query()
+        samples.append(time.perf_counter() - started)
+    return _percentile(samples, 0.5)
+
+
+def scan_Jig(path, jig_name, first_day):
+    """Rows of one jig from `first_day` on, found by reading the whole CSV the way it is done by hand."""
+    rows = []
+    with open(path, newline='') as file_csv:
+        csv_reader = csv.reader(file_csv, skipinitialspace=True)
+        next(csv_reader)
+        for row in csv_reader:
+            if row[4] == jig_name:
+                day = datetime.date(int(row[2]), int(row[0]), int(row[1]))
+                if day >= first_day:
+                    rows.append((day, row[5], row[6]))
+    return sorted(rows)
+
+
+def run_History(jig_count=500):
+    from jig_history import HistoryStore
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "month_data.csv")
+        rows = write_History(path)
+        store = HistoryStore(os.path.join(directory, "jig_history.db"))
+        started = time.perf_counter()
+        store.import_Csv(path)
+        imported = time.perf_counter() - started
+        size = os.path.getsize(store.path)
+
+        last_year = datetime.date.today() - datetime.timedelta(days=365)
+        print("rows     import s  db MB")
+        print("{:<8} {:>8.2f}  {:>5.1f}".format(rows, imported, size / 1e6))
+        print("\nquery                          rows  median ms")
+        for name, query in (("jig 150, all days", lambda: store.jig_Series(150)),
+                            ("jig 150, last year", lambda: store.jig_Series(150, last_year)),
+                            ("jig 150, one month", lambda: store.jig_Series(
+                                150, last_year, last_year + datetime.timedelta(days=30))),
+                            ("line 50, last year", lambda: store.line_Series(50, last_year)),
+                            ("line 50, last year, 16:30", lambda: store.line_Series(50, last_year, shift="16:30")),
+                            ("csv scan, jig 150, last year", lambda: scan_Jig(path, "Jig150", last_year))):
+            repeats = 3 if name.startswith("csv") else 20
+            print("{:<29} {:>5}  {:>9.3f}".format(name, len(query()), _time_Query(query, repeats) * 1000))
+
+        export_rows = [(jig, 8 * 3600.0, 600.0, None) for jig in range(1, jig_count + 1)]
+        boundary = datetime.datetime.combine(datetime.date.today() + datetime.timedelta(days=1),
+                                             datetime.time(16, 30))
+        inserted = _time_Query(lambda: store.add_Export(boundary, export_rows))
+        print("\nbatched shift insert of {} jigs: {:.2f} ms".format(jig_count, inserted * 1000))
+        store.close()
+
+
+def run_Timeline(jig_count=500, days=60, events_per_jig_day=150, seed=1):
+    from jig_timeline import JigTimeline
+
+    rng = random.Random(seed)
+    start_ms = round(time.time() * 1000) - days * 86400 * 1000
+    step = 86400 * 1000 // events_per_jig_day
+    events = []
+    moment = start_ms
+    for _ in range(days * events_per_jig_day):
+        moment += step
+        events.extend((rng.randint(1, jig_count), rng.choice("WPS"), moment + rng.randint(0, step - 1))
+                      for _ in range(jig_count))
+    with tempfile.TemporaryDirectory() as directory:
+        timeline = JigTimeline(jig_count, directory)
+        started = time.perf_counter()
+        for jig, state, time_ms in events:
+            timeline.append(jig, state, time_ms)
+        appended = time.perf_counter() - started
+        timeline.flush()
+        ring_bytes = sum(times.itemsize * len(times) + states.itemsize * len(states)
+                         for times, states in zip(timeline.times, timeline.states))
+        print("transitions  append us  ring MiB  evicted  day files MiB")
+        print("{:<12} {:>9.2f}  {:>8.1f}  {:>7}  {:>13.1f}".format(
+            len(events), appended / len(events) * 1e6, ring_bytes / 2**20, timeline.evicted,
+            sum(entry.stat().st_size for entry in os.scandir(directory)) / 2**20))
+
+        # Two hours of the last day, from 10:00
+        window_start = round(datetime.datetime.combine(
+            datetime.date.fromtimestamp(moment / 1000) - datetime.timedelta(days=1),
+            datetime.time(10)).timestamp() * 1000)
+        window_end = window_start + 2 * 3600 * 1000
+        print("\nquery                                   rows  median us")
+        for name, query in (("transitions of jig 250, 10:00-12:00",
+                             lambda: timeline.transitions(250, window_start, window_end)),
+                            ("pauses > 5 min of jig 250, 10:00-12:00",
+                             lambda: timeline.intervals(250, window_start, window_end, JIG_PAUSED, 5 * 60 * 1000)),
+                            ("intervals of jig 250, last day", lambda: timeline.intervals(
+                                250, window_start - 10 * 3600 * 1000, window_start + 14 * 3600 * 1000)),
+                            ("pauses > 5 min of all jigs, 10:00-12:00",
+                             lambda: [interval for jig in range(1, jig_count + 1) for interval in
+                                      timeline.intervals(jig, window_start, window_end, JIG_PAUSED, 5 * 60 * 1000)])):
+            print("{:<39} {:>5}  {:>9.1f}".format(name, len(query()), _time_Query(query) * 1e6))
+
+
+RULE_JIG_COUNTS = (50, 500, 5000)
+RULE_EVENT_RATES = (1000, 5000, 20000, 50000)
+
+
+def scan_Rules(states, since, board_last, now, pause_ns, silent_ns):
+    # What the rules would cost without timers: every jig and every board looked at on every tick
+    alerts = 0
+    for jig, state in enumerate(states):
+        if state == JIG_PAUSED and now - since[jig] >= pause_ns:
+            alerts += 1
+    for last in board_last:
+        if now - last >= silent_ns:
+            alerts += 1
+    return alerts
+
+
+def bench_Rules(jig_count, rate, event_count=200000, seed=1):
+    """Seconds per event and per tick of a RuleEngine fed `event_count` events at `rate` simulated events/s."""
+    from jig_rules import RuleEngine, build_Rules
+
+    rng = random.Random(seed)
+    gap = NS_PER_SECOND // rate
+    # Jigs switch between running and paused most of the time, and stop now and then
+    events = [(rng.randint(1, jig_count), rng.choice("WWWPPPS")) for _ in range(event_count)]
+    ports = [(f"COM{board}", board * JIGS_PER_BOARD + 1, JIGS_PER_BOARD)
+             for board in range(-(-jig_count // JIGS_PER_BOARD))]
+    alerts = []
+    now = [0]
+    engine = RuleEngine(build_Rules(30, 6, 60, 60), ports, [alerts.append], clock=lambda: now[0],
+                        wall_clock=lambda: now[0] / NS_PER_SECOND)
+    on_Event = engine.on_Event
+    event_seconds = 0.0
+    tick_seconds = 0.0
+    ticks = 0
+    next_tick = NS_PER_SECOND
+    started = time.perf_counter()
+    for index, (jig, state) in enumerate(events):
+        moment = index * gap
+        if moment >= next_tick:
+            # The tick is timed apart from the events
+            event_seconds += time.perf_counter() - started
+            started = time.perf_counter()
+            engine.advance(next_tick)
+            tick_seconds += time.perf_counter() - started
+            ticks += 1
+            next_tick += NS_PER_SECOND
+            started = time.perf_counter()
+        on_Event(jig, state, moment)
+    event_seconds += time.perf_counter() - started
+
+    states = [rng.choice("WPS") for _ in range(jig_count)]
+    since = [0] * jig_count
+    board_last = [0] * len(ports)
+    scan = _time_Query(lambda: scan_Rules(states, since, board_last, 10 * NS_PER_SECOND, 30 * NS_PER_SECOND,
+                                          60 * NS_PER_SECOND))
+    engine.close()
+    return (event_seconds / event_count, tick_seconds / max(1, ticks), sum(engine.counts.values()),
+            len(engine.wheel), scan)
+
+
+def run_Rules():
+    print("jigs   events/s  event us  tick us  timers  alerts  CPU %  scan tick us")
+    for jig_count in RULE_JIG_COUNTS:
+        for rate in RULE_EVENT_RATES:
+            per_event, per_tick, alerts, timers, scan = bench_Rules(jig_count, rate)
+            cpu = per_event * rate + per_tick
+            print("{:<6} {:>8}  {:>8.2f}  {:>7.1f}  {:>6}  {:>6}  {:>5.1f}  {:>12.1f}".format(
+                jig_count, rate, per_event * 1e6, per_tick * 1e6, timers, alerts, cpu * 100, scan * 1e6))
+
+
+VIEWER_COUNTS = (100, 300, 1000)
+
+
+def run_Viewers(port, count, duration, results):
+    """Open `count` SSE streams and report the delay of every push, from its server time to its arrival."""
+    async def viewer(delays, counts):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"GET /events HTTP/1.1\r\nHost: localhost\r\n\r\n")
+        await reader.readuntil(b"\r\n\r\n")
+        received = 0
+        with contextlib.suppress(asyncio.TimeoutError, ConnectionError, asyncio.IncompleteReadError):
+            while True:
+                line = await asyncio.wait_for(reader.readline(), duration + 5)
+                if not line:
+                    break
+                if line.startswith(b"data: "):
+                    # b'data: {"n":<ms>,' : the server time of the push
+                    delays.append(time.time() * 1000 - int(line[11:line.index(b",")]))
+                    received += len(line) + 1
+        counts.append(received)
+        writer.close()
+
+    async def run():
+        delays = []
+        counts = []
+        await asyncio.gather(*(viewer(delays, counts) for _ in range(count)))
+        return delays, counts
+
+    results.put(asyncio.run(run()))
+
+
+def bench_Web(viewer_count, duration, jig_count=300, rate=200):
+    import multiprocessing
+    from jig_collector import JigCollector
+
+    with tempfile.TemporaryDirectory() as directory:
+        collector = JigCollector(jig_count, [], metrics_port=None, web_port=0, data_directory=directory,
+                                 alert_notifier=None)
+        collector.start(read_serial=False)
+        web = collector.web
+        context = multiprocessing.get_context("fork")
+        results = context.Queue()
+        clients = context.Process(target=run_Viewers, args=(web.port, viewer_count, duration, results))
+        clients.start()
+        while len(web.viewers) < viewer_count:
+            time.sleep(0.05)
+
+        rng = random.Random(viewer_count)
+        pushes, sent_bytes = web.pushes, web.sent_bytes
+        cpu_start = time.process_time()
+        started = time.perf_counter()
+        events = 0
+        while time.perf_counter() - started < duration:
+            collector.handle_Event(rng.randint(1, jig_count), rng.choice("WPS"))
+            events += 1
+            time.sleep(max(0.0, started + events / rate - time.perf_counter()))
+        time.sleep(0.5)
+        cpu = time.process_time() - cpu_start
+        pushes, sent_bytes = web.pushes - pushes, web.sent_bytes - sent_bytes
+        collector.stop()
+        delays, counts = results.get(timeout=60)
+        clients.join()
+    delays.sort()
+    return {"events": events, "pushes": pushes, "push bytes": sent_bytes / max(1, pushes * viewer_count),
+            "p50": _percentile(delays, 0.5), "p99": _percentile(delays, 0.99), "max": delays[-1],
+            "cpu": cpu, "complete": sum(1 for count in counts if count) == viewer_count}
+
+
+def run_Web(duration):
+    print("viewers  events  pushes  bytes/push  p50 ms  p99 ms  max ms  server cpu s  all viewers fed")
+    for viewer_count in VIEWER_COUNTS:
+        result = bench_Web(viewer_count, duration)
+        print("{:<8} {:>6}  {:>6}  {:>10.0f}  {:>6.1f}  {:>6.1f}  {:>6.1f}  {:>12.2f}  {}".format(
+            viewer_count, result["events"], result["pushes"], result["push bytes"], result["p50"], result["p99"],
+            result["max"], result["cpu"], result["complete"]))
+
+
+def bench_Idle_collector(metrics_port, duration):
+    """CPU seconds used by a collector with no traffic over `duration`, with or without the endpoint."""
+    from jig_collector import JigCollector
+
+    with tempfile.TemporaryDirectory() as directory:
+        collector = JigCollector(3, [], metrics_port=metrics_port, web_port=None, data_directory=directory,
+                                 alert_notifier=None)
+        cpu_start = time.process_time()
+        collector.start(read_serial=False)
+        time.sleep(duration)
+        collector.stop()
+        return time.process_time() - cpu_start
+
+
+def run_Metrics(duration, board_count=60, scrapes=200):
+    import urllib.request
+    from jig_collector import JigCollector
+
+    histogram = Histogram()
+    samples = [random.random() / 100 for _ in range(100000)]
+    started = time.perf_counter()
+    for value in samples:
+        histogram.observe(value)
+    observe_ns = (time.perf_counter() - started) / len(samples) * 1e9
+
+    with tempfile.TemporaryDirectory() as directory:
+        ports = [(f"board{board}", board * JIGS_PER_BOARD + 1) for board in range(board_count)]
+        collector = JigCollector(board_count * JIGS_PER_BOARD, ports, metrics_port=0, web_port=None,
+                                 data_directory=directory, alert_notifier=None)
+        register_Pump(collector.registry, EventPump(StandInRoot(), lambda items: None))
+        started = time.perf_counter()
+        for _ in range(100):
+            body = collector.registry.render()
+        render_ms = (time.perf_counter() - started) / 100 * 1000
+
+        collector.start(read_serial=False)
+        url = "http://127.0.0.1:{}/metrics".format(collector.metrics_server.server_address[1])
+        latencies = []
+        for _ in range(scrapes):
+            started = time.perf_counter()
+            with urllib.request.urlopen(url) as response:
+                response.read()
+            latencies.append(time.perf_counter() - started)
+        collector.stop()
+
+    print("observe ns  render ms  lines  scrape p50 ms  scrape p99 ms")
+    print("{:>10.0f}  {:>9.3f}  {:>5}  {:>13.3f}  {:>13.3f}".format(
+        observe_ns, render_ms, body.count("\n"), _percentile(latencies, 0.5) * 1000,
+        _percentile(latencies, 0.99) * 1000))
+    print("\nendpoint  idle cpu s over {:g} s".format(duration))
+    for name, metrics_port in (("off", None), ("on", 0)):
+        print("{:<9} {:>6.3f}".format(name, bench_Idle_collector(metrics_port, duration)))
+
+
+STARTUP_MODES = {
+    "headless": "",
+    "gui": "import AVR_Script, tkinter",
+}
+STARTUP_PROBE = """
+import resource, time
+started = time.perf_counter()
+{imports}
+from jig_collector import JigCollector
+collector = JigCollector(data_directory=".", alert_notifier=None)
+collector.journal.close()
+print(time.perf_counter() - started, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+def bench_Startup(mode, repeats=5):
+    # Each run is a fresh interpreter keeping its data files in an empty directory, so no journal is recovered
+    source_directory = os.path.dirname(os.path.abspath(__file__))
+    probe = STARTUP_PROBE.format(imports=STARTUP_MODES[mode])
+    environment = dict(os.environ, PYTHONPATH=source_directory)
+    process_times = []
+    import_times = []
+    peak_kib = 0
+    for _ in range(repeats):
+        with tempfile.TemporaryDirectory() as directory:
+            started = time.perf_counter()
+            output = subprocess.run([sys.executable, "-c", probe], cwd=directory, env=environment,
+                                    capture_output=True, text=True, check=True).stdout
+            process_times.append(time.perf_counter() - started)
+        seconds, rss = output.split()
+        import_times.append(float(seconds))
+        peak_kib = max(peak_kib, int(rss))
+    return min(process_times), min(import_times), peak_kib
+
+
+def run_Startup():
+    print("mode      process s  import + collector s  peak rss MiB")
+    for mode in STARTUP_MODES:
+        process_seconds, import_seconds, peak_kib = bench_Startup(mode)
+        print("{:<9} {:>9.3f}  {:>20.3f}  {:>12.1f}".format(mode, process_seconds, import_seconds, peak_kib / 1024))
+
+
+def suite_Parse(token_count=200000, chunk=64, seed=1):
+    """Tokens per second decoded by the FrameReader from reads of `chunk` bytes."""
+    rng = random.Random(seed)
+    data = b"".join(f"{rng.randint(1, 500)}{rng.choice('WPS')}".encode() for _ in range(token_count))
+    reader = FrameReader()
+    feed = reader.feed
+    started = time.perf_counter()
+    for offset in range(0, len(data), chunk):
+        feed(data[offset:offset + chunk])
+    return reader.frames / (time.perf_counter() - started)
+
+
+def suite_Pty(token_count=50000):
+    """Tokens per second read from a pty board by a SerialMux through `open_Serial`, as in the collector."""
+    master_fd, path = open_Board()
+    data = b"".join(f"{index % JIGS_PER_BOARD + 1}{'WPS'[index % 3]}".encode() for index in range(token_count))
+    received = [0]
+
+    def handler(jig, state):
+        received[0] += 1
+
+    mux = SerialMux([BoardPort(path, 1)], handler, opener=open_Serial, on_status=lambda port, connected: None)
+    mux.connect_Due(time.monotonic())
+
+    def write():
+        for offset in range(0, len(data), 4096):
+            os.write(master_fd, data[offset:offset + 4096])
+
+    writer = threading.Thread(target=write, daemon=True)
+    started = time.perf_counter()
+    writer.start()
+    deadline = time.monotonic() + 30
+    while received[0] < token_count and time.monotonic() < deadline:
+        mux.poll(0.05)
+    elapsed = time.perf_counter() - started
+    writer.join()
+    mux.close()
+    os.close(master_fd)
+    return received[0] / elapsed
+
+
+def suite_State(jig_count=500, event_count=200000, seed=1):
+    """Nanoseconds per `JigTable.apply`, the counter_Start/counter_Pause of the original script."""
+    rng = random.Random(seed)
+    events = [(rng.randint(1, jig_count), rng.choice("WPS")) for _ in range(event_count)]
+    now = [0]
+    table = JigTable(jig_count, clock=lambda: now[0])
+    apply = table.apply
+    started = time.perf_counter()
+    for jig, state in events:
+        now[0] += 1_000_000
+        apply(jig, state)
+    return (time.perf_counter() - started) / event_count * 1e9
+
+
+def _suite_Collector(jig_count, now, directory):
+    # Simulated clocks read from now[0] (nanoseconds), so the events can be spread like a real shift. The
+    # journal, timeline and logs go to `directory`.
+    from jig_collector import JigCollector
+
+    ports = [(f"COM{board}", board * JIGS_PER_BOARD + 1) for board in range(-(-jig_count // JIGS_PER_BOARD))]
+    start = time.time()
+    return JigCollector(jig_count, ports, metrics_port=None, web_port=None, clock=lambda: now[0],
+                        wall_clock=lambda: start + now[0] / NS_PER_SECOND, data_directory=directory,
+                        alert_notifier=None)
+
+
+def suite_Collector(jig_count=500, event_count=50000, seed=1):
+    """Microseconds per event through `JigCollector.handle_Event`: journal, totals, timeline and rules, with
+    the events 100 ms apart on the collector's clock (a jig every 50 s on average, as on a busy line)."""
+    rng = random.Random(seed)
+    events = [(rng.randint(1, jig_count), rng.choice("WPS")) for _ in range(event_count)]
+    now = [0]
+    with tempfile.TemporaryDirectory() as directory:
+        collector = _suite_Collector(jig_count, now, directory)
+        handle_Event = collector.handle_Event
+        started = time.perf_counter()
+        for jig, state in events:
+            now[0] += NS_PER_SECOND // 10
+            handle_Event(jig, state)
+        elapsed = time.perf_counter() - started
+        collector.stop()
+    return elapsed / event_count * 1e6
+
+
+def suite_Widgets(jig_count=500, ticks=300, use_tk=False):
+    """Widget updates per second of the dashboard refresh: every jig's two counters once per tick, half of
+    the jigs running. With `use_tk` the labels are real Tk widgets, redrawn after each tick."""
+    now = [0]
+    table = JigTable(jig_count, clock=lambda: now[0])
+    for jig in range(1, jig_count + 1, 2):
+        table.apply(jig, "W")
+    if use_tk:
+        import tkinter
+        root = tkinter.Tk()
+        labels = [tkinter.Label(root, text="00:00:00") for _ in range(2 * jig_count)]
+        for index, label in enumerate(labels):
+            label.grid(row=index // 20, column=index % 20)
+        root.update()
+    else:
+        root = StandInRoot()
+        labels = [StandInWidget() for _ in range(2 * jig_count)]
+
+    def handle(items):
+        for jig, record in enumerate(table, start=1):
+            pump.update(labels[2 * jig - 2], text=convert_timeToH_M_S(record.running_seconds()))
+            pump.update(labels[2 * jig - 1], text=convert_timeToH_M_S(record.pause_seconds()))
+
+    pump = EventPump(root, handle)
+    started = time.perf_counter()
+    for _ in range(ticks):
+        now[0] += NS_PER_SECOND
+        pump.post(0)
+        pump.drain()
+        if use_tk:
+            root.update_idletasks()
+    elapsed = time.perf_counter() - started
+    if use_tk:
+        root.destroy()
+    return pump.renderer.applied / elapsed
+
+
+def suite_Export(jig_count=500, repeats=20):
+    """CSV rows per second of the batched shift export."""
+    batched, _ = bench_Export(jig_count, repeats)
+    return jig_count / batched
+
+
+def suite_Memory(jig_count=1000):
+    """KiB allocated per tracked jig by a collector of `jig_count` jigs (table, timeline rings, rules)."""
+    import tracemalloc
+
+    with tempfile.TemporaryDirectory() as directory:
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        collector = _suite_Collector(jig_count, [0], directory)
+        allocated = tracemalloc.get_traced_memory()[0] - before
+        tracemalloc.stop()
+        collector.stop()
+    return allocated / jig_count / 1024
+
+
+def suite_Cases(use_tk):
+    """(name, unit, 'higher' or 'lower' is better, function) of every case of the suite."""
+    widgets = "tk" if use_tk else "stand-in"
+    return (("parse_tokens", "tokens/s", "higher", suite_Parse),
+            ("pty_tokens", "tokens/s", "higher", suite_Pty),
+            ("state_update", "ns/event", "lower", suite_State),
+            ("collector_event", "us/event", "lower", suite_Collector),
+            (f"widget_updates[{widgets}]", "updates/s", "higher", lambda: suite_Widgets(use_tk=use_tk)),
+            ("export_rows", "rows/s", "higher", suite_Export),
+            ("memory_per_jig", "KiB/jig", "lower", suite_Memory))
+
+
+def suite_Machine():
+    return {"python": platform.python_version(), "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(), "cpus": os.cpu_count()}
+
+
+def compare_Baseline(results, baseline, tolerance=SUITE_TOLERANCE):
+    """(name, value, unit, baseline value or None, change, flag) rows; the change is the relative gain, negative
+    when worse, and the flag is 'REGRESSION' or 'improved' beyond `tolerance`, '' within it, 'new' without a
+    baseline value."""
+    rows = []
+    for name, result in results.items():
+        value = result["value"]
+        reference = baseline.get(name, {}).get("value")
+        if not reference:
+            rows.append((name, value, result["unit"], None, None, "new"))
+            continue
+        change = value / reference - 1 if result["better"] == "higher" else reference / value - 1
+        flag = "REGRESSION" if change < -tolerance else "improved" if change > tolerance else ""
+        rows.append((name, value, result["unit"], reference, change, flag))
+    return rows
+
+
+def _run_Case(case):
+    # The collector of garbage would otherwise run at random points of the timed loops
+    gc.collect()
+    gc.disable()
+    try:
+        return case()
+    finally:
+        gc.enable()
+
+
+def measure_Case(case, unit, better, repeats, values=()):
+    """Result of `repeats` more runs of `case`, after a warm-up run, together with the earlier `values`."""
+    values = list(values) + [_run_Case(case) for _ in range(repeats + 1)][1:]
+    # Other processes can only slow a run down, so the best run is the most repeatable figure
+    best = max(values) if better == "higher" else min(values)
+    return {"value": round(best, 3), "unit": unit, "better": better,
+            "spread": round((max(values) - min(values)) / statistics.median(values), 3)}, values
+
+
+def run_Suite(baseline_path=SUITE_BASELINE, save=False, tolerance=SUITE_TOLERANCE, repeats=SUITE_REPEATS,
+              use_tk=False):
+    if use_tk:
+        try:
+            import tkinter
+        except ImportError as exc:
+            raise SystemExit(f"--tk needs tkinter: {exc}")
+        try:
+            tkinter.Tk().destroy()
+        except tkinter.TclError as exc:
+            raise SystemExit(f"--tk needs a display, e.g. xvfb-run python jig_bench.py suite --tk: {exc}")
+    try:
+        with open(baseline_path) as file_baseline:
+            baseline = json.load(file_baseline)
+    except FileNotFoundError:
+        baseline = {"machine": None, "results": {}}
+    results = {}
+    remeasured = set()
+    for name, unit, better, case in suite_Cases(use_tk):
+        results[name], values = measure_Case(case, unit, better, repeats)
+        if not save and compare_Baseline({name: results[name]}, baseline["results"], tolerance)[0][5] == "REGRESSION":
+            # A busy machine can fail a case by chance; a regression has to show again to be reported
+            results[name], values = measure_Case(case, unit, better, repeats, values)
+            remeasured.add(name)
+
+    print("case                          value  unit        baseline   change  spread")
+    rows = compare_Baseline(results, baseline["results"], tolerance)
+    for name, value, unit, reference, change, flag in rows:
+        print("{:<24} {:>11.3f}  {:<9} {:>10}  {:>7}  {:>5.0%}  {}".format(
+            name, value, unit, "--" if reference is None else f"{reference:.3f}",
+            "--" if change is None else f"{change:+.0%}", results[name]["spread"],
+            flag + (" (re-measured)" if name in remeasured else "")))
+    machine = suite_Machine()
+    if baseline["machine"] not in (None, machine):
+        print(f"\nThe baseline was measured on another machine: {baseline['machine']}")
+    if save:
+        with open(baseline_path, 'w') as file_baseline:
+            json.dump({"machine": machine, "date": datetime.datetime.now().isoformat(timespec="seconds"),
+                       "results": results}, file_baseline, indent=2)
+        print(f"\nBaseline saved to {baseline_path}")
+        return
+    regressions = [row[0] for row in rows if row[5] == "REGRESSION"]
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {tolerance:.0%}: {', '.join(regressions)}")
+        raise SystemExit(1)
+
+
+def run_Scheduler(duration):
+    baseline_threads = threading.active_count()
+    print("jigs  design           peak threads  cpu seconds")
+    for jig_count in JIG_COUNTS:
+        for name, bench in (("threading.Timer", bench_Timer_chains), ("TickScheduler", bench_Tick_scheduler)):
+            peak_threads, cpu = bench(jig_count, duration)
+            print("{:<5} {:<16} {:>12}  {:>11.3f}".format(jig_count, name, peak_threads - baseline_threads, cpu))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Jig monitor benchmarks")
+    parser.add_argument("benchmark", choices=["scheduler", "serial", "mux", "engine", "pump", "render", "replay",
+                                              "export", "analytics", "history", "timeline", "rules", "web",
+                                              "metrics", "startup", "suite"])
+    parser.add_argument("--duration", type=float, default=5.0, help="seconds to run each case")
+    parser.add_argument("--baseline", default=SUITE_BASELINE, help="baseline file of the suite")
+    parser.add_argument("--save", action="store_true", help="save the suite results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=SUITE_TOLERANCE,
+                        help="relative loss against the baseline flagged as a regression")
+    parser.add_argument("--repeats", type=int, default=SUITE_REPEATS, help="runs of each suite case")
+    parser.add_argument("--tk", action="store_true", help="update real Tk widgets in the suite (needs a display)")
+    args = parser.parse_args()
+    if args.benchmark == "scheduler":
+        run_Scheduler(args.duration)
+    elif args.benchmark == "serial":
+        run_Serial(args.duration)
+    elif args.benchmark == "mux":
+        run_Mux(args.duration)
+    elif args.benchmark == "engine":
+        run_Engine(args.duration)
+    elif args.benchmark == "pump":
+        run_Pump(args.duration)
+    elif args.benchmark == "render":
+        run_Render()
+    elif args.benchmark == "replay":
+        run_Replay()
+    elif args.benchmark == "export":
+        run_Export()
+    elif args.benchmark == "analytics":
+        run_Analytics()
+    elif args.benchmark == "history":
+        run_History()
+    elif args.benchmark == "timeline":
+        run_Timeline()
+    elif args.benchmark == "rules":
+        run_Rules()
+    elif args.benchmark == "web":
+        run_Web(args.duration)
+    elif args.benchmark == "metrics":
+        run_Metrics(args.duration)
+    elif args.benchmark == "startup":
+        run_Startup()
+    elif args.benchmark == "suite":
+        run_Suite(args.baseline, args.save, args.tolerance, args.repeats, args.tk)
+
+
+if __name__ == "__main__":
+    main()
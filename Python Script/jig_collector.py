@@ -0,0 +1,242 @@
+"""
+Description:
+Headless collector of the jig monitor. It owns the serial reading of all AVR boards and the timing engine: the event journal,
+the JigTable of totals, the timeline of state transitions, the shift exporter and the tick scheduler. It imports neither `tkinter` nor `PIL`, so
+it runs on the headless line servers. The dashboard in `AVR_Script.py` is a client that subscribes to the
+collector and redraws what it publishes.
+
+Published items:
+- a jig id (1, 2, ...): the state of that jig changed.
+- REFRESH_ALL: one tick elapsed; running and paused totals and the clocks moved.
+- SERIAL_FAILED: the serial reader crashed and the collector stopped reading. A board that drops is not a
+  failure: the SerialMux reopens it with backoff while the other boards keep reading.
+- ALERT: a rule raised an alert; the latest ones are in `collector.rules.recent`.
+
+The web dashboard (`jig_web.py`) is another subscriber, started with the collector on WEB_PORT.
+
+Every applied event also goes through the streaming rules of `jig_rules.py` (long pauses, flapping jigs,
+silent boards), whose timers are advanced on each tick. Alerts are printed, appended to ALERT_LOG_PATH, passed
+to the ALERT_NOTIFIER and published.
+
+Classes:
+- JigCollector: Serial reader, journal, totals, timeline, exporter, rules and scheduler of one station.
+
+Functions:
+- data_Path: Path of a data file, moved into a scratch directory when one is given.
+- main: Runs the collector without a GUI until the serial reader fails or Ctrl+C is pressed.
+
+Usage:
+python jig_collector.py
+
+"""
+import datetime
+import os
+import sys
+import threading
+import time
+
+from jig_timing import TICK_PERIOD, TickScheduler
+from jig_metrics import Histogram, MetricsRegistry, register_Collector, serve_Metrics
+from jig_mux import BoardPort, SerialMux, open_Serial
+from jig_journal import EventJournal
+from jig_timeline import JigTimeline
+from jig_export import ShiftExporter
+from jig_rules import RuleEngine, build_Rules, load_Notifier, log_Notifier
+from jig_config import AVR_PORTS, AVR_BUAD_RATE, JIG_COUNT, JOURNAL_PATH, SNAPSHOT_PATH
+from jig_config import SHIFT_BOUNDARIES, EXPORT_CSV_PATH, EXPORT_STATE_PATH, EXPORT_FORMATS, EXPORT_DIRECTORY
+from jig_config import HISTORY_PATH, METRICS_PORT, TIMELINE_DIRECTORY, WEB_HOST, WEB_PORT
+from jig_config import ALERT_LOG_PATH, ALERT_NOTIFIER
+
+REFRESH_ALL = 0
+SERIAL_FAILED = -1
+ALERT = -2
+
+
+def data_Path(path, directory=None):
+    """`path` itself, or its file name inside `directory` when one is given."""
+    if directory is None:
+        return path
+    return os.path.join(directory, os.path.basename(os.path.normpath(path)))
+
+
+class JigCollector:
+    """Tracks the jigs of one station and publishes every change to its subscribers.
+
+    Subscribers are called from the serial and scheduler threads, so a GUI must hand the items over to its
+    own thread (the dashboard posts them to its EventPump).
+
+    `clock` (nanoseconds) and `wall_clock` (epoch seconds) default to the system clocks; the replay tool
+    passes a simulated clock running faster than real time, with a shorter `tick_period` to match.
+
+    The journal, snapshot, exports, history, timeline and alert log are written at their configured paths. A
+    `data_directory` puts all of them there instead, under the same file names, so a replay or a benchmark
+    never writes to the station's files, even when `[files]` gives absolute paths. They also pass
+    `alert_notifier=None`, so their alerts only go to the alert log and never reach the plant's notifier.
+    """
+
+    def __init__(self, jig_count=JIG_COUNT, ports=AVR_PORTS, baud_rate=AVR_BUAD_RATE, opener=open_Serial,
+                 metrics_port=METRICS_PORT, clock=time.monotonic_ns, wall_clock=time.time, tick_period=TICK_PERIOD,
+                 web_port=WEB_PORT, data_directory=None, alert_notifier=ALERT_NOTIFIER):
+        self.ports = [BoardPort(name, first_jig) for name, first_jig in ports]
+        self.baud_rate = baud_rate
+        self.opener = opener
+        # Every event is journaled, so the totals of the day are rebuilt after a restart
+        self.journal = EventJournal(data_Path(JOURNAL_PATH, data_directory), data_Path(SNAPSHOT_PATH, data_directory),
+                                    wall_clock=wall_clock)
+        self.table = self.journal.recover(jig_count, clock)
+        self.wall_clock = wall_clock
+        self.timeline = JigTimeline(jig_count, data_Path(TIMELINE_DIRECTORY, data_directory))
+        self.timeline.load(datetime.date.fromtimestamp(wall_clock()))
+        self.exporter = ShiftExporter(self.table, SHIFT_BOUNDARIES, data_Path(EXPORT_CSV_PATH, data_directory),
+                                      data_Path(EXPORT_STATE_PATH, data_directory), EXPORT_FORMATS,
+                                      data_Path(EXPORT_DIRECTORY, data_directory),
+                                      lambda: datetime.datetime.fromtimestamp(wall_clock()),
+                                      data_Path(HISTORY_PATH, data_directory), self.journal.lock)
+        notifiers = [log_Notifier(data_Path(ALERT_LOG_PATH, data_directory))]
+        if alert_notifier is not None:
+            try:
+                notifiers.append(load_Notifier(alert_notifier))
+            except (ImportError, AttributeError, ValueError) as exc:
+                print(f"Alert notifier {alert_notifier} not loaded: {exc}")
+        self.rules = RuleEngine(build_Rules(), [(port.name, port.first_jig, port.jig_count) for port in self.ports],
+                                notifiers, clock, wall_clock, self.on_Alert)
+        # The recovered states start the rules, so a jig paused before a restart is still timed
+        for jig in range(1, len(self.table) + 1):
+            self.rules.on_Event(jig, self.table[jig].state)
+        self.scheduler = TickScheduler(tick_period)
+        self.scheduler.add(self.tick)
+        self.subscribers = []
+        # Read by the /metrics endpoint; a client such as the dashboard can register its own metrics too
+        self.event_latency = Histogram()
+        self.registry = MetricsRegistry()
+        register_Collector(self.registry, self)
+        self.metrics_port = metrics_port
+        self.metrics_server = None
+        self.web_port = web_port
+        self.web = None
+        self.stopped = threading.Event()
+        self.failed = False
+        self._serial_thread = None
+
+    def subscribe(self, callback):
+        self.subscribers.append(callback)
+
+    def publish(self, item):
+        for callback in self.subscribers:
+            callback(item)
+
+    def handle_Event(self, jig, state):
+        """Apply and journal a W/P/S event, then publish the jig id. Returns the jig record or None."""
+        record = self.journal.apply(self.table, jig, state)
+        if record is not None:
+            self.timeline.append(jig, state, round(self.wall_clock() * 1000))
+            self.rules.on_Event(jig, state)
+            self.publish(jig)
+        return record
+
+    def tick(self):
+        # Export first: a boundary at midnight must see the totals of the day before the journal resets them
+        self.exporter.maintain()
+        self.journal.maintain(self.table)
+        self.timeline.flush()
+        self.rules.advance()
+        self.publish(REFRESH_ALL)
+
+    def on_Event(self, jig, state):
+        print(f"{jig}{state}")
+        self.handle_Event(jig, state)
+
+    def on_Status(self, port, connected):
+        print(f"Serial port {port.name} {'connected' if connected else 'disconnected'}")
+
+    def on_Alert(self, alert):
+        # Called inline by the rules, on the serial thread or the tick (the loop thread in asyncio mode), so the
+        # dashboard gets the alert even while a notifier is stuck
+        print(f"Alert: {alert}")
+        self.publish(ALERT)
+
+    def start_Metrics(self):
+        if self.metrics_port is None:
+            return
+        try:
+            self.metrics_server = serve_Metrics(self.registry, self.metrics_port)
+        except OSError as exc:
+            print(f"Metrics endpoint on port {self.metrics_port} not started: {exc}")
+
+    def stop_Metrics(self):
+        if self.metrics_server is not None:
+            self.metrics_server.shutdown()
+            self.metrics_server.server_close()
+            self.metrics_server = None
+
+    def start_Web(self):
+        if self.web_port is None:
+            return
+        from jig_web import WebDashboard
+
+        web = WebDashboard(self, self.web_port, WEB_HOST)
+        try:
+            web.start()
+        except OSError as exc:
+            print(f"Web dashboard on port {self.web_port} not started: {exc}")
+            return
+        self.web = web
+        self.registry.gauge("jig_web_viewers", "Open live streams of the web dashboard.", lambda: len(web.viewers))
+        self.registry.counter("jig_web_pushes_total", "Delta messages pushed to the web viewers.",
+                              lambda: web.pushes)
+
+    def stop_Web(self):
+        if self.web is not None:
+            self.web.stop()
+            self.web = None
+
+    def run_Serial(self):
+        mux = SerialMux(self.ports, self.on_Event, self.baud_rate, self.opener, self.on_Status,
+                        latency=self.event_latency)
+        try:
+            mux.run(self.stopped)
+        except Exception as e:
+            print(f"Unexpected error: {e}")
+            mux.close()
+            self.fail()
+
+    def fail(self):
+        self.failed = True
+        self.publish(SERIAL_FAILED)
+        self.stopped.set()
+
+    def start(self, read_serial=True):
+        self.start_Metrics()
+        self.start_Web()
+        self.scheduler.start()
+        if read_serial:
+            self._serial_thread = threading.Thread(target=self.run_Serial, name="SerialReader", daemon=True)
+            self._serial_thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.scheduler.stop()
+        # The mux wakes up within POLL_INTERVAL; let it close the ports before closing the journal
+        if self._serial_thread is not None and self._serial_thread is not threading.current_thread():
+            self._serial_thread.join(timeout=3)
+        self.stop_Metrics()
+        self.stop_Web()
+        self.rules.close()
+        self.exporter.close()
+        self.timeline.close()
+        self.journal.close()
+
+
+def main():
+    collector = JigCollector()
+    collector.start()
+    try:
+        collector.stopped.wait()
+    except KeyboardInterrupt:
+        pass
+    collector.stop()
+    return 1 if collector.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
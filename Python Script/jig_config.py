@@ -0,0 +1,227 @@
+"""
+Description:
+Settings shared by the jig monitor modules. The number of jigs and the layout of the dashboard grid are
+read from here, so a whole production line can be monitored without editing the script.
+
+The values below are the defaults. A station overrides them in an INI file: `jig_monitor.ini` next to the
+scripts, or the file named by the JIG_CONFIG environment variable (`jig_launch.py --config FILE` sets it).
+The file is read once when this module is first imported, before the other modules copy the values, and
+`configparser` is only imported when a file exists. `jig_monitor.example.ini` lists every setting.
+
+Relative data paths (DATA_PATHS) are relative to the working directory when no file is read. When a file is
+read they are resolved against the directory of that file, so the journal and the exports do not move when
+the station is started from another directory.
+
+Constants:
+- SCRIPT_DIRECTORY: Directory of the scripts; the logo and the default config file are looked up there.
+- CONFIG_PATH: INI file the settings were read from, or None when the defaults are used.
+- AVR_COM: The COM port used for serial communication.
+- AVR_BUAD_RATE: The baud rate for serial communication.
+- AVR_PORTS: (COM port, first jig id) of every AVR board. Each board serves `JIGS_PER_BOARD` consecutive
+  jig ids from its first one, e.g. [('COM6', 1), ('COM7', 4), ('COM8', 7)] for three boards.
+- JIG_COUNT: Number of jigs tracked by the station.
+- JIG_GRID_COLUMNS: Number of jig panels per row in the dashboard.
+- JIGS_PER_PAGE: Number of jig panels built by the dashboard; more jigs are shown a page at a time.
+- PAGE_SECONDS: Seconds each page is shown before the dashboard turns to the next one, or 0 to turn pages by hand.
+- STRIP_WIDTH, STRIP_HEIGHT: Size in pixels of the day strip drawn under the counters of each jig.
+- LOGO_PATH, LOGO_SIZE: Logo image of the dashboard header and its (width, height) on screen.
+- JIGS_PER_LINE: Number of consecutive jig ids that make up one production line, for the analytics.
+- COLOUR_RUNNING, COLOUR_PAUSED, COLOUR_STOPPED: Panel colours of the jig states.
+- STATE_COLOURS: Panel colour of each state code ('W', 'P', 'S').
+- JOURNAL_PATH, SNAPSHOT_PATH: Files of the event journal and of its latest snapshot.
+- SHIFT_BOUNDARIES: Times of day ("HH:MM") at which the totals are exported.
+- EXPORT_CSV_PATH: CSV file the exports are appended to.
+- EXPORT_STATE_PATH: File remembering the last exported boundary.
+- EXPORT_FORMATS: Export formats, any of 'csv', 'sqlite', 'parquet' and 'arrow' (the last two need pyarrow).
+- EXPORT_DIRECTORY: Directory of the Parquet/Arrow files.
+- HISTORY_PATH: SQLite history database written by the 'sqlite' export format.
+- TIMELINE_DIRECTORY: Directory of the daily files of the jig state transitions.
+- METRICS_PORT: Local HTTP port of the Prometheus-style `/metrics` endpoint, or None to turn it off.
+- WEB_PORT: HTTP port of the live web dashboard, or None to turn it off.
+- WEB_HOST: Address the web dashboard listens on; '0.0.0.0' shares it with the other machines of the network.
+- PAUSE_ALERT_SECONDS: Pause length after which a jig raises an alert, or 0 to turn the rule off.
+- FLAP_ALERT_COUNT, FLAP_WINDOW_SECONDS: A jig switching between running and paused more than FLAP_ALERT_COUNT
+  times within FLAP_WINDOW_SECONDS raises an alert; a count of 0 turns the rule off.
+- SILENT_BOARD_SECONDS: Time without any event from a board after which it raises an alert, or 0 to turn the rule off.
+- ALERT_LOG_PATH: Text file every alert is appended to.
+- ALERT_NOTIFIER: "module:function" called with every alert (see `jig_rules.py`), or None.
+- DATA_PATHS: Names of the settings that hold the files and directories written by the collector.
+
+Functions:
+- load_Config: Overrides the settings of this module from an INI file.
+
+"""
+import os
+
+SCRIPT_DIRECTORY = os.path.dirname(os.path.abspath(__file__))
+CONFIG_PATH = None
+
+AVR_COM = 'COM6'
+AVR_BUAD_RATE = 9600
+AVR_PORTS = [(AVR_COM, 1)]
+
+JIG_COUNT = 3
+JIG_GRID_COLUMNS = 3
+JIGS_PER_PAGE = 9
+PAGE_SECONDS = 0
+STRIP_WIDTH = 380
+STRIP_HEIGHT = 14
+LOGO_PATH = os.path.join(SCRIPT_DIRECTORY, 'Logo.jpg')
+LOGO_SIZE = (400, 150)
+JIGS_PER_LINE = 3
+
+# Medium Sea Green Code    : #3CB371
+# Medium Sea Red Code      : #B34234
+# Medium Sea Yellow Code   : #E4D96F
+COLOUR_RUNNING = "#3CB371"
+COLOUR_PAUSED = "#E4D96F"
+COLOUR_STOPPED = "#B34234"
+
+STATE_COLOURS = {'W': COLOUR_RUNNING, 'P': COLOUR_PAUSED, 'S': COLOUR_STOPPED}
+
+JOURNAL_PATH = 'jig_journal.bin'
+SNAPSHOT_PATH = 'jig_snapshot.json'
+
+SHIFT_BOUNDARIES = ["16:30"]
+EXPORT_CSV_PATH = 'month_data.csv'
+EXPORT_STATE_PATH = 'jig_export_state.json'
+EXPORT_FORMATS = ["csv", "sqlite"]
+EXPORT_DIRECTORY = 'exports'
+HISTORY_PATH = 'jig_history.db'
+
+TIMELINE_DIRECTORY = 'timeline'
+
+METRICS_PORT = 9108
+WEB_PORT = 8088
+WEB_HOST = '127.0.0.1'
+
+PAUSE_ALERT_SECONDS = 600
+FLAP_ALERT_COUNT = 6
+FLAP_WINDOW_SECONDS = 60
+SILENT_BOARD_SECONDS = 3600
+ALERT_LOG_PATH = 'jig_alerts.log'
+ALERT_NOTIFIER = None
+
+
+def _list(value):
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def _ports(value):
+    # "COM6:1, COM7:4": port name and first jig id; the name may itself hold a colon
+    ports = []
+    for item in _list(value):
+        name, _, first_jig = item.rpartition(":")
+        ports.append((name, int(first_jig)))
+    return ports
+
+
+def _port(value):
+    return None if value.strip().lower() in ("", "none", "off") else int(value)
+
+
+def _text(value):
+    return None if value.strip().lower() in ("", "none", "off") else value.strip()
+
+
+def _size(value):
+    width, height = value.lower().split("x")
+    return int(width), int(height)
+
+
+DATA_PATHS = ("JOURNAL_PATH", "SNAPSHOT_PATH", "EXPORT_CSV_PATH", "EXPORT_STATE_PATH", "EXPORT_DIRECTORY",
+              "HISTORY_PATH", "TIMELINE_DIRECTORY", "ALERT_LOG_PATH")
+
+# (section, option, setting, parser) of every setting an INI file may hold
+SETTINGS = (
+    ("serial", "ports", "AVR_PORTS", _ports),
+    ("serial", "baud_rate", "AVR_BUAD_RATE", int),
+    ("station", "jig_count", "JIG_COUNT", int),
+    ("station", "jigs_per_line", "JIGS_PER_LINE", int),
+    ("dashboard", "grid_columns", "JIG_GRID_COLUMNS", int),
+    ("dashboard", "jigs_per_page", "JIGS_PER_PAGE", int),
+    ("dashboard", "page_seconds", "PAGE_SECONDS", float),
+    ("dashboard", "strip_width", "STRIP_WIDTH", int),
+    ("dashboard", "strip_height", "STRIP_HEIGHT", int),
+    ("dashboard", "logo", "LOGO_PATH", str),
+    ("dashboard", "logo_size", "LOGO_SIZE", _size),
+    ("dashboard", "colour_running", "COLOUR_RUNNING", str),
+    ("dashboard", "colour_paused", "COLOUR_PAUSED", str),
+    ("dashboard", "colour_stopped", "COLOUR_STOPPED", str),
+    ("files", "journal", "JOURNAL_PATH", str),
+    ("files", "snapshot", "SNAPSHOT_PATH", str),
+    ("files", "export_csv", "EXPORT_CSV_PATH", str),
+    ("files", "export_state", "EXPORT_STATE_PATH", str),
+    ("files", "export_directory", "EXPORT_DIRECTORY", str),
+    ("files", "history", "HISTORY_PATH", str),
+    ("files", "timeline_directory", "TIMELINE_DIRECTORY", str),
+    ("export", "shift_boundaries", "SHIFT_BOUNDARIES", _list),
+    ("export", "formats", "EXPORT_FORMATS", _list),
+    ("network", "metrics_port", "METRICS_PORT", _port),
+    ("network", "web_port", "WEB_PORT", _port),
+    ("network", "web_host", "WEB_HOST", str),
+    ("alerts", "pause_seconds", "PAUSE_ALERT_SECONDS", float),
+    ("alerts", "flap_count", "FLAP_ALERT_COUNT", int),
+    ("alerts", "flap_window_seconds", "FLAP_WINDOW_SECONDS", float),
+    ("alerts", "silent_board_seconds", "SILENT_BOARD_SECONDS", float),
+    ("alerts", "log", "ALERT_LOG_PATH", str),
+    ("alerts", "notifier", "ALERT_NOTIFIER", _text),
+)
+
+
+def _check_Ports(path):
+    from jig_mux import JIGS_PER_BOARD
+
+    served = {}
+    for name, first_jig in AVR_PORTS:
+        last_jig = first_jig + JIGS_PER_BOARD - 1
+        if first_jig < 1 or last_jig > JIG_COUNT:
+            raise ValueError(f"{path}: [serial] ports: {name} serves jigs {first_jig}-{last_jig}, outside "
+                             f"the jigs 1-{JIG_COUNT} of [station] jig_count")
+        for jig in range(first_jig, last_jig + 1):
+            if jig in served:
+                raise ValueError(f"{path}: [serial] ports: {name} and {served[jig]} both serve jig {jig}")
+            served[jig] = name
+
+
+def load_Config(path):
+    """Override the settings from the INI file at `path`. Unknown sections and options are rejected, so a
+    misspelt setting is not silently ignored, and so are boards serving jigs outside 1..JIG_COUNT or the
+    same jig as another board, whose events would be dropped. Raises ValueError for a bad file."""
+    global AVR_COM, CONFIG_PATH, LOGO_PATH, STATE_COLOURS
+    import configparser
+
+    parser = configparser.ConfigParser(interpolation=None)
+    try:
+        with open(path, 'r') as file_config:
+            parser.read_file(file_config)
+    except configparser.Error as exc:
+        raise ValueError(f"{path}: {exc}") from None
+    known = {(section, option): (name, parse) for section, option, name, parse in SETTINGS}
+    settings = globals()
+    for section in parser.sections():
+        for option, value in parser.items(section):
+            if (section, option) not in known:
+                raise ValueError(f"{path}: unknown setting [{section}] {option}")
+            name, parse = known[section, option]
+            try:
+                settings[name] = parse(value)
+            except ValueError as exc:
+                raise ValueError(f"{path}: bad value for [{section}] {option}: {value!r} ({exc})") from None
+    _check_Ports(path)
+    if AVR_PORTS:
+        AVR_COM = AVR_PORTS[0][0]
+    # The logo and the data files are looked up next to the config file, not in the working directory
+    config_directory = os.path.dirname(os.path.abspath(path))
+    LOGO_PATH = os.path.join(config_directory, LOGO_PATH)
+    for name in DATA_PATHS:
+        settings[name] = os.path.join(config_directory, settings[name])
+    STATE_COLOURS = {'W': COLOUR_RUNNING, 'P': COLOUR_PAUSED, 'S': COLOUR_STOPPED}
+    CONFIG_PATH = path
+
+
+_path = os.environ.get("JIG_CONFIG") or os.path.join(SCRIPT_DIRECTORY, "jig_monitor.ini")
+if os.path.exists(_path):
+    load_Config(_path)
+elif "JIG_CONFIG" in os.environ:
+    raise FileNotFoundError(f"Config file {_path} not found")
@@ -0,0 +1,122 @@
+"""
+Description:
+Handoff of jig events from worker threads to the Tk main loop. Tkinter is not thread-safe, so the serial
+thread and the tick scheduler never touch widgets: they post items to a queue, and one `root.after` pump on
+the Tk side drains them in batches. Widget changes staged while handling a batch are coalesced, so each
+widget is configured at most once per frame, and go through a `WidgetRenderer` so unchanged values are
+not sent to Tk at all.
+
+A handler that has to close the window (the serial reader failed) calls `stop` instead of destroying it in
+the middle of a batch: the staged changes are dropped and the pump destroys the window after the batch,
+instead of re-arming.
+
+Classes:
+- EventPump: Queue between producer threads and a periodic drain on the Tk main loop.
+
+Constants:
+- FRAME_MS: Period of the drain in milliseconds.
+- MAX_BATCH: Largest number of queued items handled in one frame.
+
+"""
+import queue
+import time
+
+from jig_metrics import Histogram
+from jig_render import WidgetRenderer
+
+FRAME_MS = 50
+MAX_BATCH = 10000
+
+
+class EventPump:
+    """Collects items posted from any thread and hands them to `handler` on the Tk main loop.
+
+    `handler` receives the list of items drained in one frame and stages its widget changes with `update`.
+    After the handler returns, every staged widget is configured once with the merged options, skipping
+    the options it already shows, unless the handler called `stop`.
+    """
+
+    def __init__(self, root, handler, period_ms=FRAME_MS, max_batch=MAX_BATCH, renderer=None):
+        self.root = root
+        self.handler = handler
+        self.renderer = renderer if renderer is not None else WidgetRenderer()
+        self.period_ms = period_ms
+        self.max_batch = max_batch
+        self.queue = queue.SimpleQueue()
+        self.staged = {}
+        self.stopped = False
+        self.frames = 0
+        self.items = 0
+        self.widget_updates = 0
+        self.last_drain_seconds = 0.0
+        self.max_drain_seconds = 0.0
+        # Time from the oldest item of a frame being posted to the frame being applied, and the frame work
+        self.waits = Histogram()
+        self.frame_times = Histogram()
+        self.oldest = None
+
+    def post(self, item):
+        """Queue `item` for the next frame. Safe to call from any thread."""
+        if self.oldest is None:
+            self.oldest = time.perf_counter()
+        self.queue.put(item)
+
+    def depth(self):
+        return self.queue.qsize()
+
+    def update(self, widget, **options):
+        """Stage `widget.config(**options)` for the end of the current frame. Tk thread only."""
+        staged = self.staged.get(widget)
+        if staged is None:
+            self.staged[widget] = options
+        else:
+            staged.update(options)
+
+    def start(self):
+        self.root.after(self.period_ms, self.drain)
+
+    def stop(self):
+        """Drop the staged changes and end the pump after the current batch. Tk thread only."""
+        self.stopped = True
+        self.staged = {}
+
+    def drain(self):
+        """Handle the queued items and apply the staged widget changes, then re-arm the pump.
+
+        Once stopped, the window is destroyed instead, which ends `root.mainloop`.
+        """
+        self.flush()
+        if self.stopped:
+            self.root.destroy()
+        else:
+            self.root.after(self.period_ms, self.drain)
+
+    def flush(self):
+        """Handle the queued items and apply the staged widget changes now, without re-arming the pump."""
+        started = time.perf_counter()
+        oldest = self.oldest
+        self.oldest = None
+        batch = []
+        get = self.queue.get_nowait
+        try:
+            while len(batch) < self.max_batch:
+                batch.append(get())
+        except queue.Empty:
+            pass
+        if batch:
+            self.handler(batch)
+            self.items += len(batch)
+        if self.staged and not self.stopped:
+            apply = self.renderer.apply
+            for widget, options in self.staged.items():
+                apply(widget, options)
+            self.widget_updates += len(self.staged)
+            self.staged = {}
+        self.frames += 1
+        finished = time.perf_counter()
+        self.last_drain_seconds = finished - started
+        self.max_drain_seconds = max(self.max_drain_seconds, self.last_drain_seconds)
+        if batch:
+            self.frame_times.observe(self.last_drain_seconds)
+            if oldest is not None:
+                self.waits.observe(finished - oldest)
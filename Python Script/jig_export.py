@@ -0,0 +1,266 @@
+"""
+Description:
+Scheduled export of the jig totals at the end of every shift. The shift boundaries are configurable
+("HH:MM" times of day) and each boundary is exported exactly once: the exporter remembers the last boundary
+it wrote, also across restarts, and a late tick still exports a boundary it has passed. If several
+boundaries were missed while the station was down, they are covered by one export on the next tick. A missed
+boundary of an earlier day cannot use the live totals, which the journal restarted from zero for today: it
+is exported from the totals saved on close on the day of that boundary, dated at the boundary, or skipped
+when there are none (after a crash, or when the station was down for more than a day).
+
+The rows of all jigs are written to `month_data.csv` in one buffered write, with the same columns as before.
+When `pyarrow` is installed, the same export can also be written as Parquet and/or Arrow IPC files with the
+durations as plain seconds, so analytics jobs do not have to parse HH:MM:SS strings. The 'sqlite' format
+adds the rows to the indexed history store of `jig_history`, in one transaction per export.
+
+The columnar files also hold what each jig ran during the shift that just ended. The totals at the start of
+the shift are kept in the state file with the last boundary, so the shift values survive a restart. At the
+day rollover the exporter runs before the journal resets the totals and carries over what the shift ran
+before midnight. The totals are also saved on close, so a station switched off overnight carries it over too.
+After a crash on another day than the restart, the shift values only start from midnight.
+
+Classes:
+- ShiftExporter: Exports the totals of a JigTable once per shift boundary.
+
+Functions:
+- parse_Boundaries: Converts "HH:MM" strings to sorted `datetime.time` values.
+- last_Boundary: Returns the most recent boundary at or before a moment.
+- next_Boundary: Returns the first boundary after a moment.
+
+Constants:
+- CSV_HEADER: Header row of `month_data.csv`.
+- EXPORT_FORMATS: Formats the exporter knows ('csv', 'sqlite', 'parquet', 'arrow').
+
+"""
+import csv
+import datetime
+import io
+import json
+import os
+import threading
+import time
+
+from jig_metrics import DURATION_BUCKETS, Histogram
+from jig_timing import convert_timeToH_M_S
+
+CSV_HEADER = ["Month", " Day", " Year", " Current Time", " Number of Jig", " Running Time", " Resuming Time",
+              " Stop Time"]
+EXPORT_FORMATS = ("csv", "sqlite", "parquet", "arrow")
+
+
+def parse_Boundaries(boundaries):
+    return sorted(datetime.datetime.strptime(boundary, "%H:%M").time() for boundary in boundaries)
+
+
+def last_Boundary(now, boundaries):
+    """Most recent boundary datetime at or before `now`, looking back to the previous day if needed."""
+    for day in (now.date(), now.date() - datetime.timedelta(days=1)):
+        for boundary in reversed(boundaries):
+            moment = datetime.datetime.combine(day, boundary)
+            if moment <= now:
+                return moment
+    return None
+
+
+def next_Boundary(after, boundaries):
+    """First boundary datetime strictly after `after`."""
+    for day in (after.date(), after.date() + datetime.timedelta(days=1)):
+        for boundary in boundaries:
+            moment = datetime.datetime.combine(day, boundary)
+            if moment > after:
+                return moment
+    return None
+
+
+class ShiftExporter:
+    """Writes one row per jig at every shift boundary. `maintain` is cheap and meant to run on each tick."""
+
+    def __init__(self, table, boundaries, csv_path, state_path, formats=("csv",), export_directory="exports",
+                 wall_clock=datetime.datetime.now, history_path="jig_history.db", lock=None):
+        self.table = table
+        # Held while reading the totals; the collector passes the journal lock, under which the events are applied
+        self.lock = lock if lock is not None else threading.Lock()
+        self.boundaries = parse_Boundaries(boundaries)
+        self.csv_path = csv_path
+        self.state_path = state_path
+        self.formats = tuple(formats)
+        self.export_directory = export_directory
+        self.wall_clock = wall_clock
+        self.history_path = history_path
+        # HistoryStore, opened on the first 'sqlite' export
+        self.history = None
+        self.exports = 0
+        self.last_export_seconds = 0.0
+        self.durations = Histogram(DURATION_BUCKETS)
+        # (running, pause) seconds of each jig at the start of the shift, on the scale of the totals of `day`.
+        # After the day reset they are negative: minus what the shift ran before midnight.
+        self.baseline = {}
+        self.day = wall_clock().date()
+
+        self.last_exported = self.load_State()
+        if self.last_exported is None:
+            # First run: start from the boundary just passed rather than exporting it at once
+            self.last_exported = last_Boundary(wall_clock(), self.boundaries)
+        self.next_due = next_Boundary(self.last_exported, self.boundaries)
+
+    def load_State(self):
+        """Last exported boundary from the state file, or None. Also restores the shift baseline."""
+        try:
+            with open(self.state_path, 'r') as file_state:
+                state = json.load(file_state)
+            last_exported = datetime.datetime.fromisoformat(state["last_exported"])
+        except (OSError, ValueError, KeyError):
+            return None
+        self.baseline = {int(jig): tuple(totals) for jig, totals in state.get("baseline", {}).items()}
+        if state.get("day") == self.day.isoformat():
+            return last_exported
+        closing = {int(jig): tuple(totals) for jig, totals in state.get("closing", {}).items()}
+        try:
+            day = datetime.date.fromisoformat(state["day"])
+        except (KeyError, TypeError, ValueError):
+            day = None
+        return self.resume_Day(last_exported, day, closing)
+
+    def resume_Day(self, last_exported, day, closing):
+        """After a restart on a later day than the saved totals of `day`: export a boundary missed on that day
+        from the `closing` totals, then carry the shift over the day reset. Returns the last exported boundary."""
+        boundary = last_Boundary(self.wall_clock(), self.boundaries)
+        if last_exported < boundary and boundary.date() < self.day:
+            if closing and boundary.date() == day:
+                # The station was off at the boundary, so the totals at the close are the totals at the boundary
+                rows = [(jig, totals[0], totals[1],
+                         datetime.datetime.fromtimestamp(totals[2]) if len(totals) > 2 and totals[2] is not None
+                         else None)
+                        for jig, totals in sorted(closing.items())]
+                self.export(boundary, boundary, rows)
+            else:
+                print(f"No totals saved for the shift ending {boundary:%Y-%m-%d %H:%M}, not exported")
+            last_exported = boundary
+        # The journal restarted the totals on this new day: carry over what the shift ran until the close
+        self.baseline = {jig: (running - closing[jig][0], pause - closing[jig][1])
+                         for jig, (running, pause) in self.baseline.items() if jig in closing}
+        self.last_exported = last_exported
+        self.save_State()
+        return last_exported
+
+    def save_State(self, closing=None):
+        state = {"last_exported": self.last_exported.isoformat(), "day": self.day.isoformat(),
+                 "baseline": self.baseline}
+        if closing is not None:
+            state["closing"] = closing
+        temporary_path = self.state_path + ".tmp"
+        with open(temporary_path, 'w') as file_state:
+            file_state.write(json.dumps(state))
+        os.replace(temporary_path, self.state_path)
+
+    def maintain(self):
+        """Export if a boundary has been reached since the last export. Returns True when it exported.
+
+        Must run before the journal upkeep of the same tick, so it sees the totals of the day before the reset.
+        """
+        now = self.wall_clock()
+        exported = now >= self.next_due
+        if exported:
+            self.export(now, last_Boundary(now, self.boundaries))
+        if now.date() != self.day:
+            self.roll_Day(now.date())
+        return exported
+
+    def roll_Day(self, day):
+        # The totals are about to restart from zero: subtract the day's totals from the shift baseline
+        baseline = self.baseline
+        self.baseline = {}
+        for jig, running, pause, _ in self.collect_Rows():
+            start_running, start_pause = baseline.get(jig, (0.0, 0.0))
+            self.baseline[jig] = (start_running - running, start_pause - pause)
+        self.day = day
+        self.save_State()
+
+    def export(self, now, boundary, rows=None):
+        """Write the `rows` of `collect_Rows` (the live totals by default) for `boundary`, stamped `now`."""
+        started = time.perf_counter()
+        if rows is None:
+            rows = self.collect_Rows()
+        if "csv" in self.formats:
+            self.write_Csv(now, rows)
+        if "sqlite" in self.formats:
+            self.write_History(boundary, rows)
+        columnar = [name for name in ("parquet", "arrow") if name in self.formats]
+        if columnar:
+            self.write_Columnar(now, boundary, rows, columnar)
+        # The next shift starts from the totals just exported
+        self.baseline = {jig: (running, pause) for jig, running, pause, _ in rows}
+        self.last_exported = boundary
+        self.next_due = next_Boundary(boundary, self.boundaries)
+        self.save_State()
+        self.exports += 1
+        self.last_export_seconds = time.perf_counter() - started
+        self.durations.observe(self.last_export_seconds)
+
+    def collect_Rows(self):
+        # (jig, running seconds, pause seconds, stop datetime) of every jig, read at one moment and without an
+        # event applied halfway through the rows
+        with self.lock:
+            clock_now = self.table.clock()
+            return [(jig, record.running_seconds(clock_now), record.pause_seconds(clock_now), record.stop_time)
+                    for jig, record in enumerate(self.table, start=1)]
+
+    def write_Csv(self, now, rows):
+        new_file = not os.path.exists(self.csv_path)
+        stamp = now.strftime("%I:%M:%S %p")
+        buffer = io.StringIO()
+        csv_writer = csv.writer(buffer)
+        if new_file:
+            csv_writer.writerow(CSV_HEADER)
+        csv_writer.writerows(
+            [now.month, now.day, now.year, stamp, f"Jig{jig}", convert_timeToH_M_S(running),
+             convert_timeToH_M_S(pause), stop_time.strftime("%I:%M:%S %p") if stop_time is not None else "00:00:00 --"]
+            for jig, running, pause, stop_time in rows)
+        with open(self.csv_path, 'a', newline='') as file_csv:
+            file_csv.write(buffer.getvalue())
+
+    def write_History(self, boundary, rows):
+        if self.history is None:
+            from jig_history import HistoryStore
+            self.history = HistoryStore(self.history_path)
+        self.history.add_Export(boundary, rows)
+
+    def close(self):
+        # The totals at the close carry the shift over to a restart on another day
+        self.save_State({jig: (running, pause, stop_time.timestamp() if stop_time is not None else None)
+                         for jig, running, pause, stop_time in self.collect_Rows()})
+        if self.history is not None:
+            self.history.close()
+            self.history = None
+
+    def write_Columnar(self, now, boundary, rows, formats):
+        try:
+            import pyarrow
+        except ImportError:
+            print("pyarrow is not installed, skipping the Parquet/Arrow export")
+            return
+        # Shift values are the growth of the totals since the start of the shift, across the day reset
+        shift_running = []
+        shift_pause = []
+        for jig, running, pause, _ in rows:
+            start_running, start_pause = self.baseline.get(jig, (0.0, 0.0))
+            shift_running.append(max(0.0, running - start_running))
+            shift_pause.append(max(0.0, pause - start_pause))
+        table = pyarrow.table({
+            "export_time": pyarrow.array([now] * len(rows), pyarrow.timestamp("s")),
+            "shift_end": pyarrow.array([boundary] * len(rows), pyarrow.timestamp("s")),
+            "jig": pyarrow.array([row[0] for row in rows], pyarrow.uint16()),
+            "running_seconds": pyarrow.array([row[1] for row in rows], pyarrow.float64()),
+            "pause_seconds": pyarrow.array([row[2] for row in rows], pyarrow.float64()),
+            "shift_running_seconds": pyarrow.array(shift_running, pyarrow.float64()),
+            "shift_pause_seconds": pyarrow.array(shift_pause, pyarrow.float64()),
+            "stop_time": pyarrow.array([row[3] for row in rows], pyarrow.timestamp("s")),
+        })
+        os.makedirs(self.export_directory, exist_ok=True)
+        name = os.path.join(self.export_directory, "month_data_" + boundary.strftime("%Y%m%d_%H%M"))
+        if "parquet" in formats:
+            import pyarrow.parquet
+            pyarrow.parquet.write_table(table, name + ".parquet")
+        if "arrow" in formats:
+            import pyarrow.feather
+            pyarrow.feather.write_feather(table, name + ".arrow")
@@ -0,0 +1,201 @@
+"""
+Description:
+Indexed history of the shift exports, in an SQLite database. `month_data.csv` only grows: reading one jig
+over a date range means scanning and parsing the whole file, with the date split in three columns and the
+times in 12-hour strings. The store keeps one row per jig per shift with an ISO date, the shift as "HH:MM"
+and the durations as seconds, so a range of days is an index lookup.
+
+The database runs in WAL mode: the collector appends while analytics jobs read, without blocking each other.
+Rows are keyed on (jig, day, shift) in a WITHOUT ROWID table, so the rows of one jig are stored together in
+date order and its time series is one range scan. A second index on (line, shift, day) serves the line
+queries. Writing the same jig, day and shift again replaces the row, so importing a file twice is harmless.
+
+Existing `month_data.csv` files are imported with `import_Csv`; the shift of an imported row is the minute
+of its export time (normally the boundary itself).
+
+Classes:
+- HistoryStore: SQLite store of the exported totals, with batched inserts and the query API.
+
+Functions:
+- parse_Csv_row: Converts one `month_data.csv` row to a store row.
+- main: Command line to import CSV files and print the history of a jig or a line.
+
+Constants:
+- IMPORT_BATCH: Rows inserted per transaction by `import_Csv`.
+
+Usage:
+python jig_history.py import month_data.csv [--db jig_history.db]
+python jig_history.py jig 2 [--start 2024-08-01] [--end 2024-08-31] [--shift 16:30]
+python jig_history.py line 1 [--start 2024-08-01] [--end 2024-08-31] [--shift 16:30]
+
+"""
+import argparse
+import csv
+import sqlite3
+import sys
+
+from jig_config import HISTORY_PATH, JIGS_PER_LINE
+
+IMPORT_BATCH = 10000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS shifts (
+    jig INTEGER NOT NULL,
+    day TEXT NOT NULL,
+    shift TEXT NOT NULL,
+    line INTEGER NOT NULL,
+    running_s REAL NOT NULL,
+    pause_s REAL NOT NULL,
+    stop_time TEXT,
+    PRIMARY KEY (jig, day, shift)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS shifts_line ON shifts (line, shift, day);
+"""
+INSERT = ("INSERT OR REPLACE INTO shifts (jig, day, shift, line, running_s, pause_s, stop_time) "
+          "VALUES (?, ?, ?, ?, ?, ?, ?)")
+
+
+def _seconds(duration):
+    hours, minutes, seconds = duration.split(":")
+    return int(hours) * 3600 + int(minutes) * 60 + int(seconds)
+
+
+def _clock24(clock):
+    # "%I:%M:%S %p" to "HH:MM:SS"; 12 AM is hour 0 and 12 PM is hour 12
+    hour = int(clock[:2]) % 12 + (12 if clock[9] == "P" else 0)
+    return f"{hour:02d}{clock[2:8]}"
+
+
+def parse_Csv_row(row, jigs_per_line=JIGS_PER_LINE):
+    """(jig, day, shift, line, running_s, pause_s, stop_time) of a `month_data.csv` row."""
+    month, day, year, export_time, jig_name, running, pause, stop = (value.strip() for value in row)
+    jig = int(jig_name[3:])
+    stop_time = _clock24(stop) if stop.endswith("M") else None
+    return (jig, f"{int(year):04d}-{int(month):02d}-{int(day):02d}", _clock24(export_time)[:5],
+            (jig - 1) // jigs_per_line + 1, _seconds(running), _seconds(pause), stop_time)
+
+
+class HistoryStore:
+    """Exported jig totals in an SQLite database at `path`.
+
+    Days are "YYYY-MM-DD" strings or `datetime.date` values, shifts "HH:MM" strings. The connection may be
+    used from another thread than the one that opened it, but by one thread at a time.
+    """
+
+    def __init__(self, path=HISTORY_PATH, jigs_per_line=JIGS_PER_LINE):
+        self.path = path
+        self.jigs_per_line = jigs_per_line
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        # WAL with NORMAL sync survives a crash of the process; the CSV and the journal cover a power cut
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        self.rows_written = 0
+
+    def close(self):
+        self.connection.close()
+
+    def insert_Rows(self, rows):
+        """Insert (jig, day, shift, line, running_s, pause_s, stop_time) rows in one transaction."""
+        with self.connection:
+            cursor = self.connection.executemany(INSERT, rows)
+        self.rows_written += cursor.rowcount
+        return cursor.rowcount
+
+    def add_Export(self, boundary, rows):
+        """Insert the rows of one shift export: (jig, running seconds, pause seconds, stop datetime) rows
+        as collected by the ShiftExporter, stored under the day and time of `boundary`."""
+        day = boundary.date().isoformat()
+        shift = boundary.strftime("%H:%M")
+        jigs_per_line = self.jigs_per_line
+        return self.insert_Rows(
+            (jig, day, shift, (jig - 1) // jigs_per_line + 1, running, pause,
+             stop_time.strftime("%H:%M:%S") if stop_time is not None else None)
+            for jig, running, pause, stop_time in rows)
+
+    def import_Csv(self, path, batch=IMPORT_BATCH):
+        """Import a `month_data.csv` file in transactions of `batch` rows. Returns the number of rows."""
+        count = 0
+        with open(path, newline='') as file_csv:
+            csv_reader = csv.reader(file_csv)
+            next(csv_reader, None)
+            pending = []
+            for row in csv_reader:
+                if len(row) != 8:
+                    continue
+                pending.append(parse_Csv_row(row, self.jigs_per_line))
+                if len(pending) >= batch:
+                    count += self.insert_Rows(pending)
+                    pending = []
+            if pending:
+                count += self.insert_Rows(pending)
+        return count
+
+    @staticmethod
+    def _range(start, end, shift):
+        conditions = []
+        parameters = []
+        if start is not None:
+            conditions.append("day >= ?")
+            parameters.append(str(start))
+        if end is not None:
+            conditions.append("day <= ?")
+            parameters.append(str(end))
+        if shift is not None:
+            conditions.append("shift = ?")
+            parameters.append(shift)
+        return "".join(" AND " + condition for condition in conditions), parameters
+
+    def jig_Series(self, jig, start=None, end=None, shift=None):
+        """(day, shift, running_s, pause_s, stop_time) rows of `jig` from `start` to `end` inclusive, oldest
+        first. Without `shift`, every shift of each day is returned."""
+        where, parameters = self._range(start, end, shift)
+        return self.connection.execute(
+            "SELECT day, shift, running_s, pause_s, stop_time FROM shifts WHERE jig = ?" + where
+            + " ORDER BY day, shift", [jig] + parameters).fetchall()
+
+    def line_Series(self, line, start=None, end=None, shift=None):
+        """(day, shift, jigs, running_s, pause_s) rows of `line`, summed over its jigs, oldest first."""
+        where, parameters = self._range(start, end, shift)
+        return self.connection.execute(
+            "SELECT day, shift, COUNT(*), SUM(running_s), SUM(pause_s) FROM shifts WHERE line = ?" + where
+            + " GROUP BY day, shift ORDER BY day, shift", [line] + parameters).fetchall()
+
+    def jigs(self):
+        return [jig for jig, in self.connection.execute("SELECT DISTINCT jig FROM shifts ORDER BY jig")]
+
+    def days(self):
+        """(first day, last day) in the store, or (None, None) when it is empty."""
+        return self.connection.execute("SELECT MIN(day), MAX(day) FROM shifts").fetchone()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Jig history store")
+    parser.add_argument("command", choices=["import", "jig", "line"])
+    parser.add_argument("target", help="CSV file to import, or jig / line number")
+    parser.add_argument("--db", default=HISTORY_PATH, help="history database")
+    parser.add_argument("--start", help="first day (YYYY-MM-DD)")
+    parser.add_argument("--end", help="last day (YYYY-MM-DD)")
+    parser.add_argument("--shift", help="shift boundary (HH:MM)")
+    args = parser.parse_args()
+    store = HistoryStore(args.db)
+    try:
+        if args.command == "import":
+            print(f"Imported {store.import_Csv(args.target)} rows into {args.db}")
+        elif args.command == "jig":
+            print("day         shift  running s  pause s  stop")
+            for day, shift, running, pause, stop_time in store.jig_Series(int(args.target), args.start, args.end,
+                                                                           args.shift):
+                print("{}  {}  {:>9.0f}  {:>7.0f}  {}".format(day, shift, running, pause, stop_time or "--"))
+        else:
+            print("day         shift  jigs  running s  pause s")
+            for day, shift, jigs, running, pause in store.line_Series(int(args.target), args.start, args.end,
+                                                                      args.shift):
+                print("{}  {}  {:>4}  {:>9.0f}  {:>7.0f}".format(day, shift, jigs, running, pause))
+    finally:
+        store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
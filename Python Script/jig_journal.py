@@ -0,0 +1,214 @@
+"""
+Description:
+Append-only journal of the raw jig events, so the running and pause totals survive a reboot of the station.
+Every W/P/S event is appended as a fixed 11-byte record (wall timestamp, jig, state) and the file is fsynced
+in batches. A snapshot of all totals is written periodically with the journal offset it covers, so a restart
+only replays the events after the last snapshot. The totals are daily, like the rows of `month_data.csv`:
+at day rollover they are reset, a fresh snapshot is taken and the journal is truncated.
+
+On recovery, the time between the last journaled moment and the restart is not counted, since the state of
+the jigs while the station was down is unknown. Each jig resumes in its last state from the restart on. While
+any jig is running or paused, a snapshot is written every SNAPSHOT_INTERVAL even without new events, so a
+crash loses at most one interval of a jig that keeps running.
+
+Classes:
+- EventJournal: Journal file, snapshots and recovery of a JigTable.
+
+Functions:
+- replay_Journal: Rebuilds the totals of a JigTable from a snapshot and the journal records after it.
+
+Constants:
+- RECORD: struct layout of one journal record.
+- FSYNC_EVERY, FSYNC_INTERVAL: Number of events after which `apply` fsyncs the pending records, and seconds
+  after which `maintain` (on the tick) fsyncs them.
+- SNAPSHOT_EVERY, SNAPSHOT_INTERVAL: Number of events, and seconds with new events or an open interval, after
+  which a snapshot is written.
+
+"""
+import datetime
+import json
+import os
+import struct
+import threading
+import time
+
+from jig_timing import JIG_PAUSED, JIG_RUNNING, JIG_STOPPED, NS_PER_SECOND, JigTable
+
+RECORD = struct.Struct("<dHc")
+
+FSYNC_EVERY = 64
+FSYNC_INTERVAL = 1.0
+SNAPSHOT_EVERY = 10000
+SNAPSHOT_INTERVAL = 300.0
+
+STATE_BYTES = {JIG_RUNNING: b'W', JIG_PAUSED: b'P', JIG_STOPPED: b'S'}
+
+
+def replay_Journal(jig_count, snapshot, journal_bytes):
+    """Return (table, replayed_until) rebuilt on a wall-clock JigTable.
+
+    `snapshot` is a loaded snapshot dict or None, and `journal_bytes` holds the records written after it.
+    The table clock is the wall time in nanoseconds; `replayed_until` is in seconds like the records. A wall
+    clock stepped back between two records does not count as negative time.
+    """
+    until = [0.0]
+    table = JigTable(jig_count, clock=lambda: round(until[0] * NS_PER_SECOND), wall_clock=lambda: stop_time[0])
+    stop_time = [None]
+    if snapshot is not None:
+        until[0] = snapshot["time"]
+        for record, (state, running_total, pause_total, stopped_at) in zip(table, snapshot["jigs"]):
+            record.state = state
+            record.since = table.clock()
+            record.running_total = round(running_total * NS_PER_SECOND)
+            record.pause_total = round(pause_total * NS_PER_SECOND)
+            record.stop_time = datetime.datetime.fromtimestamp(stopped_at) if stopped_at is not None else None
+    apply = table.apply
+    usable = len(journal_bytes) - len(journal_bytes) % RECORD.size
+    # Records are written in order, so a timestamp earlier than the previous one is the wall clock stepped
+    # back (NTP, a manual change). The step is added to the later records so no interval runs backwards.
+    step_back = 0.0
+    for timestamp, jig, state in RECORD.iter_unpack(memoryview(journal_bytes)[:usable]):
+        if state == b'S':
+            stop_time[0] = datetime.datetime.fromtimestamp(timestamp)
+        if timestamp + step_back < until[0]:
+            step_back = until[0] - timestamp
+        until[0] = timestamp + step_back
+        apply(jig, state.decode(), round(until[0] * NS_PER_SECOND))
+    return table, until[0]
+
+
+class EventJournal:
+    """Journal of the jig events of one station, with snapshots and day-rollover compaction.
+
+    `apply` is the only way events should reach the live JigTable: it updates the table and appends the
+    record under one lock, so a snapshot never misses or double-counts an event.
+    """
+
+    def __init__(self, path, snapshot_path, fsync_every=FSYNC_EVERY, fsync_interval=FSYNC_INTERVAL,
+                 snapshot_every=SNAPSHOT_EVERY, snapshot_interval=SNAPSHOT_INTERVAL, wall_clock=time.time):
+        self.path = path
+        self.snapshot_path = snapshot_path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.snapshot_every = snapshot_every
+        self.snapshot_interval = snapshot_interval
+        self.wall_clock = wall_clock
+        self.lock = threading.Lock()
+        self.file = None
+        self.pending = 0
+        self.last_sync = wall_clock()
+        self.since_snapshot = 0
+        self.last_snapshot = wall_clock()
+        self.day = None
+
+    def load_Snapshot(self):
+        try:
+            with open(self.snapshot_path, 'r') as file_snapshot:
+                return json.load(file_snapshot)
+        except (OSError, ValueError):
+            return None
+
+    def recover(self, jig_count, clock=time.monotonic_ns):
+        """Open the journal and return a live JigTable holding the totals recorded before the restart."""
+        snapshot = self.load_Snapshot()
+        offset = snapshot["offset"] if snapshot is not None else 0
+        try:
+            with open(self.path, 'rb') as file_journal:
+                file_journal.seek(offset)
+                journal_bytes = file_journal.read()
+        except OSError:
+            journal_bytes = b""
+        replayed, until = replay_Journal(jig_count, snapshot, journal_bytes)
+
+        table = JigTable(jig_count, clock=clock,
+                         wall_clock=lambda: datetime.datetime.fromtimestamp(self.wall_clock()))
+        now = clock()
+        until_ns = replayed.clock()
+        for live, record in zip(table, replayed):
+            live.running_total = record.running_ns(until_ns)
+            live.pause_total = record.pause_ns(until_ns)
+            live.state = record.state
+            live.since = now
+            live.stop_time = record.stop_time
+        if until and datetime.date.fromtimestamp(until) != datetime.date.fromtimestamp(self.wall_clock()):
+            # The journal belongs to a previous day: keep the jig states but start today from zero
+            table.reset(now)
+
+        # Start the new run from a compacted journal, which also drops a torn record left by a crash
+        self.file = open(self.path, 'ab')
+        self.day = datetime.date.fromtimestamp(self.wall_clock())
+        with self.lock:
+            self._compact(table, self.wall_clock())
+        return table
+
+    def apply(self, table, jig, state):
+        """Apply a W/P/S event to `table` and journal it. Returns the jig record, or None if rejected."""
+        with self.lock:
+            record = table.apply(jig, state)
+            if record is None:
+                return None
+            now = self.wall_clock()
+            self.file.write(RECORD.pack(now, jig, STATE_BYTES[state]))
+            self.pending += 1
+            self.since_snapshot += 1
+            # Only a full batch is synced here; the tick syncs the rest, off the serial thread's path
+            if self.pending >= self.fsync_every:
+                self._sync(now)
+            return record
+
+    def _sync(self, now):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.pending = 0
+        self.last_sync = now
+
+    def _snapshot(self, table, now):
+        # Totals are folded up to `now`, so replay restarts every open interval from the snapshot time
+        clock_now = table.clock()
+        snapshot = {
+            "time": now,
+            "offset": self.file.tell(),
+            "jigs": [[record.state, record.running_seconds(clock_now), record.pause_seconds(clock_now),
+                      record.stop_time.timestamp() if record.stop_time is not None else None]
+                     for record in table],
+        }
+        temporary_path = self.snapshot_path + ".tmp"
+        with open(temporary_path, 'w') as file_snapshot:
+            json.dump(snapshot, file_snapshot)
+            file_snapshot.flush()
+            os.fsync(file_snapshot.fileno())
+        os.replace(temporary_path, self.snapshot_path)
+        self.since_snapshot = 0
+        self.last_snapshot = now
+
+    def maintain(self, table):
+        """Periodic work, called from the scheduler: fsync, snapshot when due and reset/compact at day rollover."""
+        with self.lock:
+            now = self.wall_clock()
+            if self.pending and now - self.last_sync >= self.fsync_interval:
+                self._sync(now)
+            day = datetime.date.fromtimestamp(now)
+            if day != self.day:
+                table.reset()
+                self._compact(table, now)
+                self.day = day
+            elif self.since_snapshot >= self.snapshot_every or (
+                    now - self.last_snapshot >= self.snapshot_interval
+                    and (self.since_snapshot or any(record.state != JIG_STOPPED for record in table))):
+                # A running or paused jig keeps adding time without events: save it once per interval
+                self._snapshot(table, now)
+
+    def _compact(self, table, now):
+        # Snapshot at the end of the journal first, so a crash before the second snapshot replays nothing
+        self._sync(now)
+        self._snapshot(table, now)
+        self.file.truncate(0)
+        self.file.seek(0)
+        self._snapshot(table, now)
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self._sync(self.wall_clock())
+                self.file.close()
+                self.file = None
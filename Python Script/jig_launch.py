@@ -0,0 +1,142 @@
+"""
+Description:
+Launcher of the jig monitor. It selects the config file before any jig module is imported, then starts the
+dashboard (`AVR_Script.py`) or the headless collector. It can be started from any working directory: the
+config file and the logo are found from their own paths, and relative data paths (journal, exports,
+history) are resolved against the directory of the config file.
+
+With `--profile` it does not run the station: it builds the collector (and the dashboard unless
+`--headless`), prints the time of each startup step, then the slowest imports. The collector is built on a
+copy of the journal and snapshot in a scratch directory, so profiling next to a running station never
+compacts its journal or rewrites its export state. The import profile comes from
+`python -X importtime`; the launcher re-runs itself with that flag when needed.
+
+Classes:
+- StartupProfile: Wall time of the named steps of a startup.
+
+Functions:
+- parse_Importtime: Reads the `-X importtime` lines into (self, cumulative, module) rows, slowest first.
+- profile_Startup: Builds the station once and prints its startup profile.
+- main: Command line of the launcher.
+
+Constants:
+- PROFILE_IMPORTS: Number of imports listed by `--profile`.
+
+Usage:
+python jig_launch.py [--config jig_monitor.ini] [--headless] [--asyncio] [--profile]
+
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+PROFILE_IMPORTS = 15
+
+
+class StartupProfile:
+    """Records the time since `started` at each `mark`, for the `--profile` report.
+
+    `data_directory` is the scratch directory the profiled collector keeps its data files in.
+    """
+
+    def __init__(self, started=None, data_directory=None):
+        self.started = time.perf_counter() if started is None else started
+        self.data_directory = data_directory
+        self.marks = []
+
+    def mark(self, name):
+        self.marks.append((name, time.perf_counter() - self.started))
+
+    def report(self):
+        print("step                                    ms")
+        for name, seconds in self.marks:
+            print("{:<38} {:>5.1f}".format(name, seconds * 1000))
+
+
+def parse_Importtime(lines):
+    """(self seconds, cumulative seconds, module) of every import in `-X importtime` output lines, slowest
+    cumulative first. Nested imports keep the indentation of their module name."""
+    imports = []
+    for line in lines:
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, module = line[len("import time:"):].split("|")
+        imports.append((int(own) / 1e6, int(cumulative) / 1e6, module.rstrip()))
+    imports.sort(key=lambda item: item[1], reverse=True)
+    return imports
+
+
+def profile_Startup(args, profile):
+    import jig_config
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Recovery compacts the journal and stop() saves the export state: work on a copy of the station's
+        for path in (jig_config.JOURNAL_PATH, jig_config.SNAPSHOT_PATH):
+            if os.path.exists(path):
+                shutil.copy(path, directory)
+        profile.data_directory = directory
+        profile.mark("journal copied to a scratch directory")
+        if args.headless:
+            if args.asyncio:
+                from jig_async import AsyncCollector as Collector
+            else:
+                from jig_collector import JigCollector as Collector
+            profile.mark("collector modules imported")
+            collector = Collector(data_directory=directory, alert_notifier=None)
+            profile.mark("collector built (journal recovered)")
+            collector.stop()
+        else:
+            import AVR_Script
+            profile.mark("dashboard modules imported")
+            AVR_Script.main(["--asyncio"] if args.asyncio else [], profile)
+    profile.report()
+
+
+def main():
+    started = time.perf_counter()
+    parser = argparse.ArgumentParser(description="Jig monitor launcher")
+    parser.add_argument("--config", help="INI file of the station (default: jig_monitor.ini next to the scripts)")
+    parser.add_argument("--headless", action="store_true", help="run the collector without the dashboard")
+    parser.add_argument("--asyncio", action="store_true", help="run on one asyncio event loop")
+    parser.add_argument("--profile", action="store_true", help="print the startup and import times, then exit")
+    args = parser.parse_args()
+    if args.config:
+        os.environ["JIG_CONFIG"] = os.path.abspath(args.config)
+
+    if args.profile and "importtime" not in sys._xoptions:
+        # Run again with the import timer on, and read its report from stderr
+        import subprocess
+        result = subprocess.run([sys.executable, "-X", "importtime", os.path.abspath(__file__)] + sys.argv[1:],
+                                stderr=subprocess.PIPE, text=True)
+        imports = parse_Importtime(result.stderr.splitlines())
+        other = [line for line in result.stderr.splitlines() if not line.startswith("import time:")]
+        if other:
+            print("\n".join(other), file=sys.stderr)
+        print("\nslowest imports (cumulative ms, self ms)")
+        for own, cumulative, module in imports[:PROFILE_IMPORTS]:
+            print("{:>8.1f} {:>8.1f}  {}".format(cumulative * 1000, own * 1000, module))
+        return result.returncode
+
+    import jig_config
+    if args.profile:
+        profile = StartupProfile(started)
+        profile.mark(f"config loaded ({jig_config.CONFIG_PATH or 'defaults'})")
+        profile_Startup(args, profile)
+        return 0
+
+    if args.headless:
+        if args.asyncio:
+            import jig_async
+            return jig_async.main()
+        import jig_collector
+        return jig_collector.main()
+    import AVR_Script
+    AVR_Script.main(["--asyncio"] if args.asyncio else [])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+"""
+Description:
+Live metrics of the jig monitor, in the Prometheus text format. The hot paths only keep plain counters and
+fixed-bucket histograms on the objects they already own (bytes and frames on the FrameReader, the tick drift
+on the TickScheduler, the export time on the ShiftExporter, ...). Nothing is formatted or sent until a
+scraper asks for `/metrics`: the registry reads those values at that moment, so the cost while nobody is
+scraping is one histogram update per read, frame, tick or export.
+
+Histograms follow the Prometheus convention: bucket `le` counts the observations lower than or equal to
+its bound, and the rendered buckets are cumulative.
+
+Classes:
+- Histogram: Fixed-bucket histogram of seconds with a count and a sum.
+- MetricsRegistry: Named counters, gauges and histograms read when rendered.
+
+Functions:
+- register_Collector: Registers the serial, event, tick, clock, export and alert metrics of a JigCollector.
+- register_Pump: Registers the queue depth and the Tk update metrics of an EventPump.
+- serve_Metrics: Serves a registry on a local HTTP endpoint from a daemon thread.
+
+Constants:
+- LATENCY_BUCKETS: Bucket bounds in seconds for latencies and drift.
+- DURATION_BUCKETS: Bucket bounds in seconds for exports.
+
+"""
+import bisect
+import threading
+import time
+
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Counts observations into fixed buckets. `observe` is a bisect and three increments."""
+
+    __slots__ = ("bounds", "counts", "count", "sum")
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+
+class MetricsRegistry:
+    """Metrics rendered on demand. Each `read` is a callable returning the current value, or a dict of
+    values by label value when the metric has a `label`."""
+
+    def __init__(self):
+        self.metrics = []
+
+    def counter(self, name, help_text, read, label=None):
+        self.metrics.append((name, "counter", help_text, read, label))
+
+    def gauge(self, name, help_text, read, label=None):
+        self.metrics.append((name, "gauge", help_text, read, label))
+
+    def histogram(self, name, help_text, histogram):
+        self.metrics.append((name, "histogram", help_text, histogram, None))
+
+    def render(self):
+        lines = []
+        for name, kind, help_text, source, label in self.metrics:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == "histogram":
+                cumulative = 0
+                for bound, count in zip(source.bounds, source.counts):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{{le="{bound:g}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{le="+Inf"}} {source.count}')
+                lines.append(f"{name}_sum {source.sum}")
+                lines.append(f"{name}_count {source.count}")
+                continue
+            value = source()
+            if label is None:
+                lines.append(f"{name} {value}")
+            else:
+                for label_value, item in value.items():
+                    # Windows port names such as \\.\COM10 hold backslashes
+                    label_value = str(label_value).replace("\\", "\\\\").replace('"', '\\"')
+                    lines.append(f'{name}{{{label}="{label_value}"}} {item}')
+        return "\n".join(lines) + "\n"
+
+
+def register_Collector(registry, collector):
+    ports = collector.ports
+    registry.counter("jig_serial_bytes_total", "Bytes read from each serial port.",
+                     lambda: {port.name: port.reader.bytes for port in ports}, "port")
+    registry.counter("jig_serial_frames_total", "Jig event tokens decoded from each serial port.",
+                     lambda: {port.name: port.reader.frames for port in ports}, "port")
+    registry.counter("jig_serial_dropped_bytes_total", "Bytes discarded as noise (parse errors) on each port.",
+                     lambda: {port.name: port.reader.dropped for port in ports}, "port")
+    registry.counter("jig_serial_rejected_frames_total", "Tokens naming a jig the board does not serve.",
+                     lambda: {port.name: port.rejected for port in ports}, "port")
+    registry.counter("jig_serial_failures_total", "Failed opens and drops of each serial port.",
+                     lambda: {port.name: port.failures for port in ports}, "port")
+    registry.gauge("jig_serial_connected", "1 while the serial port is open.",
+                   lambda: {port.name: int(port.serial_port is not None) for port in ports}, "port")
+    registry.histogram("jig_event_apply_seconds",
+                       "Time from a serial read to the states of its events being applied and journaled.",
+                       collector.event_latency)
+    registry.counter("jig_ticks_total", "Ticks of the one-second scheduler.", lambda: collector.scheduler.ticks)
+    registry.histogram("jig_tick_drift_seconds", "Lateness of each tick behind its deadline.",
+                       collector.scheduler.drift)
+    wall_offset = time.time() - time.monotonic()
+    registry.gauge("jig_wall_clock_offset_seconds",
+                   "Change of the wall clock against the monotonic clock since start (NTP steps, manual changes).",
+                   lambda: time.time() - time.monotonic() - wall_offset)
+    registry.counter("jig_exports_total", "Shift exports written.", lambda: collector.exporter.exports)
+    registry.histogram("jig_export_seconds", "Duration of each shift export.", collector.exporter.durations)
+    registry.counter("jig_alerts_total", "Alerts raised by each rule.", lambda: dict(collector.rules.counts), "rule")
+    registry.counter("jig_alerts_not_notified_total", "Alerts dropped because the notifier queue was full.",
+                     lambda: collector.rules.notify_dropped)
+    registry.gauge("jig_rule_timers", "Timers armed on the wheel of the rules.", lambda: len(collector.rules.wheel))
+
+
+def register_Pump(registry, pump):
+    registry.gauge("jig_ui_queue_depth", "Items waiting for the next dashboard frame.", pump.depth)
+    registry.counter("jig_ui_items_total", "Items handled by the dashboard.", lambda: pump.items)
+    registry.histogram("jig_ui_wait_seconds", "Time from the oldest posted item to its frame being on screen.",
+                       pump.waits)
+    registry.histogram("jig_ui_frame_seconds", "Time spent handling items and configuring widgets per frame.",
+                       pump.frame_times)
+    registry.counter("jig_ui_widget_configs_total", "Widget config calls sent to Tk.",
+                     lambda: pump.renderer.applied)
+    registry.counter("jig_ui_widget_skipped_total", "Widget updates skipped because Tk already shows them.",
+                     lambda: pump.renderer.skipped)
+
+
+def serve_Metrics(registry, port, host="127.0.0.1"):
+    """Serve `registry.render()` at http://host:port/metrics. Returns the server; call `shutdown` to stop."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="MetricsServer", daemon=True).start()
+    return server
@@ -0,0 +1,213 @@
+"""
+Description:
+Reading of many AVR jig controllers in one process. Each board of `AVR Code/Jig_Control` serves
+`JIGS_PER_BOARD` jigs and numbers them from 1, so every port is given the first station jig id of its board
+and the local ids it sends are mapped onto that range. One thread waits on all ports with a selector and
+reads only the ports that have data.
+
+A port that fails to open or drops (a `SerialException`, which is an `OSError`) is closed and reopened
+after a backoff that doubles from RECONNECT_MIN up to RECONNECT_MAX, so an unplugged board no longer stops
+the other boards or the GUI. Ports without a `fileno` (pyserial on Windows) are polled every POLL_INTERVAL.
+
+Classes:
+- BoardPort: One serial port, its jig id range, its frame buffer and its reconnect state.
+- SerialMux: Selector loop over all BoardPorts, handing every (jig, state) event to a handler.
+
+Constants:
+- JIGS_PER_BOARD: Number of jigs served by one AVR board.
+- RECONNECT_MIN, RECONNECT_MAX: First and largest delay in seconds before reopening a failed port.
+- POLL_INTERVAL: Largest wait of the selector, in seconds.
+
+"""
+import selectors
+import time
+
+from jig_metrics import Histogram
+from jig_serial import READ_CHUNK, FrameReader
+
+JIGS_PER_BOARD = 3
+RECONNECT_MIN = 0.5
+RECONNECT_MAX = 30.0
+POLL_INTERVAL = 0.05
+
+
+def open_Serial(name, baud_rate):
+    import serial
+
+    # timeout=0: reads return at once with whatever is waiting, the selector does the waiting
+    return serial.Serial(name, baud_rate, timeout=0)
+
+
+class BoardPort:
+    """One AVR board: its port name, the station jig ids it covers and its connection state."""
+
+    def __init__(self, name, first_jig, jig_count=JIGS_PER_BOARD):
+        self.name = name
+        self.first_jig = first_jig
+        self.jig_count = jig_count
+        self.serial_port = None
+        self.reader = FrameReader()
+        self.backoff = RECONNECT_MIN
+        self.retry_at = 0.0
+        self.connects = 0
+        self.failures = 0
+        self.events = 0
+        self.rejected = 0
+
+    def jig_id(self, local_jig):
+        """Station jig id of the board's `local_jig`, or None when the board does not serve it."""
+        if 1 <= local_jig <= self.jig_count:
+            return self.first_jig + local_jig - 1
+        return None
+
+
+class SerialMux:
+    """Reads every BoardPort on one thread and calls `handler(jig, state)` with station jig ids.
+
+    `opener(name, baud_rate)` returns an open port object with `read`, `in_waiting` and `close` (and
+    `fileno` to be selectable); it defaults to a non-blocking `serial.Serial`. `on_status(port, connected)`
+    is called when a port opens or drops. `latency` is the Histogram of the time from a read to the return of
+    the handler for its last event.
+    """
+
+    def __init__(self, ports, handler, baud_rate=9600, opener=open_Serial, on_status=None, clock=time.monotonic,
+                 latency=None):
+        self.ports = list(ports)
+        self.handler = handler
+        self.baud_rate = baud_rate
+        self.opener = opener
+        self.on_status = on_status
+        self.clock = clock
+        self.latency = latency if latency is not None else Histogram()
+        self.selector = selectors.DefaultSelector()
+        self.polled = []
+
+    def connect_Due(self, now):
+        for port in self.ports:
+            if port.serial_port is None and now >= port.retry_at:
+                self.connect(port, now)
+
+    def connect(self, port, now):
+        try:
+            serial_port = self.opener(port.name, self.baud_rate)
+        except OSError as exc:
+            self.retry(port, now, exc)
+            return
+        port.serial_port = serial_port
+        # A token cut by the drop is not completed by the next connection
+        port.reader.buffer.clear()
+        port.backoff = RECONNECT_MIN
+        port.connects += 1
+        self.watch(port)
+        if self.on_status is not None:
+            self.on_status(port, True)
+
+    def watch(self, port):
+        """Start waiting for data on a port that was just opened."""
+        try:
+            self.selector.register(port.serial_port.fileno(), selectors.EVENT_READ, port)
+        except (AttributeError, OSError, ValueError):
+            self.polled.append(port)
+
+    def unwatch(self, port):
+        if port in self.polled:
+            self.polled.remove(port)
+            return
+        try:
+            self.selector.unregister(port.serial_port.fileno())
+        except (KeyError, OSError, ValueError):
+            pass
+
+    def retry(self, port, now, exc):
+        port.failures += 1
+        port.retry_at = now + port.backoff
+        print(f"Serial port {port.name}: {exc}, retrying in {port.backoff:g} s")
+        port.backoff = min(port.backoff * 2, RECONNECT_MAX)
+
+    def drop(self, port, now, exc):
+        self.unwatch(port)
+        serial_port = port.serial_port
+        port.serial_port = None
+        try:
+            serial_port.close()
+        except OSError:
+            pass
+        self.retry(port, now, exc)
+        if self.on_status is not None:
+            self.on_status(port, False)
+
+    def read(self, port):
+        serial_port = port.serial_port
+        data = serial_port.read(min(max(serial_port.in_waiting, 1), READ_CHUNK))
+        if not data:
+            return
+        started = time.perf_counter()
+        handler = self.handler
+        tokens = port.reader.feed(data)
+        for local_jig, state in tokens:
+            jig = port.jig_id(local_jig)
+            if jig is None:
+                port.rejected += 1
+                continue
+            port.events += 1
+            handler(jig, state)
+        if tokens:
+            self.latency.observe(time.perf_counter() - started)
+
+    def service(self, port):
+        """Read a port that has data, dropping it if its device failed."""
+        if port.serial_port is None:
+            return
+        try:
+            self.read(port)
+        except OSError as exc:
+            self.drop(port, self.clock(), exc)
+
+    def service_Polled(self):
+        for port in list(self.polled):
+            try:
+                waiting = port.serial_port.in_waiting
+            except OSError as exc:
+                self.drop(port, self.clock(), exc)
+                continue
+            if waiting:
+                self.service(port)
+
+    def next_Wait(self, now, timeout):
+        """Seconds until the next reconnect or poll is due, at most `timeout`."""
+        retry_at = [port.retry_at for port in self.ports if port.serial_port is None]
+        if retry_at:
+            timeout = max(0.0, min(timeout, min(retry_at) - now))
+        if self.polled:
+            timeout = min(timeout, POLL_INTERVAL)
+        return timeout
+
+    def poll(self, timeout):
+        """Wait up to `timeout` seconds, read every port with data and reopen the ports that are due."""
+        now = self.clock()
+        self.connect_Due(now)
+        timeout = self.next_Wait(now, timeout)
+        if self.selector.get_map():
+            for key, _ in self.selector.select(timeout):
+                self.service(key.data)
+        else:
+            # Nothing is selectable (all ports down or polled): sleep instead of spinning
+            time.sleep(timeout)
+        self.service_Polled()
+
+    def run(self, stopped):
+        """Serve the ports until the `stopped` event is set, then close them."""
+        while not stopped.is_set():
+            self.poll(POLL_INTERVAL)
+        self.close()
+
+    def close(self):
+        for port in self.ports:
+            if port.serial_port is not None:
+                try:
+                    port.serial_port.close()
+                except OSError:
+                    pass
+                port.serial_port = None
+        self.polled = []
+        self.selector.close()
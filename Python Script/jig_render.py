@@ -0,0 +1,43 @@
+"""
+Description:
+Dirty-only rendering for the jig dashboard. The renderer remembers the options last applied to every widget
+(text, colour, ...) and only calls `config` with the options whose value actually changed, so a stopped jig
+or an unchanged date costs no Tk work on a refresh.
+
+Classes:
+- WidgetRenderer: Cache of the last applied options of each widget, with applied/skipped counters.
+
+"""
+
+
+class WidgetRenderer:
+    """Applies widget options through a cache of the values already on screen.
+
+    `applied` counts the `config` calls that reached Tk and `skipped` the updates that changed nothing, so
+    the Tk work of a refresh can be checked as the number of jigs grows.
+    """
+
+    def __init__(self):
+        self.shown = {}
+        self.applied = 0
+        self.skipped = 0
+
+    def apply(self, widget, options):
+        """Configure `widget` with the entries of `options` that differ from what it shows."""
+        shown = self.shown.get(widget)
+        if shown is None:
+            self.shown[widget] = dict(options)
+            changed = options
+        else:
+            changed = {key: value for key, value in options.items() if shown.get(key) != value}
+            if not changed:
+                self.skipped += 1
+                return False
+            shown.update(changed)
+        widget.config(**changed)
+        self.applied += 1
+        return True
+
+    def forget(self, widget):
+        """Drop the cached options of `widget`, for example after it was destroyed."""
+        self.shown.pop(widget, None)
@@ -0,0 +1,344 @@
+"""
+Description:
+Streaming rules of the jig monitor. Every event applied by the collector goes through the rules as it
+arrives, and each rule raises an alert when a jig or a board misbehaves:
+- PauseRule: a jig stays paused for longer than PAUSE_ALERT_SECONDS.
+- FlapRule: a jig switches between running and paused more than FLAP_ALERT_COUNT times in FLAP_WINDOW_SECONDS.
+- SilenceRule: a board sends no event for SILENT_BOARD_SECONDS.
+
+No rule scans the jigs and no rule has a thread. A rule that waits for something to *not* happen (the end of
+a pause, the next event of a board) arms a timer on one TimerWheel shared by all the rules, and cancels or
+re-arms it when the awaited event comes. Arming and cancelling are dictionary operations, so an event costs
+O(1) per rule whatever the number of jigs, and the wheel is advanced once per tick by the collector: only the
+timers of the slots that went by are looked at.
+
+Alerts are kept in `RuleEngine.recent`, counted per rule, passed at once to the `on_alert` callback of the
+engine (the collector publishes ALERT so the dashboard shows the latest alert) and handed to every notifier:
+the alert log (ALERT_LOG_PATH) and the notifier named by ALERT_NOTIFIER ("module:function", e.g. a script
+posting to the plant's chat). The callback must be quick, since it runs on the thread that raised the alert.
+For the notifiers, raising an alert only queues it: they run on one worker thread, so a slow chat or HTTP
+service never holds up the serial thread, the tick or the dashboard. A notifier that raises is reported and skipped, and when the queue is full
+(notifiers stuck) new alerts are counted and not notified.
+
+Classes:
+- TimerWheel: Hashed wheel of timers keyed by name, with O(1) arm and cancel.
+- Alert: One alert raised by a rule.
+- PauseRule, FlapRule, SilenceRule: The rules.
+- RuleEngine: Feeds the events to the rules and the alerts to the notifiers.
+
+Functions:
+- log_Notifier: Returns a notifier appending each alert to a text file.
+- load_Notifier: Imports the notifier named by a "module:function" string.
+- build_Rules: The rules enabled by the settings of `jig_config`.
+
+Constants:
+- WHEEL_SLOTS: Number of slots of a TimerWheel; one turn of the wheel spans WHEEL_SLOTS ticks.
+- RECENT_ALERTS: Number of alerts kept in `RuleEngine.recent`.
+- ALERT_QUEUE: Number of alerts waiting for the notifiers before new ones are dropped.
+- SWITCH_STATES: States between which the switches of a jig are counted by the FlapRule.
+
+"""
+import collections
+import datetime
+import importlib
+import queue
+import threading
+import time
+
+from jig_timing import JIG_PAUSED, JIG_RUNNING, NS_PER_SECOND
+from jig_config import PAUSE_ALERT_SECONDS, FLAP_ALERT_COUNT, FLAP_WINDOW_SECONDS, SILENT_BOARD_SECONDS
+
+WHEEL_SLOTS = 4096
+RECENT_ALERTS = 100
+ALERT_QUEUE = 1000
+
+SWITCH_STATES = (JIG_RUNNING, JIG_PAUSED)
+
+
+class TimerWheel:
+    """Timers with a resolution of `resolution` nanoseconds, keyed by any hashable name.
+
+    A timer due at `deadline` goes in the slot of the first tick at or after it, modulo the number of
+    slots; timers further away than one turn share the slot and wait for their turn. Arming a name that is
+    already armed moves its timer, so a rule never has to cancel first.
+    """
+
+    def __init__(self, now, resolution=NS_PER_SECOND, slots=WHEEL_SLOTS):
+        self.resolution = resolution
+        self.slots = [{} for _ in range(slots)]
+        # Slot index of every armed name
+        self.where = {}
+        self.current = now // resolution
+
+    def __len__(self):
+        return len(self.where)
+
+    def arm(self, name, deadline, callback):
+        """Call `callback(name, deadline)` from the first `advance` at or after `deadline`."""
+        index = self.where.pop(name, None)
+        if index is not None:
+            del self.slots[index][name]
+        # Ceiling division: a timer never fires before its deadline
+        tick = max(-(-deadline // self.resolution), self.current + 1)
+        index = tick % len(self.slots)
+        self.slots[index][name] = (deadline, callback)
+        self.where[name] = index
+
+    def cancel(self, name):
+        index = self.where.pop(name, None)
+        if index is not None:
+            del self.slots[index][name]
+
+    def advance(self, now):
+        """Fire the timers due at `now`. Returns the number fired."""
+        target = now // self.resolution
+        slots = self.slots
+        count = len(slots)
+        due = []
+        # After a long gap every slot is visited once, not once per missed tick
+        for tick in range(self.current + 1, self.current + 1 + min(target - self.current, count)):
+            slot = slots[tick % count]
+            if slot:
+                for name, (deadline, callback) in list(slot.items()):
+                    if deadline <= now:
+                        del slot[name]
+                        del self.where[name]
+                        due.append((deadline, name, callback))
+        self.current = max(self.current, target)
+        due.sort(key=lambda timer: timer[0])
+        for deadline, name, callback in due:
+            callback(name, deadline)
+        return len(due)
+
+
+class Alert:
+    """Alert of `rule` about `jig` (or None for a board) on `board`, raised at `time` (a datetime)."""
+
+    __slots__ = ("rule", "jig", "board", "message", "time")
+
+    def __init__(self, rule, jig, board, message, time):
+        self.rule = rule
+        self.jig = jig
+        self.board = board
+        self.message = message
+        self.time = time
+
+    def __str__(self):
+        return f"{self.time:%Y-%m-%d %H:%M:%S} [{self.rule}] {self.message}"
+
+
+class PauseRule:
+    """Alerts once per pause when a jig stays paused for `seconds`."""
+
+    name = "pause"
+
+    def __init__(self, seconds=PAUSE_ALERT_SECONDS):
+        self.seconds = seconds
+        self.limit = round(seconds * NS_PER_SECOND)
+
+    def start(self, engine, now):
+        self.expire = engine.timer(self.expired)
+
+    def on_Event(self, engine, jig, state, now):
+        if state != JIG_PAUSED:
+            engine.wheel.cancel((self.name, jig))
+        elif engine.previous.get(jig) != JIG_PAUSED:
+            engine.wheel.arm((self.name, jig), now + self.limit, self.expire)
+
+    def expired(self, engine, name, deadline):
+        jig = name[1]
+        engine.alert(self.name, jig, f"Jig {jig} paused for more than {_duration(self.seconds)}")
+
+
+class FlapRule:
+    """Alerts when a jig makes more than `count` running/paused switches within `window` seconds.
+
+    The times of the last `count + 1` switches of each jig are kept in a deque of that length, so an event
+    compares two timestamps. After an alert the jig is quiet for one window, not alerting on every switch.
+    """
+
+    name = "flap"
+
+    def __init__(self, count=FLAP_ALERT_COUNT, window=FLAP_WINDOW_SECONDS):
+        self.count = count
+        self.window = window
+        self.window_ns = round(window * NS_PER_SECOND)
+        self.switches = {}
+        self.quiet_until = {}
+
+    def start(self, engine, now):
+        pass
+
+    def on_Event(self, engine, jig, state, now):
+        previous = engine.previous.get(jig)
+        if state == previous or state not in SWITCH_STATES or previous not in SWITCH_STATES:
+            return
+        switches = self.switches.get(jig)
+        if switches is None:
+            switches = self.switches[jig] = collections.deque(maxlen=self.count + 1)
+        switches.append(now)
+        if (len(switches) == switches.maxlen and now - switches[0] <= self.window_ns
+                and now >= self.quiet_until.get(jig, now)):
+            self.quiet_until[jig] = now + self.window_ns
+            engine.alert(self.name, jig, f"Jig {jig} switched between running and paused {len(switches)} times "
+                                         f"in {_duration(self.window)}")
+
+
+class SilenceRule:
+    """Alerts once when a board sends no event for `seconds`, counted from the start for a silent board."""
+
+    name = "silence"
+
+    def __init__(self, seconds=SILENT_BOARD_SECONDS):
+        self.seconds = seconds
+        self.limit = round(seconds * NS_PER_SECOND)
+
+    def start(self, engine, now):
+        self.expire = engine.timer(self.expired)
+        for board in engine.boards:
+            engine.wheel.arm((self.name, board), now + self.limit, self.expire)
+
+    def on_Event(self, engine, jig, state, now):
+        # Any event counts, even one repeating the current state
+        board = engine.board_of.get(jig)
+        if board is not None:
+            engine.wheel.arm((self.name, board), now + self.limit, self.expire)
+
+    def expired(self, engine, name, deadline):
+        board = name[1]
+        engine.alert(self.name, None, f"No event from board {board} for {_duration(self.seconds)}", board)
+
+
+def _duration(seconds):
+    if seconds >= 3600 and seconds % 3600 == 0:
+        return f"{seconds // 3600:g} h"
+    if seconds >= 60 and seconds % 60 == 0:
+        return f"{seconds // 60:g} min"
+    return f"{seconds:g} s"
+
+
+def log_Notifier(path):
+    """Notifier appending one line per alert to the text file at `path`."""
+    def notify(alert):
+        with open(path, 'a') as file_log:
+            file_log.write(f"{alert}\n")
+    return notify
+
+
+def load_Notifier(spec):
+    """Import the notifier `function` of `module` named by "module:function"; it is called with each Alert."""
+    module_name, _, function_name = spec.partition(":")
+    if not function_name:
+        raise ValueError(f"Notifier {spec!r} is not 'module:function'")
+    return getattr(importlib.import_module(module_name), function_name)
+
+
+def build_Rules(pause_seconds=PAUSE_ALERT_SECONDS, flap_count=FLAP_ALERT_COUNT, flap_window=FLAP_WINDOW_SECONDS,
+                silent_seconds=SILENT_BOARD_SECONDS):
+    """The rules whose setting is not None (or 0)."""
+    rules = []
+    if pause_seconds:
+        rules.append(PauseRule(pause_seconds))
+    if flap_count:
+        rules.append(FlapRule(flap_count, flap_window))
+    if silent_seconds:
+        rules.append(SilenceRule(silent_seconds))
+    return rules
+
+
+class RuleEngine:
+    """Runs `rules` over the events of the jigs served by `ports` ((board name, first jig, jig count) rows).
+
+    `on_Event` is called from the serial thread and `advance` from the tick, under one lock. `clock`
+    (nanoseconds) and `wall_clock` (epoch seconds) are the collector's, so a replay at 1000x also runs the
+    rules at 1000x. `on_alert` is called with each Alert on the thread that raised it, before the notifiers
+    get it on the engine's notifier thread, started with the first alert; `close` lets them finish the queued
+    alerts.
+    """
+
+    def __init__(self, rules, ports=(), notifiers=(), clock=time.monotonic_ns, wall_clock=time.time,
+                 on_alert=None):
+        self.rules = list(rules)
+        self.notifiers = list(notifiers)
+        self.on_alert = on_alert
+        self.clock = clock
+        self.wall_clock = wall_clock
+        self.boards = [name for name, first_jig, jig_count in ports]
+        self.board_of = {first_jig + local: name for name, first_jig, jig_count in ports for local in range(jig_count)}
+        # Last state of every jig, so the rules can tell a transition from a repeated state
+        self.previous = {}
+        self.recent = collections.deque(maxlen=RECENT_ALERTS)
+        self.counts = collections.Counter()
+        self.notifier_errors = 0
+        self.notify_dropped = 0
+        self.outbox = queue.Queue(ALERT_QUEUE)
+        self._notifier_thread = None
+        self.events = 0
+        self.lock = threading.Lock()
+        now = clock()
+        self.wheel = TimerWheel(now)
+        for rule in self.rules:
+            rule.start(self, now)
+
+    def timer(self, expired):
+        # Wheel callback of a rule method taking the engine
+        return lambda name, deadline: expired(self, name, deadline)
+
+    def on_Event(self, jig, state, now=None):
+        """Run the rules on `jig` entering `state` at `now` (the collector clock)."""
+        if now is None:
+            now = self.clock()
+        with self.lock:
+            self.events += 1
+            for rule in self.rules:
+                rule.on_Event(self, jig, state, now)
+            self.previous[jig] = state
+
+    def advance(self, now=None):
+        """Fire the timers due at `now`. Called on every tick of the collector."""
+        with self.lock:
+            return self.wheel.advance(self.clock() if now is None else now)
+
+    def alert(self, rule, jig, message, board=None):
+        if board is None:
+            board = self.board_of.get(jig)
+        alert = Alert(rule, jig, board, message, datetime.datetime.fromtimestamp(self.wall_clock()))
+        self.recent.append(alert)
+        self.counts[rule] += 1
+        if self.on_alert is not None:
+            self.on_alert(alert)
+        if self.notifiers:
+            if self._notifier_thread is None:
+                self._notifier_thread = threading.Thread(target=self.run_Notifiers, name="AlertNotifier",
+                                                         daemon=True)
+                self._notifier_thread.start()
+            try:
+                self.outbox.put_nowait(alert)
+            except queue.Full:
+                self.notify_dropped += 1
+        return alert
+
+    def run_Notifiers(self):
+        while True:
+            alert = self.outbox.get()
+            if alert is None:
+                return
+            for notify in self.notifiers:
+                try:
+                    notify(alert)
+                except Exception as exc:
+                    self.notifier_errors += 1
+                    print(f"Alert notifier {getattr(notify, '__name__', notify)} failed: {exc}")
+
+    def close(self, timeout=3):
+        """Let the notifier thread call the notifiers on the queued alerts, then stop it."""
+        thread = self._notifier_thread
+        if thread is None:
+            return
+        self._notifier_thread = None
+        # The end marker waits for room behind the queued alerts, as long as the notifiers move
+        try:
+            self.outbox.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        thread.join(timeout)
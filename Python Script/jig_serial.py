@@ -0,0 +1,59 @@
+"""
+Description:
+Framing of the serial stream sent by the AVR jig controller. The firmware writes each keypad event as a
+two-byte token `<jig><W|P|S>` (for example `UART_sendString("1W")` in `Main_App.c`) with no terminator, so
+a burst of events can arrive split across reads or merged into one read. The SerialMux (`jig_mux.py`) pulls
+everything waiting on a port in one call; the reader keeps the unparsed tail in a buffer and splits out
+every complete token.
+
+Classes:
+- FrameReader: Buffers raw bytes and splits them into (jig, state) tokens.
+
+Constants:
+- READ_CHUNK: Largest number of bytes taken from the port in one read.
+- TOKEN_PATTERN: One token, a jig digit followed by its state letter.
+
+"""
+import re
+
+READ_CHUNK = 4096
+
+# One jig digit followed by the state letter; anything else between tokens is noise. A single digit keeps
+# a token that lost its letter from swallowing the next one ("1" + "2P" must not read as jig 12).
+TOKEN_PATTERN = re.compile(rb'([1-9])([WPS])')
+STATES = {ord('W'): 'W', ord('P'): 'P', ord('S'): 'S'}
+
+
+class FrameReader:
+    """Splits the serial byte stream into (jig, state) tokens.
+
+    Bytes that do not end a token yet stay in the buffer until the next `feed`, so a token split across
+    two reads is still decoded once, and several tokens in one read are all returned in order.
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.bytes = 0
+        self.frames = 0
+        self.dropped = 0
+
+    def feed(self, data):
+        """Append `data` and return the list of complete (jig, state) tokens, oldest first."""
+        buffer = self.buffer
+        buffer += data
+        self.bytes += len(data)
+        tokens = []
+        end = 0
+        for match in TOKEN_PATTERN.finditer(buffer):
+            self.dropped += match.start() - end
+            tokens.append((int(match.group(1)), STATES[match.group(2)[0]]))
+            end = match.end()
+        # Keep only a trailing jig digit: it may be the first byte of a token split across reads
+        tail = len(buffer)
+        if tail > end and 49 <= buffer[tail - 1] <= 57:
+            tail -= 1
+        self.dropped += tail - end
+        del buffer[:tail]
+        self.frames += len(tokens)
+        return tokens
+
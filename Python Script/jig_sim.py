@@ -0,0 +1,350 @@
+"""
+Description:
+Simulator of the AVR jig controllers and replay harness for the whole pipeline, without the Proteus project
+or any Windows tool. Each simulated board behaves like `AVR Code/Jig_Control/Main_App.c`: keypad keys 7/8/9,
+4/5/6 and 1/2/3 send `1W`/`1P`/`1S`, `2W`/`2P`/`2S` and `3W`/`3P`/`3S` over the UART, and the firmware waits
+KEY_DELAY after every key, so one board never sends two tokens closer than that. Every board is the master
+side of a pty, and its slave path can be used as a port in the `[serial]` section of `jig_monitor.ini`.
+
+Sessions are lists of (seconds from start, station jig id, state). They are generated from a random
+operator model, saved as CSV, or read back from a station's `jig_journal.bin`. `replay` streams a session
+through pty boards into a headless JigCollector whose clocks run `speed` times faster than real time, so a
+whole shift goes from bytes to totals to `month_data.csv` in seconds. The totals are then compared with
+the totals computed from the session itself.
+
+Classes:
+- SimulatedClock: Monotonic and wall clocks running `speed` times faster than real time.
+- AvrBoard: One simulated AVR board on a pty.
+
+Functions:
+- generate_Session: Random session of W/P/S events for a number of jigs.
+- save_Session, load_Session: Session CSV files (and journal files for `load_Session`).
+- session_Totals: Running and pause seconds of every jig at the end of a session.
+- stream_Session: Writes the tokens of a session to the boards at their (scaled) times.
+- replay_Session: Replays a session into a JigCollector and reports the differences in totals.
+- main: Command line of the simulator.
+
+Constants:
+- KEY_TOKENS: UART token sent for each keypad key.
+- KEY_DELAY: Pause of the firmware after each key, in seconds.
+
+Usage:
+python jig_sim.py simulate [--jigs N] [--rate EVENTS_PER_JIG_HOUR] [--hours H] [--speed X]
+python jig_sim.py generate SESSION.csv [--jigs N] [--rate EVENTS_PER_JIG_HOUR] [--hours H]
+python jig_sim.py replay SESSION.csv|jig_journal.bin [--speed X] [--directory DIR]
+
+"""
+import argparse
+import contextlib
+import csv
+import datetime
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import tty
+
+from jig_timing import JIG_PAUSED, JIG_RUNNING, JIG_STOPPED, NS_PER_SECOND
+from jig_mux import JIGS_PER_BOARD
+
+KEY_TOKENS = {'7': b"1W", '8': b"1P", '9': b"1S",
+              '4': b"2W", '5': b"2P", '6': b"2S",
+              '1': b"3W", '2': b"3P", '3': b"3S"}
+KEY_DELAY = 0.25
+
+# Next states an operator picks from each state, with their weights
+NEXT_STATES = {
+    JIG_STOPPED: ((JIG_RUNNING, 9), (JIG_PAUSED, 1)),
+    JIG_RUNNING: ((JIG_PAUSED, 6), (JIG_STOPPED, 4)),
+    JIG_PAUSED: ((JIG_RUNNING, 8), (JIG_STOPPED, 2)),
+}
+
+
+class SimulatedClock:
+    """Clocks that start at `start` (epoch seconds) and run `speed` times faster than real time."""
+
+    def __init__(self, speed=1.0, start=None):
+        self.speed = speed
+        self.start = time.time() if start is None else start
+        self.origin = time.monotonic_ns()
+
+    def elapsed(self):
+        """Simulated seconds since the clock was created."""
+        return (time.monotonic_ns() - self.origin) * self.speed / NS_PER_SECOND
+
+    def monotonic_ns(self):
+        return round((time.monotonic_ns() - self.origin) * self.speed)
+
+    def time(self):
+        return self.start + self.elapsed()
+
+
+class AvrBoard:
+    """A pty standing in for one AVR board: `press` sends the token of a keypad key like Main_App.c."""
+
+    def __init__(self):
+        self.master_fd, slave_fd = os.openpty()
+        tty.setraw(self.master_fd)
+        self.path = os.ttyname(slave_fd)
+        os.close(slave_fd)
+
+    def press(self, key):
+        token = KEY_TOKENS.get(key)
+        if token is not None:
+            os.write(self.master_fd, token)
+
+    def send(self, data):
+        os.write(self.master_fd, data)
+
+    def close(self):
+        os.close(self.master_fd)
+
+
+def generate_Session(jig_count, hours, events_per_jig_hour=30, seed=None):
+    """Random events of `jig_count` jigs over `hours`, sorted by time.
+
+    Each jig changes state at random moments (on average `events_per_jig_hour` per hour). The events of a
+    board are at least KEY_DELAY apart, like the firmware sends them.
+    """
+    rng = random.Random(seed)
+    duration = hours * 3600
+    events = []
+    for jig in range(1, jig_count + 1):
+        state = JIG_STOPPED
+        moment = rng.expovariate(events_per_jig_hour / 3600)
+        while moment < duration:
+            states, weights = zip(*NEXT_STATES[state])
+            state = rng.choices(states, weights)[0]
+            events.append((moment, jig, state))
+            moment += rng.expovariate(events_per_jig_hour / 3600)
+    events.sort()
+    board_free = {}
+    spaced = []
+    for moment, jig, state in events:
+        board = (jig - 1) // JIGS_PER_BOARD
+        moment = max(moment, board_free.get(board, 0.0))
+        board_free[board] = moment + KEY_DELAY
+        spaced.append((moment, jig, state))
+    spaced.sort()
+    return spaced
+
+
+def save_Session(path, events):
+    with open(path, 'w', newline='') as file_session:
+        csv_writer = csv.writer(file_session)
+        csv_writer.writerow(["seconds", "jig", "state"])
+        csv_writer.writerows([f"{moment:.3f}", jig, state] for moment, jig, state in events)
+
+
+def load_Session(path):
+    """Read a session CSV, or the records of a `jig_journal.bin` with times relative to the first one."""
+    if path.endswith(".bin"):
+        from jig_journal import RECORD
+
+        with open(path, 'rb') as file_journal:
+            data = file_journal.read()
+        data = data[:len(data) - len(data) % RECORD.size]
+        records = [(timestamp, jig, state.decode()) for timestamp, jig, state in RECORD.iter_unpack(data)]
+        if not records:
+            return []
+        first = records[0][0]
+        return [(timestamp - first, jig, state) for timestamp, jig, state in records]
+    with open(path, 'r', newline='') as file_session:
+        rows = csv.reader(file_session)
+        next(rows, None)
+        return [(float(moment), int(jig), state) for moment, jig, state in rows]
+
+
+def session_Totals(events, jig_count, until):
+    """{jig: (running seconds, pause seconds)} at `until` seconds, computed from the events alone."""
+    states = {jig: (JIG_STOPPED, 0.0) for jig in range(1, jig_count + 1)}
+    totals = {jig: [0.0, 0.0] for jig in range(1, jig_count + 1)}
+    for moment, jig, state in events:
+        previous, since = states[jig]
+        if state == previous:
+            continue
+        if previous == JIG_RUNNING:
+            totals[jig][0] += moment - since
+        elif previous == JIG_PAUSED:
+            totals[jig][1] += moment - since
+        states[jig] = (state, moment)
+    for jig, (state, since) in states.items():
+        if state == JIG_RUNNING:
+            totals[jig][0] += until - since
+        elif state == JIG_PAUSED:
+            totals[jig][1] += until - since
+    return {jig: tuple(total) for jig, total in totals.items()}
+
+
+def stream_Session(events, boards, speed=1.0, stopped=None):
+    """Write every event as its token on its board when `events` time / `speed` has passed.
+
+    Tokens due at the same moment are written to a board in one write. Returns the real seconds since the
+    start at which each sent event was written.
+    """
+    started = time.monotonic()
+    written_at = []
+    index = 0
+    while index < len(events):
+        if stopped is not None and stopped.is_set():
+            break
+        due = events[index][0] / speed
+        wait = due - (time.monotonic() - started)
+        if wait > 0:
+            time.sleep(min(wait, 0.5))
+            continue
+        elapsed = time.monotonic() - started
+        bursts = {}
+        while index < len(events) and events[index][0] / speed <= elapsed:
+            _, jig, state = events[index]
+            board, local_jig = divmod(jig - 1, JIGS_PER_BOARD)
+            bursts.setdefault(board, []).append(f"{local_jig + 1}{state}".encode())
+            index += 1
+        for board, tokens in bursts.items():
+            boards[board].send(b"".join(tokens))
+        written_at.extend([time.monotonic() - started] * (index - len(written_at)))
+    return written_at
+
+
+def replay_Session(events, speed=1000.0, directory=None, start=None):
+    """Replay `events` into a headless JigCollector running on a clock `speed` times faster than real time.
+
+    The collector writes its data files in `directory` (a temporary one by default), so its journal, export
+    state and `month_data.csv` do not touch the station's files, and its alerts only go to the alert log
+    there, never to the station's ALERT_NOTIFIER. Returns a report dict. Raises ValueError for a session
+    without events.
+    """
+    from jig_collector import JigCollector
+
+    if not events:
+        raise ValueError("the session has no events")
+    jig_count = max(jig for _, jig, _ in events)
+    board_count = (jig_count - 1) // JIGS_PER_BOARD + 1
+    if start is None:
+        # A day shift by default, so the 16:30 boundary is crossed by sessions of ten hours
+        start = datetime.datetime.combine(datetime.date.today(), datetime.time(7, 0)).timestamp()
+    clock = SimulatedClock(speed, start)
+    boards = [AvrBoard() for _ in range(board_count)]
+    ports = [(board.path, index * JIGS_PER_BOARD + 1) for index, board in enumerate(boards)]
+
+    temporary = None
+    if directory is None:
+        temporary = tempfile.TemporaryDirectory()
+        directory = temporary.name
+    try:
+        # The collector prints every event it reads; at 1000x that is only noise
+        with open(os.devnull, 'w') as quiet, contextlib.redirect_stdout(quiet):
+            collector = JigCollector(jig_count, ports, metrics_port=None, web_port=None, clock=clock.monotonic_ns,
+                                     wall_clock=clock.time, tick_period=max(0.01, 1.0 / speed),
+                                     data_directory=directory, alert_notifier=None)
+            # The journal intervals are read on the simulated wall clock: keep them at their real-time length
+            collector.journal.fsync_interval *= speed
+            collector.journal.snapshot_interval *= speed
+            collector.start()
+            while any(port.serial_port is None for port in collector.ports):
+                time.sleep(0.01)
+            # Session time 0 is now on the simulated clock
+            offset = clock.elapsed()
+            real_started = time.monotonic()
+            written_at = stream_Session(events, boards, speed)
+            while (sum(port.events for port in collector.ports) < len(written_at)
+                   and time.monotonic() - real_started < 3600):
+                time.sleep(0.01)
+            real_seconds = time.monotonic() - real_started
+            collector.stop()
+
+        # Expected totals from the moments the tokens were actually written, so the late wake-ups of the
+        # writer are not counted as errors of the pipeline
+        written = [(offset + seconds * speed, jig, state)
+                   for seconds, (_, jig, state) in zip(written_at, events)]
+        until = clock.monotonic_ns()
+        expected = session_Totals(written, jig_count, until / NS_PER_SECOND)
+        errors = []
+        for jig, record in enumerate(collector.table, start=1):
+            running, pause = expected[jig]
+            errors.append(abs(record.running_seconds(until) - running))
+            errors.append(abs(record.pause_seconds(until) - pause))
+        csv_rows = 0
+        if os.path.exists(collector.exporter.csv_path):
+            with open(collector.exporter.csv_path, 'r') as file_csv:
+                csv_rows = max(0, sum(1 for _ in file_csv) - 1)
+        applied = sum(port.events for port in collector.ports)
+        report = {
+            "jigs": jig_count,
+            "boards": board_count,
+            "events": len(events),
+            "applied": applied,
+            "dropped_bytes": sum(port.reader.dropped for port in collector.ports),
+            "session_hours": (events[-1][0] if events else 0.0) / 3600,
+            "real_seconds": real_seconds,
+            "speed": (events[-1][0] / real_seconds) if events and real_seconds else 0.0,
+            "max_error_seconds": max(errors) if errors else 0.0,
+            "exports": collector.exporter.exports,
+            "csv_rows": csv_rows,
+        }
+    finally:
+        for board in boards:
+            board.close()
+        if temporary is not None:
+            temporary.cleanup()
+    return report
+
+
+def run_Simulate(args):
+    board_count = (args.jigs - 1) // JIGS_PER_BOARD + 1
+    boards = [AvrBoard() for _ in range(board_count)]
+    # Lines of the [serial] and [station] sections of jig_monitor.ini
+    print("ports = {}".format(", ".join(
+        f"{board.path}:{index * JIGS_PER_BOARD + 1}" for index, board in enumerate(boards))))
+    # Every jig of the last board is counted, so the ports fit jig_count
+    print(f"jig_count = {board_count * JIGS_PER_BOARD}")
+    events = generate_Session(args.jigs, args.hours, args.rate, args.seed)
+    print(f"Sending {len(events)} events over {args.hours * 3600 / args.speed:.0f} s, Ctrl+C to stop")
+    stopped = threading.Event()
+    try:
+        stream_Session(events, boards, args.speed, stopped)
+    except KeyboardInterrupt:
+        stopped.set()
+    for board in boards:
+        board.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AVR jig controller simulator and replay harness")
+    commands = parser.add_subparsers(dest="command", required=True)
+    simulate = commands.add_parser("simulate", help="send random keypad events on pty boards")
+    generate = commands.add_parser("generate", help="write a random session to a CSV file")
+    generate.add_argument("session")
+    for command in (simulate, generate):
+        command.add_argument("--jigs", type=int, default=9)
+        command.add_argument("--rate", type=float, default=30.0, help="events per jig per hour")
+        command.add_argument("--hours", type=float, default=10.0)
+        command.add_argument("--seed", type=int, default=None)
+    simulate.add_argument("--speed", type=float, default=1.0)
+    replay = commands.add_parser("replay", help="replay a session through a collector and check its totals")
+    replay.add_argument("session", help="session CSV or jig_journal.bin")
+    replay.add_argument("--speed", type=float, default=1000.0)
+    replay.add_argument("--directory", default=None, help="directory of the data files of the collector")
+    args = parser.parse_args()
+
+    if args.command == "simulate":
+        run_Simulate(args)
+    elif args.command == "generate":
+        save_Session(args.session, generate_Session(args.jigs, args.hours, args.rate, args.seed))
+    elif args.command == "replay":
+        events = load_Session(args.session)
+        if not events:
+            # A station's journal is emptied by the compaction at every start and at midnight
+            print(f"{args.session}: no events to replay")
+            return 1
+        report = replay_Session(events, args.speed, args.directory)
+        for name, value in report.items():
+            print(f"{name:<18} {value:.3f}" if isinstance(value, float) else f"{name:<18} {value}")
+        return 0 if report["applied"] == report["events"] else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+"""
+Description:
+Timeline of every W/P/S transition of every jig. The JigTable only keeps the totals and the last stop time;
+the timeline keeps when each state began, so pauses can be counted and located after the fact and the
+dashboard can draw a strip of the day for each jig.
+
+Each jig has a ring of `capacity` transitions held in two fixed-width arrays: the wall time in milliseconds
+(`array('q')`) and the state letter (`array('B')`), 9 bytes per transition. When a ring is full the oldest
+transition is overwritten, so the memory stays at `jig_count * capacity * 9` bytes whatever the uptime.
+Nothing is lost by the eviction: every transition is also appended to a file per day in `directory` (11-byte
+records, written once per tick), and the rings are refilled from today's file after a restart.
+
+The times of one jig never go backwards (a wall clock stepped back is clamped to the previous transition), so
+range queries are binary searches on the ring.
+
+Classes:
+- JigTimeline: Per-jig transition rings with range queries and day files.
+
+Functions:
+- read_Day: Reads the transitions of a day file, for ranges older than the rings.
+- day_Bounds: Start and end of the local day of a moment, in epoch milliseconds.
+
+Constants:
+- RECORD: struct layout of one day-file record (time in ms, jig, state).
+- TIMELINE_CAPACITY: Default number of transitions kept in memory per jig.
+
+"""
+import array
+import datetime
+import os
+import struct
+import threading
+
+RECORD = struct.Struct("<qHc")
+TIMELINE_CAPACITY = 4096
+
+
+def day_Bounds(time_ms):
+    day = datetime.date.fromtimestamp(time_ms / 1000)
+    start = datetime.datetime.combine(day, datetime.time())
+    end = start + datetime.timedelta(days=1)
+    return round(start.timestamp() * 1000), round(end.timestamp() * 1000)
+
+
+def read_Day(directory, day):
+    """(time ms, jig, state) transitions stored for `day` (a `datetime.date`), oldest first."""
+    try:
+        with open(os.path.join(directory, day.isoformat() + ".bin"), 'rb') as file_day:
+            data = file_day.read()
+    except OSError:
+        return []
+    usable = len(data) - len(data) % RECORD.size
+    return [(time_ms, jig, state.decode()) for time_ms, jig, state in RECORD.iter_unpack(data[:usable])]
+
+
+class JigTimeline:
+    """Rings of the last `capacity` transitions of `jig_count` jigs, numbered from 1.
+
+    `append` is called by the collector for each applied event; the queries may run on another thread.
+    Times are epoch milliseconds on the wall clock.
+    """
+
+    def __init__(self, jig_count, directory="timeline", capacity=TIMELINE_CAPACITY):
+        self.directory = directory
+        self.capacity = capacity
+        self.times = [array.array('q', bytes(8 * capacity)) for _ in range(jig_count)]
+        self.states = [array.array('B', bytes(capacity)) for _ in range(jig_count)]
+        self.starts = [0] * jig_count
+        self.counts = [0] * jig_count
+        self.evicted = 0
+        self.lock = threading.Lock()
+        # Records not yet written to the file of day_start
+        self.pending = bytearray()
+        self.day_start = self.day_end = None
+
+    def __len__(self):
+        return len(self.times)
+
+    def _push(self, index, state_byte, time_ms):
+        # Returns the stored time, or None when the jig is already in that state
+        times = self.times[index]
+        start = self.starts[index]
+        count = self.counts[index]
+        capacity = self.capacity
+        if count:
+            latest = (start + count - 1) % capacity
+            if self.states[index][latest] == state_byte:
+                # Repeating the current state is not a transition
+                return None
+            if time_ms < times[latest]:
+                time_ms = times[latest]
+        position = (start + count) % capacity
+        times[position] = time_ms
+        self.states[index][position] = state_byte
+        if count == capacity:
+            self.starts[index] = (start + 1) % capacity
+            self.evicted += 1
+        else:
+            self.counts[index] = count + 1
+        return time_ms
+
+    def append(self, jig, state, time_ms):
+        """Record that `jig` entered `state` ('W', 'P' or 'S') at `time_ms`."""
+        if not 1 <= jig <= len(self.times):
+            return
+        state_byte = ord(state)
+        with self.lock:
+            time_ms = self._push(jig - 1, state_byte, time_ms)
+            if time_ms is None:
+                return
+            if self.day_end is None or not self.day_start <= time_ms < self.day_end:
+                self._write()
+                self.day_start, self.day_end = day_Bounds(time_ms)
+            self.pending += RECORD.pack(time_ms, jig, bytes((state_byte,)))
+
+    def _write(self):
+        if not self.pending:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        day = datetime.date.fromtimestamp(self.day_start / 1000)
+        with open(os.path.join(self.directory, day.isoformat() + ".bin"), 'ab') as file_day:
+            file_day.write(self.pending)
+        self.pending.clear()
+
+    def flush(self):
+        """Append the pending transitions to their day file. Called on every tick."""
+        with self.lock:
+            self._write()
+
+    def close(self):
+        self.flush()
+
+    def load(self, day):
+        """Fill the rings from the file of `day`, e.g. today's after a restart."""
+        records = read_Day(self.directory, day)
+        with self.lock:
+            for time_ms, jig, state in records:
+                if 1 <= jig <= len(self.times):
+                    self._push(jig - 1, ord(state), time_ms)
+            if records:
+                self.day_start, self.day_end = day_Bounds(records[-1][0])
+        return len(records)
+
+    def _bisect(self, index, time_ms):
+        # Number of transitions of the ring at or before `time_ms`
+        times = self.times[index]
+        start = self.starts[index]
+        capacity = self.capacity
+        low, high = 0, self.counts[index]
+        while low < high:
+            middle = (low + high) // 2
+            if times[(start + middle) % capacity] <= time_ms:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def last(self, jig):
+        """(time ms, state) of the latest transition of `jig`, or None."""
+        index = jig - 1
+        with self.lock:
+            count = self.counts[index]
+            if not count:
+                return None
+            position = (self.starts[index] + count - 1) % self.capacity
+            return self.times[index][position], chr(self.states[index][position])
+
+    def oldest(self, jig):
+        """Time in ms of the oldest transition of `jig` still in memory, or None. Older ones are in the day files."""
+        index = jig - 1
+        with self.lock:
+            return self.times[index][self.starts[index]] if self.counts[index] else None
+
+    def transitions(self, jig, start_ms, end_ms):
+        """(time ms, state) of the transitions of `jig` with start_ms <= time < end_ms, oldest first."""
+        index = jig - 1
+        with self.lock:
+            first = self._bisect(index, start_ms - 1)
+            stop = self._bisect(index, end_ms - 1)
+            times = self.times[index]
+            states = self.states[index]
+            ring_start = self.starts[index]
+            capacity = self.capacity
+            return [(times[(ring_start + i) % capacity], chr(states[(ring_start + i) % capacity]))
+                    for i in range(first, stop)]
+
+    def intervals(self, jig, start_ms, end_ms, state=None, min_ms=0, now_ms=None):
+        """(begin ms, end ms, state) of the intervals of `jig` that overlap [start_ms, end_ms), oldest first.
+
+        `state` keeps only the intervals in that state and `min_ms` the ones lasting at least that long, so
+        the pauses longer than five minutes between 10:00 and 12:00 are
+        `intervals(jig, ten, noon, JIG_PAUSED, 5 * 60 * 1000)`. Intervals are not clipped to the range. The
+        current state ends at `now_ms`, or at `end_ms` when it is None.
+        """
+        index = jig - 1
+        if now_ms is None:
+            now_ms = end_ms
+        state_byte = ord(state) if state is not None else None
+        result = []
+        with self.lock:
+            times = self.times[index]
+            states = self.states[index]
+            ring_start = self.starts[index]
+            count = self.counts[index]
+            capacity = self.capacity
+            # The transition in effect at start_ms, then every one before end_ms
+            first = max(0, self._bisect(index, start_ms) - 1)
+            stop = self._bisect(index, end_ms - 1)
+            for i in range(first, stop):
+                position = (ring_start + i) % capacity
+                begin = times[position]
+                end = times[(ring_start + i + 1) % capacity] if i + 1 < count else max(begin, now_ms)
+                if end <= start_ms:
+                    continue
+                if state_byte is not None and states[position] != state_byte:
+                    continue
+                if end - begin >= min_ms:
+                    result.append((begin, end, chr(states[position])))
+        return result
@@ -0,0 +1,198 @@
+"""
+Description:
+Time accounting for the jig monitor. Instead of chaining a new `threading.Timer` every second for each
+running or paused jig, every jig keeps the monotonic timestamp of its last state change and the running and
+pause totals are computed on demand. A single `TickScheduler` thread drives the periodic GUI refresh, so the
+number of threads does not grow with the number of jigs.
+
+Timestamps and totals are integer nanoseconds of `time.monotonic_ns`. Adding up the intervals of a multi-day
+run therefore loses nothing to float rounding, and a step of the wall clock (NTP, DST, a manual change) does
+not touch them. Seconds are only computed when a total is read.
+
+Classes:
+- JigClock: Running/pause accounting for one jig, driven by W/P/S state changes.
+- JigTable: Store of the JigClock records of all jigs, indexed by jig id.
+- TickScheduler: One thread that calls its callbacks on a fixed monotonic period.
+
+Functions:
+- convert_timeToH_M_S: Converts a number of seconds to a formatted string (HH:MM:SS).
+
+Constants:
+- JIG_RUNNING, JIG_PAUSED, JIG_STOPPED: State codes, matching the letters sent by the AVR firmware.
+- TICK_PERIOD: Default refresh period of the scheduler in seconds.
+- NS_PER_SECOND: Nanoseconds in one second, the unit of the JigClock timestamps and totals.
+
+"""
+import datetime
+import threading
+import time
+
+from jig_metrics import Histogram
+
+JIG_RUNNING = 'W'
+JIG_PAUSED = 'P'
+JIG_STOPPED = 'S'
+
+TICK_PERIOD = 1.0
+NS_PER_SECOND = 1_000_000_000
+
+
+def convert_timeToH_M_S(totalElapsedSeconds):
+    total_seconds = int(totalElapsedSeconds)
+    hours, remainder = divmod(total_seconds, 3600)
+    rminutes, seconds = divmod(remainder, 60)
+    real_time = "{:02d}:{:02d}:{:02d}".format(hours, rminutes, seconds)
+    return real_time
+
+
+class JigClock:
+    """Running and pause totals of one jig, integrated from its state-change timestamps.
+
+    `clock` returns integer nanoseconds, and every `now` argument is a reading of it.
+    """
+
+    __slots__ = ("clock", "state", "since", "running_total", "pause_total", "stop_time")
+
+    def __init__(self, clock=time.monotonic_ns):
+        self.clock = clock
+        self.state = JIG_STOPPED
+        self.since = None
+        self.running_total = 0
+        self.pause_total = 0
+        self.stop_time = None
+
+    def _close(self, now):
+        # Fold the interval of the current state into its total.
+        if self.state == JIG_RUNNING:
+            self.running_total += now - self.since
+        elif self.state == JIG_PAUSED:
+            self.pause_total += now - self.since
+
+    def set_state(self, state, now=None):
+        """Switch to `state` ('W', 'P' or 'S'). Repeating the current state is a no-op."""
+        if state == self.state:
+            return
+        if now is None:
+            now = self.clock()
+        self._close(now)
+        self.state = state
+        self.since = now
+
+    def start(self, now=None):
+        self.set_state(JIG_RUNNING, now)
+
+    def pause(self, now=None):
+        self.set_state(JIG_PAUSED, now)
+
+    def stop(self, now=None):
+        self.set_state(JIG_STOPPED, now)
+
+    def running_ns(self, now=None):
+        """Total running time in nanoseconds, including the currently open interval."""
+        if self.state != JIG_RUNNING:
+            return self.running_total
+        if now is None:
+            now = self.clock()
+        return self.running_total + (now - self.since)
+
+    def pause_ns(self, now=None):
+        """Total pause time in nanoseconds, including the currently open interval."""
+        if self.state != JIG_PAUSED:
+            return self.pause_total
+        if now is None:
+            now = self.clock()
+        return self.pause_total + (now - self.since)
+
+    def running_seconds(self, now=None):
+        return self.running_ns(now) / NS_PER_SECOND
+
+    def pause_seconds(self, now=None):
+        return self.pause_ns(now) / NS_PER_SECOND
+
+
+class JigTable:
+    """The JigClock records of `jig_count` jigs, numbered from 1 like the AVR firmware does.
+
+    Applying an event is a list lookup plus one state change, whatever the number of jigs.
+    """
+
+    def __init__(self, jig_count, clock=time.monotonic_ns, wall_clock=datetime.datetime.now):
+        self.clock = clock
+        self.wall_clock = wall_clock
+        self.jigs = [JigClock(clock) for _ in range(jig_count)]
+
+    def __len__(self):
+        return len(self.jigs)
+
+    def __getitem__(self, jig):
+        return self.jigs[jig - 1]
+
+    def __iter__(self):
+        return iter(self.jigs)
+
+    def reset(self, now=None):
+        """Start a new day: clear every total and stop time, keeping each jig in its current state."""
+        if now is None:
+            now = self.clock()
+        for record in self.jigs:
+            record.running_total = 0
+            record.pause_total = 0
+            record.since = now
+            record.stop_time = None
+
+    def apply(self, jig, state, now=None):
+        """Apply a W/P/S event to `jig`. Returns its JigClock, or None for an unknown jig or state."""
+        if not 1 <= jig <= len(self.jigs) or state not in (JIG_RUNNING, JIG_PAUSED, JIG_STOPPED):
+            return None
+        record = self.jigs[jig - 1]
+        record.set_state(state, now)
+        if state == JIG_STOPPED:
+            record.stop_time = self.wall_clock()
+        return record
+
+
+class TickScheduler:
+    """Calls every registered callback once per `period` seconds from a single daemon thread.
+
+    Deadlines are absolute on the monotonic clock, so a slow callback does not push the following ticks
+    back. If the thread falls more than one period behind, the missed ticks are dropped rather than run
+    in a burst.
+    """
+
+    def __init__(self, period=TICK_PERIOD, clock=time.monotonic):
+        self.period = period
+        self.clock = clock
+        self.callbacks = []
+        self.ticks = 0
+        # Lateness of each tick behind its deadline
+        self.drift = Histogram()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def add(self, callback):
+        self.callbacks.append(callback)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="TickScheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        deadline = self.clock() + self.period
+        while not self._stop_event.wait(max(0.0, deadline - self.clock())):
+            now = self.clock()
+            self.ticks += 1
+            self.drift.observe(max(0.0, now - deadline))
+            for callback in self.callbacks:
+                callback()
+            deadline += self.period
+            if now - deadline > self.period:
+                deadline = now + self.period
@@ -0,0 +1,272 @@
+"""
+Description:
+Live web view of the jig monitor, for the supervisors and the MES next to the operator's Tk window. The page
+at `/` opens one Server-Sent Events stream (`/events`) and draws the jigs from it; `/state` returns the same
+data once as JSON.
+
+The server runs on its own asyncio loop in a daemon thread, so hundreds of open streams cost one socket each
+and no thread. Viewers never poll: when the collector publishes a jig id, the jig is marked changed and one
+push is scheduled. A push encodes the changed jigs once and writes the same bytes to every stream, at most
+every PUSH_INTERVAL, so a burst of events reaches the viewers as one message. The one-second ticks are not
+pushed: each jig is sent with its totals at that moment, and the page counts the running or pause time of
+its current state up by itself. At day change every jig is sent again.
+
+Each message is one `data:` line of compact JSON, `{"n": <server time ms>, "j": [[jig, state, running s,
+pause s, stop "HH:MM:SS" or null], ...]}`; a new stream starts with all the jigs. A viewer whose socket
+backlog exceeds MAX_BACKLOG (a frozen tab, a dead link) is disconnected rather than buffered; its browser
+reconnects and gets all the jigs again.
+
+Classes:
+- WebDashboard: SSE server of the live jig states of a JigCollector.
+
+Constants:
+- PUSH_INTERVAL: Shortest time between two pushes, in seconds.
+- KEEPALIVE_INTERVAL: Seconds between the comments sent to keep idle streams open through proxies.
+- MAX_BACKLOG: Unsent bytes after which a viewer is disconnected.
+
+"""
+import asyncio
+import datetime
+import json
+import threading
+
+from jig_config import JIG_GRID_COLUMNS, STATE_COLOURS
+
+PUSH_INTERVAL = 0.1
+KEEPALIVE_INTERVAL = 15.0
+MAX_BACKLOG = 256 * 1024
+
+PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Jig Monitoring</title>
+<style>
+body{font-family:Arial,sans-serif;background:#222;color:#fff;margin:16px}
+#grid{display:grid;grid-template-columns:repeat(%(columns)d,minmax(220px,1fr));gap:12px}
+.jig{padding:10px;border-radius:4px;color:#000}
+.jig b{font-size:1.3em}
+.jig div{font-size:1.1em;margin-top:4px}
+#status{margin-bottom:12px}
+</style></head>
+<body><div id="status">Connecting...</div><div id="grid"></div>
+<script>
+const COLOURS = %(colours)s;
+const jigs = {};
+function hms(s) {
+  s = Math.max(0, Math.floor(s));
+  const p = n => String(n).padStart(2, "0");
+  return p(Math.floor(s / 3600)) + ":" + p(Math.floor(s / 60) %% 60) + ":" + p(s %% 60);
+}
+function panel(id) {
+  let el = document.getElementById("jig" + id);
+  if (!el) {
+    el = document.createElement("div");
+    el.id = "jig" + id;
+    el.className = "jig";
+    el.innerHTML = "<b>Jig " + id + "</b><div></div><div></div><div></div>";
+    const after = [...document.getElementById("grid").children].find(c => +c.id.slice(3) > id);
+    document.getElementById("grid").insertBefore(el, after || null);
+  }
+  return el;
+}
+function draw(id) {
+  const jig = jigs[id], el = panel(id), rows = el.getElementsByTagName("div");
+  const moved = (performance.now() - jig.at) / 1000;
+  el.style.background = COLOURS[jig.state];
+  rows[0].textContent = "Running " + hms(jig.running + (jig.state === "W" ? moved : 0));
+  rows[1].textContent = "Pausing " + hms(jig.pause + (jig.state === "P" ? moved : 0));
+  rows[2].textContent = "Stopped " + (jig.stop || "--");
+}
+const source = new EventSource("events");
+source.onopen = () => { document.getElementById("status").textContent = "Live"; };
+source.onerror = () => { document.getElementById("status").textContent = "Reconnecting..."; };
+source.onmessage = event => {
+  const at = performance.now();
+  for (const [id, state, running, pause, stop] of JSON.parse(event.data).j) {
+    jigs[id] = {state, running, pause, stop, at};
+    draw(id);
+  }
+};
+setInterval(() => { for (const id in jigs) if (jigs[id].state !== "S") draw(id); }, 1000);
+</script></body></html>
+"""
+
+STREAM_HEADERS = (b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n"
+                  b"Connection: keep-alive\r\nX-Accel-Buffering: no\r\n\r\n")
+
+
+def _response(status, content_type, body):
+    return (f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\nContent-Length: {len(body)}\r\n"
+            f"Cache-Control: no-cache\r\nConnection: close\r\n\r\n").encode() + body
+
+
+class WebDashboard:
+    """Serves the live states of the jigs of `collector` on http://host:port/.
+
+    `start` runs the server on a daemon thread and returns once it listens; `stop` closes every stream.
+    The collector's threads only touch a set under a lock; everything else runs on the server loop, which
+    reads the totals under the journal lock the events are applied under.
+    """
+
+    def __init__(self, collector, port, host="127.0.0.1", push_interval=PUSH_INTERVAL):
+        self.collector = collector
+        self.table = collector.table
+        self.table_lock = collector.journal.lock
+        self.port = port
+        self.host = host
+        self.push_interval = push_interval
+        self.page = (PAGE % {"columns": JIG_GRID_COLUMNS, "colours": json.dumps(STATE_COLOURS)}).encode()
+        self.viewers = set()
+        self.lock = threading.Lock()
+        self.changed = set()
+        self.scheduled = False
+        self.day = None
+        self.loop = None
+        self.server = None
+        self.last_push = 0.0
+        self.pushes = 0
+        self.sent_bytes = 0
+        self.disconnected = 0
+        self._serving = None
+        self._thread = None
+        collector.subscribe(self.post)
+
+    def post(self, item):
+        """Collector subscriber: mark a jig changed and schedule a push. Called from the collector's threads."""
+        if self.loop is None:
+            return
+        if item <= 0:
+            # A tick: the totals are reset at day change, so every jig is sent again then
+            day = datetime.date.fromtimestamp(self.collector.wall_clock())
+            if day == self.day:
+                return
+            self.day = day
+            items = range(1, len(self.table) + 1)
+        else:
+            items = (item,)
+        with self.lock:
+            self.changed.update(items)
+            if self.scheduled:
+                return
+            self.scheduled = True
+        self.loop.call_soon_threadsafe(self._schedule)
+
+    def _schedule(self):
+        self.loop.call_at(max(self.loop.time(), self.last_push + self.push_interval), self.push)
+
+    def encode(self, jigs):
+        """One SSE message with the current totals of `jigs`, read under the journal lock."""
+        rows = []
+        # The state, its start and the totals of a jig are read without an event applied halfway through
+        with self.table_lock:
+            clock_now = self.table.clock()
+            for jig in jigs:
+                record = self.table[jig]
+                rows.append([jig, record.state, int(record.running_seconds(clock_now)),
+                             int(record.pause_seconds(clock_now)),
+                             record.stop_time.strftime("%H:%M:%S") if record.stop_time is not None else None])
+        payload = json.dumps({"n": round(self.collector.wall_clock() * 1000), "j": rows}, separators=(",", ":"))
+        return b"data: " + payload.encode() + b"\n\n"
+
+    def push(self):
+        with self.lock:
+            jigs = sorted(self.changed)
+            self.changed.clear()
+            self.scheduled = False
+        self.last_push = self.loop.time()
+        if jigs and self.viewers:
+            self.broadcast(self.encode(jigs))
+            self.pushes += 1
+
+    def broadcast(self, data):
+        for writer in list(self.viewers):
+            if writer.transport.get_write_buffer_size() > MAX_BACKLOG:
+                self.viewers.discard(writer)
+                self.disconnected += 1
+                writer.transport.abort()
+                continue
+            writer.write(data)
+            self.sent_bytes += len(data)
+
+    async def keepalive(self):
+        while True:
+            await asyncio.sleep(KEEPALIVE_INTERVAL)
+            self.broadcast(b": keepalive\n\n")
+
+    async def handle(self, reader, writer):
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), 10)
+            method, path = head.split(b" ", 2)[:2]
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError, ValueError,
+                ConnectionError):
+            writer.close()
+            return
+        path = path.split(b"?")[0]
+        if method != b"GET":
+            writer.write(_response("405 Method Not Allowed", "text/plain", b"GET only\n"))
+        elif path == b"/events":
+            writer.write(STREAM_HEADERS + b"retry: 2000\n" + self.encode(range(1, len(self.table) + 1)))
+            self.viewers.add(writer)
+            try:
+                # Nothing is expected from the viewer; this returns when it disconnects
+                while await reader.read(1024):
+                    pass
+            except ConnectionError:
+                pass
+            finally:
+                self.viewers.discard(writer)
+        elif path == b"/state":
+            body = self.encode(range(1, len(self.table) + 1))[len(b"data: "):-2]
+            writer.write(_response("200 OK", "application/json", body))
+        elif path in (b"/", b"/index.html"):
+            writer.write(_response("200 OK", "text/html; charset=utf-8", self.page))
+        else:
+            writer.write(_response("404 Not Found", "text/plain", b"Not found\n"))
+        writer.close()
+
+    async def serve(self, started):
+        self.loop = asyncio.get_running_loop()
+        self.day = datetime.date.fromtimestamp(self.collector.wall_clock())
+        self.server = await asyncio.start_server(self.handle, self.host, self.port, backlog=1024)
+        self.port = self.server.sockets[0].getsockname()[1]
+        keepalive = asyncio.create_task(self.keepalive())
+        self._serving = asyncio.current_task()
+        started.set()
+        try:
+            await self.server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+        finally:
+            keepalive.cancel()
+
+    def _shutdown(self):
+        # Closing the streams ends their handlers before the loop stops
+        for writer in self.viewers:
+            writer.transport.abort()
+        self.viewers.clear()
+        self.server.close()
+        self._serving.cancel()
+
+    def start(self):
+        started = threading.Event()
+        failure = []
+
+        def run():
+            try:
+                asyncio.run(self.serve(started))
+            except OSError as exc:
+                failure.append(exc)
+                started.set()
+
+        self._thread = threading.Thread(target=run, name="WebDashboard", daemon=True)
+        self._thread.start()
+        started.wait()
+        if failure:
+            self.loop = None
+            raise failure[0]
+
+    def stop(self):
+        if self._serving is not None and self.loop is not None:
+            self.loop.call_soon_threadsafe(self._shutdown)
+        if self._thread is not None:
+            self._thread.join(timeout=3)
+            self._thread = None
+        self.loop = None
@@ -0,0 +1,5 @@
+# The jig modules are plain scripts in the parent directory, imported by name
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,54 @@
+"""
+Tests of the analytics over cumulative exports: one day per jig, whatever the number of exports of the day.
+
+Usage:
+python -m pytest tests
+"""
+import pytest
+
+pytest.importorskip("pandas")
+
+import jig_analytics
+from jig_export import CSV_HEADER
+
+# Jig 1 on two days with boundaries at 12:00 and midnight; each row holds the totals since midnight
+ROWS = [
+    "3,2,2026,12:00:00 PM,Jig1,03:00:00,01:00:00,11:30:00 AM",
+    "3,3,2026,12:00:01 AM,Jig1,06:00:00,02:00:00,09:00:00 PM",
+    "3,3,2026,12:00:00 PM,Jig1,01:00:00,00:30:00,00:00:00 --",
+    "3,4,2026,12:00:00 AM,Jig1,02:00:00,01:00:00,08:00:00 PM",
+]
+
+
+@pytest.fixture
+def history(tmp_path):
+    path = tmp_path / "month_data.csv"
+    path.write_text(",".join(CSV_HEADER) + "\n" + "\n".join(ROWS) + "\n")
+    return jig_analytics.load_History(str(path), jigs_per_line=4)
+
+
+def test_daily_totals_keep_the_last_export_of_each_day(history):
+    daily = jig_analytics.daily_Totals(history)
+    assert daily["date"].dt.day.tolist() == [2, 3]
+    assert daily["running_s"].tolist() == [6 * 3600, 2 * 3600]
+    assert daily["pause_s"].tolist() == [2 * 3600, 3600]
+    assert daily["stop_s"].tolist() == [21 * 3600, 20 * 3600]
+
+
+def test_summary_does_not_add_up_cumulative_rows(history):
+    summary = jig_analytics.jig_Summary(history)
+    assert summary.loc[1, "days"] == 2
+    assert summary.loc[1, "running_s"] == 8 * 3600
+    assert summary.loc[1, "pause_s"] == 3 * 3600
+    assert summary.loc[1, "utilization"] == pytest.approx(8 / 11)
+
+
+def test_trend_uses_the_daily_totals(history):
+    trend = jig_analytics.rolling_Trend(history, window=2)
+    assert trend[1].tolist() == pytest.approx([6 / 8, (6 / 8 + 2 / 3) / 2])
+
+
+def test_stop_times_count_each_day_once(history):
+    stops = jig_analytics.stop_Time_distribution(history)
+    assert stops.sum() == 2
+    assert stops[21] == 1 and stops[20] == 1
@@ -0,0 +1,54 @@
+"""
+Tests of the TkBridge ending its loop when the pump is stopped or the window is gone.
+
+Usage:
+python -m pytest tests
+"""
+import asyncio
+
+import pytest
+
+tkinter = pytest.importorskip("tkinter")
+
+from jig_async import TkBridge
+from jig_events import EventPump
+
+
+class FakeRoot:
+    def __init__(self):
+        self.updates = 0
+        self.destroyed = False
+
+    def update(self):
+        if self.destroyed:
+            raise tkinter.TclError("can't invoke \"update\" command: application has been destroyed")
+        self.updates += 1
+
+    def destroy(self):
+        self.destroyed = True
+
+
+def run_Bridge(root, pump):
+    bridge = TkBridge(root, pump, min_frame_ms=0, idle_frame_ms=1)
+    return asyncio.run(asyncio.wait_for(bridge.run(), 5))
+
+
+def test_bridge_destroys_the_window_when_the_pump_stops():
+    root = FakeRoot()
+    pump = EventPump(root, lambda items: pump.stop())
+    pump.post("failed")
+    run_Bridge(root, pump)
+    assert root.destroyed
+    assert root.updates == 0
+
+
+def test_bridge_returns_when_a_flush_hits_a_destroyed_window():
+    root = FakeRoot()
+
+    def handler(items):
+        raise tkinter.TclError("invalid command name \".!label\"")
+
+    pump = EventPump(root, handler)
+    pump.post(1)
+    run_Bridge(root, pump)
+    assert root.updates == 0
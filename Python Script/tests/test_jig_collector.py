@@ -0,0 +1,66 @@
+"""
+Tests of the collector: the order of the shift export and the day reset of the journal in the tick, the
+data files kept in a scratch directory, and the notifier left out of replays and benchmarks.
+
+Usage:
+python -m pytest tests
+"""
+import csv
+import datetime
+
+import jig_collector
+from jig_collector import JigCollector
+from jig_config import DATA_PATHS
+from jig_timing import NS_PER_SECOND
+
+
+def test_midnight_boundary_exports_the_day_before_the_reset(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(jig_collector, "SHIFT_BOUNDARIES", ["00:00"])
+    start = datetime.datetime(2026, 3, 2, 23, 0).timestamp()
+    now = [start]
+    collector = JigCollector(jig_count=2, ports=[], metrics_port=None, web_port=None,
+                             clock=lambda: round(now[0] * NS_PER_SECOND), wall_clock=lambda: now[0])
+    # The exporter reads the totals under the lock the events are applied under
+    assert collector.exporter.lock is collector.journal.lock
+    collector.handle_Event(1, "W")
+    now[0] = start + 3599.5
+    collector.tick()
+    now[0] = start + 3600.5
+    collector.tick()
+    collector.stop()
+
+    with open("month_data.csv", newline="") as file_csv:
+        rows = list(csv.reader(file_csv))[1:]
+    assert [row[4] for row in rows] == ["Jig1", "Jig2"]
+    # The jig ran from 23:00 to the export just after midnight
+    assert rows[0][5] == "01:00:00"
+    assert collector.table[1].running_seconds(collector.table.clock()) < 1
+
+
+def test_data_directory_overrides_the_configured_paths(tmp_path, monkeypatch):
+    station = tmp_path / "station"
+    scratch = tmp_path / "scratch"
+    station.mkdir()
+    scratch.mkdir()
+    for name in DATA_PATHS:
+        monkeypatch.setattr(jig_collector, name, str(station / getattr(jig_collector, name)))
+    collector = JigCollector(jig_count=2, ports=[], metrics_port=None, web_port=None, data_directory=str(scratch))
+    collector.handle_Event(1, "W")
+    collector.tick()
+    collector.stop()
+    assert list(station.iterdir()) == []
+    assert (scratch / "jig_journal.bin").exists()
+    assert (scratch / "jig_export_state.json").exists()
+
+
+def test_alert_notifier_can_be_left_out(tmp_path):
+    collector = JigCollector(jig_count=2, ports=[], metrics_port=None, web_port=None, data_directory=str(tmp_path),
+                             alert_notifier=None)
+    # Only the alert log of the scratch directory
+    assert len(collector.rules.notifiers) == 1
+    collector.stop()
+    notified = JigCollector(jig_count=2, ports=[], metrics_port=None, web_port=None, data_directory=str(tmp_path),
+                            alert_notifier="json:dumps")
+    assert len(notified.rules.notifiers) == 2
+    notified.stop()
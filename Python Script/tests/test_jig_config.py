@@ -0,0 +1,56 @@
+"""
+Tests of the INI loading: relative data paths follow the config file, and the serial ports must fit jig_count.
+
+Usage:
+python -m pytest tests
+"""
+import os
+
+import pytest
+
+import jig_config
+
+
+@pytest.fixture
+def settings(monkeypatch):
+    # load_Config rewrites the module globals; monkeypatch puts them back after the test
+    names = [name for _, _, name, _ in jig_config.SETTINGS]
+    for name in names + ["AVR_COM", "CONFIG_PATH", "LOGO_PATH", "STATE_COLOURS"]:
+        monkeypatch.setattr(jig_config, name, getattr(jig_config, name))
+    return jig_config
+
+
+def test_relative_data_paths_follow_the_config_file(settings, tmp_path, monkeypatch):
+    station = tmp_path / "station"
+    station.mkdir()
+    config = station / "jig_monitor.ini"
+    config.write_text("[files]\njournal = data/journal.bin\nhistory = /var/lib/jig/history.db\n")
+    monkeypatch.chdir(tmp_path)
+    settings.load_Config(str(config))
+    assert settings.JOURNAL_PATH == os.path.join(str(station), "data/journal.bin")
+    assert settings.HISTORY_PATH == "/var/lib/jig/history.db"
+    # Paths the file does not set are next to it too
+    assert settings.EXPORT_CSV_PATH == os.path.join(str(station), "month_data.csv")
+    assert settings.ALERT_LOG_PATH == os.path.join(str(station), "jig_alerts.log")
+
+
+def write_Config(tmp_path, text):
+    config = tmp_path / "jig_monitor.ini"
+    config.write_text(text)
+    return str(config)
+
+
+def test_ports_within_jig_count_are_accepted(settings, tmp_path):
+    settings.load_Config(write_Config(tmp_path, "[serial]\nports = COM6:1, COM7:4\n[station]\njig_count = 6\n"))
+    assert settings.AVR_PORTS == [("COM6", 1), ("COM7", 4)]
+
+
+@pytest.mark.parametrize("ports, jig_count, message", [
+    ("COM6:1, COM7:4", 3, "COM7 serves jigs 4-6, outside the jigs 1-3"),
+    ("COM6:0", 3, "COM6 serves jigs 0-2"),
+    ("COM6:1, COM7:3", 9, "COM7 and COM6 both serve jig 3"),
+])
+def test_ports_outside_jig_count_are_rejected(settings, tmp_path, ports, jig_count, message):
+    config = write_Config(tmp_path, f"[serial]\nports = {ports}\n[station]\njig_count = {jig_count}\n")
+    with pytest.raises(ValueError, match=message):
+        settings.load_Config(config)
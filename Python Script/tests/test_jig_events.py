@@ -0,0 +1,73 @@
+"""
+Tests of the EventPump: coalesced widget changes, and a handler stopping the pump in the middle of a batch.
+
+Usage:
+python -m pytest tests
+"""
+from jig_events import EventPump
+
+
+class FakeRoot:
+    """Records the `after` calls and the destruction instead of running a Tk main loop."""
+
+    def __init__(self):
+        self.scheduled = []
+        self.destroyed = False
+
+    def after(self, period_ms, callback):
+        assert not self.destroyed, "after() on a destroyed window"
+        self.scheduled.append(callback)
+
+    def destroy(self):
+        self.destroyed = True
+
+
+class FakeWidget:
+    def __init__(self, root):
+        self.root = root
+        self.configured = []
+
+    def config(self, **options):
+        assert not self.root.destroyed, "config() on a destroyed widget"
+        self.configured.append(options)
+
+
+def test_staged_changes_are_merged_per_frame():
+    root = FakeRoot()
+    label = FakeWidget(root)
+
+    def handler(items):
+        for item in items:
+            pump.update(label, text=str(item))
+
+    pump = EventPump(root, handler)
+    for item in range(5):
+        pump.post(item)
+    pump.drain()
+    assert label.configured == [{"text": "4"}]
+    assert pump.items == 5
+    assert root.scheduled == [pump.drain]
+
+
+def test_stop_ends_the_pump_after_the_batch():
+    root = FakeRoot()
+    label = FakeWidget(root)
+    handled = []
+
+    def handler(items):
+        for item in items:
+            if item == "failed":
+                pump.stop()
+                return
+            handled.append(item)
+            pump.update(label, text=item)
+
+    pump = EventPump(root, handler)
+    for item in ("a", "failed", "b"):
+        pump.post(item)
+    pump.drain()
+    assert handled == ["a"]
+    # The staged change is dropped, the window is destroyed and the pump is not re-armed
+    assert label.configured == []
+    assert root.destroyed
+    assert root.scheduled == []
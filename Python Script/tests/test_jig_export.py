@@ -0,0 +1,143 @@
+"""
+Tests of the shift values of the columnar export across the day reset of the totals and across restarts, of a
+boundary missed while the station was off overnight, and of the lock around the reading of the totals.
+
+Usage:
+python -m pytest tests
+"""
+import csv
+import datetime
+import os
+import threading
+
+import pytest
+
+from jig_export import ShiftExporter
+from jig_timing import NS_PER_SECOND, JigTable
+
+pyarrow_parquet = pytest.importorskip("pyarrow.parquet")
+
+
+class Station:
+    """A JigTable and a ShiftExporter on one simulated clock, with the journal's day reset done by hand."""
+
+    def __init__(self, directory, start):
+        self.directory = directory
+        self.start = start
+        self.seconds = 0.0
+        self.table = JigTable(2, clock=lambda: round(self.seconds * NS_PER_SECOND), wall_clock=self.now)
+        self.open_Exporter()
+
+    def now(self):
+        return self.start + datetime.timedelta(seconds=self.seconds)
+
+    def open_Exporter(self):
+        self.exporter = ShiftExporter(self.table, ["16:30"], os.path.join(self.directory, "month_data.csv"),
+                                      os.path.join(self.directory, "state.json"), ("csv", "parquet"),
+                                      os.path.join(self.directory, "exports"), self.now)
+
+    def tick_At(self, moment):
+        # Exporter first, then the journal's day reset, as in JigCollector.tick
+        day = self.now().date()
+        self.seconds = (moment - self.start).total_seconds()
+        self.exporter.maintain()
+        if self.now().date() != day:
+            self.table.reset()
+
+    def shift_Running(self, boundary):
+        name = "month_data_" + boundary.strftime("%Y%m%d_%H%M") + ".parquet"
+        table = pyarrow_parquet.read_table(os.path.join(self.directory, "exports", name))
+        return table.column("shift_running_seconds").to_pylist()
+
+
+def test_shift_spans_the_day_reset(tmp_path):
+    station = Station(str(tmp_path), datetime.datetime(2026, 3, 2, 12, 0))
+    station.table.apply(1, "W")
+    station.tick_At(datetime.datetime(2026, 3, 2, 16, 30))
+    assert station.shift_Running(datetime.datetime(2026, 3, 2, 16, 30)) == [4.5 * 3600, 0.0]
+    station.tick_At(datetime.datetime(2026, 3, 3, 0, 0, 1))
+    station.tick_At(datetime.datetime(2026, 3, 3, 16, 30))
+    # 16:30 to 16:30, although the totals restarted at midnight
+    assert station.shift_Running(datetime.datetime(2026, 3, 3, 16, 30)) == [24 * 3600, 0.0]
+
+
+def test_shift_survives_a_restart_on_the_same_day(tmp_path):
+    station = Station(str(tmp_path), datetime.datetime(2026, 3, 2, 12, 0))
+    station.table.apply(1, "W")
+    station.tick_At(datetime.datetime(2026, 3, 2, 16, 30))
+    station.tick_At(datetime.datetime(2026, 3, 2, 18, 0))
+    station.exporter.close()
+    station.open_Exporter()
+    station.tick_At(datetime.datetime(2026, 3, 2, 20, 0))
+    station.tick_At(datetime.datetime(2026, 3, 3, 0, 0, 1))
+    station.tick_At(datetime.datetime(2026, 3, 3, 16, 30))
+    assert station.shift_Running(datetime.datetime(2026, 3, 3, 16, 30)) == [24 * 3600, 0.0]
+
+
+def test_shift_carried_over_a_night_switched_off(tmp_path):
+    station = Station(str(tmp_path), datetime.datetime(2026, 3, 2, 12, 0))
+    station.table.apply(1, "W")
+    station.tick_At(datetime.datetime(2026, 3, 2, 16, 30))
+    station.tick_At(datetime.datetime(2026, 3, 2, 20, 0))
+    station.exporter.close()
+    # Restarted the next morning: the journal recovers the totals as of the close and resets them for the day
+    station.seconds = (datetime.datetime(2026, 3, 3, 8, 0) - station.start).total_seconds()
+    station.table.reset()
+    station.open_Exporter()
+    station.tick_At(datetime.datetime(2026, 3, 3, 16, 30))
+    # 3.5 hours before the close and 8.5 hours since the restart
+    assert station.shift_Running(datetime.datetime(2026, 3, 3, 16, 30)) == [12 * 3600, 0.0]
+
+
+def test_rows_are_read_under_the_lock(tmp_path):
+    station = Station(str(tmp_path), datetime.datetime(2026, 3, 2, 12, 0))
+    rows = []
+    with station.exporter.lock:
+        reader = threading.Thread(target=lambda: rows.append(station.exporter.collect_Rows()))
+        reader.start()
+        reader.join(0.05)
+        assert reader.is_alive()
+    reader.join()
+    assert [row[0] for row in rows[0]] == [1, 2]
+
+
+def read_Csv_rows(station):
+    with open(os.path.join(station.directory, "month_data.csv"), newline="") as file_csv:
+        return list(csv.reader(file_csv))[1:]
+
+
+def switch_Off_overnight(station, close):
+    # Jig 1 runs 08:00-15:00 on 2026-03-02, the station is off from 15:30 and restarts the next morning
+    station.tick_At(datetime.datetime(2026, 3, 2, 8, 0))
+    station.table.apply(1, "W")
+    station.tick_At(datetime.datetime(2026, 3, 2, 15, 0))
+    station.table.apply(1, "S")
+    station.tick_At(datetime.datetime(2026, 3, 2, 15, 30))
+    if close:
+        station.exporter.close()
+    station.seconds = (datetime.datetime(2026, 3, 3, 7, 0) - station.start).total_seconds()
+    station.table.reset()
+    station.open_Exporter()
+    station.tick_At(datetime.datetime(2026, 3, 3, 7, 0, 1))
+
+
+def test_boundary_missed_overnight_is_exported_from_the_closing_totals(tmp_path):
+    station = Station(str(tmp_path), datetime.datetime(2026, 3, 2, 7, 0))
+    switch_Off_overnight(station, close=True)
+    rows = read_Csv_rows(station)
+    # Dated at the missed boundary, with the totals of that day rather than the zeros of the restart
+    assert [row[:6] for row in rows] == [["3", "2", "2026", "04:30:00 PM", "Jig1", "07:00:00"],
+                                         ["3", "2", "2026", "04:30:00 PM", "Jig2", "00:00:00"]]
+    assert rows[0][7] == "03:00:00 PM"
+    assert station.shift_Running(datetime.datetime(2026, 3, 2, 16, 30)) == [7 * 3600, 0.0]
+    # The next shift starts at that boundary
+    station.table.apply(1, "W")
+    station.tick_At(datetime.datetime(2026, 3, 3, 16, 30))
+    assert station.shift_Running(datetime.datetime(2026, 3, 3, 16, 30)) == [9.5 * 3600 - 1, 0.0]
+
+
+def test_boundary_missed_after_a_crash_is_not_exported_as_zeros(tmp_path):
+    station = Station(str(tmp_path), datetime.datetime(2026, 3, 2, 7, 0))
+    switch_Off_overnight(station, close=False)
+    assert not os.path.exists(os.path.join(station.directory, "month_data.csv"))
+    assert station.exporter.last_exported == datetime.datetime(2026, 3, 2, 16, 30)
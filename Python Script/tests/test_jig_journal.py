@@ -0,0 +1,62 @@
+"""
+Tests of the event journal: totals recovered after a crash, and replayed across a wall clock stepped back.
+
+Usage:
+python -m pytest tests
+"""
+import datetime
+
+from jig_journal import RECORD, EventJournal, replay_Journal
+from jig_timing import NS_PER_SECOND
+
+
+class FakeClocks:
+    """Wall clock in seconds and monotonic clock in nanoseconds, moved by hand."""
+
+    def __init__(self, start):
+        self.now = start
+
+    def wall(self):
+        return self.now
+
+    def monotonic_ns(self):
+        return round(self.now * NS_PER_SECOND)
+
+
+def open_Journal(directory, clocks):
+    journal = EventJournal(str(directory / "jig_journal.bin"), str(directory / "jig_snapshot.json"),
+                           wall_clock=clocks.wall)
+    return journal, journal.recover(2, clocks.monotonic_ns)
+
+
+def test_running_jig_without_events_is_recovered_within_one_interval(tmp_path):
+    # 01:00 local time, so the three hours of ticks stay within one day
+    clocks = FakeClocks(datetime.datetime(2026, 3, 2, 1, 0).timestamp())
+    journal, table = open_Journal(tmp_path, clocks)
+    journal.apply(table, 1, "W")
+    for _ in range(3 * 3600):
+        clocks.now += 1
+        journal.maintain(table)
+    live = table[1].running_seconds(clocks.monotonic_ns())
+    # Crash: the file is dropped without close(), then the station restarts
+    journal.file.close()
+    _, recovered = open_Journal(tmp_path, clocks)
+    assert live == 3 * 3600
+    assert live - recovered[1].running_seconds(clocks.monotonic_ns()) <= journal.snapshot_interval
+
+
+def test_replay_across_a_wall_clock_stepped_back_never_lowers_the_totals():
+    start = datetime.datetime(2026, 3, 2, 8, 0).timestamp()
+    # Jig 1 runs an hour and pauses, then the clock is set back half an hour while it runs ten more minutes
+    records = [(start, 1, b"W"), (start + 3600, 1, b"P"), (start + 1800, 1, b"W"), (start + 2400, 1, b"S")]
+    journal_bytes = b"".join(RECORD.pack(*record) for record in records)
+    last_running = last_pause = 0
+    for count in range(1, len(records) + 1):
+        table, until = replay_Journal(2, None, journal_bytes[:count * RECORD.size])
+        now = round(until * NS_PER_SECOND)
+        assert table[1].running_ns(now) >= last_running
+        assert table[1].pause_ns(now) >= last_pause
+        last_running = table[1].running_ns(now)
+        last_pause = table[1].pause_ns(now)
+    assert table[1].running_seconds(now) == 3600 + 600
+    assert table[1].pause_seconds(now) == 0
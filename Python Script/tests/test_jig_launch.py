@@ -0,0 +1,28 @@
+"""
+Tests of the launcher: `--profile` leaves the station's data files alone.
+
+Usage:
+python -m pytest tests
+"""
+import argparse
+import time
+
+import jig_config
+from jig_journal import RECORD
+from jig_launch import StartupProfile, profile_Startup
+
+
+def test_headless_profile_works_on_a_copy_of_the_journal(tmp_path, monkeypatch, capsys):
+    station = tmp_path / "station"
+    station.mkdir()
+    journal = station / "jig_journal.bin"
+    now = time.time()
+    journal.write_bytes(RECORD.pack(now - 100, 1, b"W") + RECORD.pack(now - 50, 2, b"P"))
+    for name in jig_config.DATA_PATHS:
+        monkeypatch.setattr(jig_config, name, str(station / getattr(jig_config, name)))
+    before = journal.read_bytes()
+    profile = StartupProfile()
+    profile_Startup(argparse.Namespace(headless=True, asyncio=False), profile)
+    assert journal.read_bytes() == before
+    assert [path.name for path in station.iterdir()] == ["jig_journal.bin"]
+    assert "collector built (journal recovered)" in capsys.readouterr().out
@@ -0,0 +1,31 @@
+"""
+Tests of the alert delivery of the RuleEngine: the inline callback and the notifier thread.
+
+Usage:
+python -m pytest tests
+"""
+import threading
+
+from jig_rules import RuleEngine
+
+
+def test_alert_reaches_the_callback_while_a_notifier_is_stuck():
+    release = threading.Event()
+    notified = []
+    seen = []
+
+    def stuck_Notifier(alert):
+        release.wait(5)
+        notified.append(alert)
+
+    engine = RuleEngine([], [("COM6", 1, 3)], [stuck_Notifier],
+                        on_alert=lambda alert: seen.append((alert, threading.current_thread())))
+    first = engine.alert("pause", 1, "Jig 1 paused")
+    second = engine.alert("pause", 2, "Jig 2 paused")
+    # Both alerts are seen on the raising thread although the notifier is still blocked on the first one
+    assert seen == [(first, threading.current_thread()), (second, threading.current_thread())]
+    assert notified == []
+    release.set()
+    engine.close()
+    assert notified == [first, second]
+    assert first.board == "COM6"
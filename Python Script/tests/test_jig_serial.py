@@ -0,0 +1,142 @@
+"""
+Tests of the serial framing: FrameReader.feed on split, merged and noisy token streams, and the same tokens
+written to a pty and read by the SerialMux through the production opener.
+
+Usage:
+python -m pytest tests
+"""
+import os
+import random
+import threading
+import time
+import tty
+
+import pytest
+
+from jig_mux import BoardPort, SerialMux, open_Serial
+from jig_serial import FrameReader
+
+
+def test_single_token():
+    reader = FrameReader()
+    assert reader.feed(b"1W") == [(1, "W")]
+    assert reader.frames == 1
+    assert reader.dropped == 0
+    assert reader.buffer == bytearray()
+
+
+def test_merged_tokens_in_order():
+    reader = FrameReader()
+    assert reader.feed(b"1W2P3S1P") == [(1, "W"), (2, "P"), (3, "S"), (1, "P")]
+    assert reader.frames == 4
+
+
+def test_token_split_across_reads():
+    reader = FrameReader()
+    assert reader.feed(b"1W2") == [(1, "W")]
+    assert reader.buffer == bytearray(b"2")
+    assert reader.feed(b"P") == [(2, "P")]
+    assert reader.dropped == 0
+
+
+def test_every_split_point():
+    stream = b"1W2P3S3W1S2W"
+    expected = FrameReader().feed(stream)
+    for cut in range(len(stream) + 1):
+        reader = FrameReader()
+        assert reader.feed(stream[:cut]) + reader.feed(stream[cut:]) == expected
+
+
+def test_byte_by_byte():
+    reader = FrameReader()
+    tokens = []
+    for byte in b"3P1W":
+        tokens += reader.feed(bytes((byte,)))
+    assert tokens == [(3, "P"), (1, "W")]
+
+
+def test_lost_letter_does_not_swallow_next_token():
+    reader = FrameReader()
+    assert reader.feed(b"1") == []
+    assert reader.feed(b"2P3W") == [(2, "P"), (3, "W")]
+    assert reader.dropped == 1
+
+
+def test_noise_is_dropped_and_counted():
+    reader = FrameReader()
+    assert reader.feed(b"\r\nxx1W\x00\xff2P\n") == [(1, "W"), (2, "P")]
+    assert reader.dropped == 7
+    assert reader.bytes == 11
+
+
+def test_zero_and_lowercase_are_noise():
+    reader = FrameReader()
+    assert reader.feed(b"0W1w1W") == [(1, "W")]
+    assert reader.dropped == 4
+
+
+def test_pending_tail_is_one_byte():
+    # A run of digits is noise except the last one, which may start a token
+    reader = FrameReader()
+    assert reader.feed(b"123456789") == []
+    assert reader.buffer == bytearray(b"9")
+    assert reader.dropped == 8
+    assert reader.feed(b"S") == [(9, "S")]
+
+
+def test_random_stream_with_random_reads():
+    rng = random.Random(7)
+    sent = [(rng.randint(1, 9), rng.choice("WPS")) for _ in range(5000)]
+    stream = b"".join(f"{jig}{state}".encode() for jig, state in sent)
+    reader = FrameReader()
+    received = []
+    offset = 0
+    while offset < len(stream):
+        size = rng.randint(1, 64)
+        received += reader.feed(stream[offset:offset + size])
+        offset += size
+    assert received == sent
+    assert reader.dropped == 0
+    assert reader.bytes == len(stream)
+
+
+@pytest.fixture
+def pty_device():
+    master_fd, slave_fd = os.openpty()
+    tty.setraw(master_fd)
+    tty.setraw(slave_fd)
+    yield master_fd, os.ttyname(slave_fd)
+    os.close(master_fd)
+    os.close(slave_fd)
+
+
+def test_pty_through_serial_mux(pty_device):
+    pytest.importorskip("serial")
+    master_fd, device = pty_device
+    rng = random.Random(3)
+    sent = [(rng.randint(1, 3), rng.choice("WPS")) for _ in range(2000)]
+    stream = b"".join(f"{jig}{state}".encode() for jig, state in sent)
+    received = []
+    # Board of station jigs 4-6: local jig 1 is station jig 4
+    port = BoardPort(device, 4)
+    mux = SerialMux([port], lambda jig, state: received.append((jig, state)), opener=open_Serial)
+
+    def write():
+        # Odd-sized writes so tokens are cut across reads
+        offset = 0
+        while offset < len(stream):
+            size = rng.randint(1, 37)
+            os.write(master_fd, stream[offset:offset + size])
+            offset += size
+            time.sleep(0.0002)
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    deadline = time.monotonic() + 10
+    while len(received) < len(sent) and time.monotonic() < deadline:
+        mux.poll(0.05)
+    writer.join()
+    mux.close()
+    assert received == [(jig + 3, state) for jig, state in sent]
+    assert port.reader.dropped == 0
+    assert port.rejected == 0
@@ -0,0 +1,24 @@
+"""
+Tests of the replay harness on an empty session, e.g. a station journal just compacted.
+
+Usage:
+python -m pytest tests
+"""
+import sys
+
+import pytest
+
+import jig_sim
+
+
+def test_replay_of_an_empty_session_is_rejected():
+    with pytest.raises(ValueError, match="no events"):
+        jig_sim.replay_Session([])
+
+
+def test_replay_command_reports_an_empty_journal(tmp_path, monkeypatch, capsys):
+    journal = tmp_path / "jig_journal.bin"
+    journal.write_bytes(b"")
+    monkeypatch.setattr(sys, "argv", ["jig_sim.py", "replay", str(journal)])
+    assert jig_sim.main() == 1
+    assert "no events to replay" in capsys.readouterr().out
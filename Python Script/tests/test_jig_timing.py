@@ -0,0 +1,65 @@
+"""
+Tests of the JigClock accounting: random W/P/S sequences on a fake nanosecond clock, each total compared with an
+independent sum of its intervals.
+
+Usage:
+python -m pytest tests
+"""
+import random
+
+from jig_timing import JIG_PAUSED, JIG_RUNNING, NS_PER_SECOND, JigClock
+
+ACCOUNTING_SEQUENCES = 5000
+# Gaps between two events, from a bounce of the keypad to a long break, in nanoseconds
+EVENT_GAPS = (1_000_000, 250_000_000, 5 * NS_PER_SECOND, 90 * NS_PER_SECOND, 3600 * NS_PER_SECOND,
+              8 * 3600 * NS_PER_SECOND)
+
+
+def check_Accounting(sequences=ACCOUNTING_SEQUENCES, seed=1):
+    """Drive JigClocks with a fake nanosecond clock through random W/P/S sequences over a ten-day uptime.
+
+    Every total read mid-sequence and at the end is compared with a plain sum of the intervals spent in each
+    state, and checked to never decrease. Returns (events, reads, mismatches).
+    """
+    rng = random.Random(seed)
+    now = [0]
+    clock = lambda: now[0]
+    events = 0
+    reads = 0
+    mismatches = 0
+    for _ in range(sequences):
+        record = JigClock(clock)
+        now[0] = rng.randrange(10 * 24 * 3600 * NS_PER_SECOND)
+        spent = {"W": 0, "P": 0, "S": 0}
+        state = "S"
+        since = now[0]
+        last_running = last_pause = 0
+        for _ in range(rng.randint(1, 12)):
+            now[0] += rng.randrange(1, rng.choice(EVENT_GAPS))
+            new_state = rng.choice("WPS")
+            record.set_state(new_state)
+            events += 1
+            if new_state != state:
+                spent[state] += now[0] - since
+                state = new_state
+                since = now[0]
+            if rng.random() < 0.5:
+                now[0] += rng.randrange(1, rng.choice(EVENT_GAPS))
+            running = record.running_ns()
+            pause = record.pause_ns()
+            open_interval = now[0] - since
+            expected_running = spent["W"] + (open_interval if state == JIG_RUNNING else 0)
+            expected_pause = spent["P"] + (open_interval if state == JIG_PAUSED else 0)
+            reads += 1
+            if (running != expected_running or pause != expected_pause or running < last_running
+                    or pause < last_pause):
+                mismatches += 1
+            last_running = running
+            last_pause = pause
+    return events, reads, mismatches
+
+
+def test_random_sequences_match_the_sum_of_their_intervals():
+    events, reads, mismatches = check_Accounting()
+    assert events > ACCOUNTING_SEQUENCES
+    assert mismatches == 0
@@ -0,0 +1,27 @@
+"""
+Tests of the web dashboard: the totals of a push are read under the lock the events are applied under.
+
+Usage:
+python -m pytest tests
+"""
+import json
+import threading
+
+from jig_collector import JigCollector
+from jig_web import WebDashboard
+
+
+def test_rows_are_encoded_under_the_journal_lock(tmp_path):
+    collector = JigCollector(jig_count=2, ports=[], metrics_port=None, web_port=None, data_directory=str(tmp_path),
+                             alert_notifier=None)
+    web = WebDashboard(collector, 0)
+    messages = []
+    with collector.journal.lock:
+        reader = threading.Thread(target=lambda: messages.append(web.encode([1, 2])))
+        reader.start()
+        reader.join(0.05)
+        assert reader.is_alive()
+    reader.join()
+    collector.stop()
+    rows = json.loads(messages[0][len(b"data: "):])["j"]
+    assert [row[0] for row in rows] == [1, 2]